@@ -4,15 +4,16 @@ from __future__ import annotations
 import datetime as dt
 import pandas as pd
 import streamlit as st
-import logging
 
 from main import main as update_data
+from src.analytics.conclusion_timeline import timeline_for
 from src.analytics.signal_generator import generate_conclusion
 from src.config.settings import get_settings
+from src.services import intraday, tracing
 from src.services.data_loader import all_data_loaded, filter_df, load_dataset
 from src.ui.dashboards import backtesting_dashboard, btc_dashboard, eth_dashboard, macro_dashboard
 
-logging.basicConfig(level=logging.DEBUG, filename='app.log', filemode='w', format='%(name)s - %(levelname)s - %(message)s', encoding='utf-8')
+tracing.configure()
 
 st.set_page_config(page_title="MacroCryptoSentinel — Global Compass", layout="wide")
 st.title("🧭 MacroCryptoSentinel — Global Compass")
@@ -20,18 +21,25 @@ st.title("🧭 MacroCryptoSentinel — Global Compass")
 settings = get_settings()
 DATASETS: list[str] = list(settings.files.keys())
 
+# cache_resource, а не cache_data: один и тот же объект фрейма между перезапусками скрипта,
+# иначе DateView (filter_df) строился бы заново для каждой распакованной копии. Фреймы только читаются.
+@st.cache_resource(show_spinner=False)
+def _cached_ds(name: str):
+    df = load_dataset(name)
+    # Дневные бары из внутридневных партиций: последний день — по последнему часовому бару
+    if settings.intraday.enabled and settings.intraday.serve_daily and name in settings.intraday.assets:
+        df = intraday.daily_bars(name, df)
+    return df
+
+
 if st.button("Обновить все данные"):
     with st.spinner("Скачиваю и обрабатываю данные…"):
         update_data()
         st.cache_data.clear()
+        _cached_ds.clear()
     st.success("Данные обновлены!")
 
 
-@st.cache_data(show_spinner=False)
-def _cached_ds(name: str):
-    return load_dataset(name)
-
-
 dfs: dict[str, pd.DataFrame | None] = {name: _cached_ds(name) for name in DATASETS}
 
 if not all_data_loaded(dfs):
@@ -157,9 +165,13 @@ with tab_conclusion:
         key="concl_slider",
     )
 
-    filtered_dfs = {k: filter_df(v, conclusion_min_date, end_date) for k, v in dfs.items() if v is not None}
-
-    concl = generate_conclusion(filtered_dfs)
+    # Таймлайн строится после обновления данных; без него (или вне его диапазона) считаем на лету
+    timeline = timeline_for(dfs)
+    if timeline is not None and timeline.covers(end_date):
+        concl = timeline.at(end_date)
+    else:
+        filtered_dfs = {k: filter_df(v, conclusion_min_date, end_date) for k, v in dfs.items() if v is not None}
+        concl = generate_conclusion(filtered_dfs)
 
     if isinstance(concl, tuple) and len(concl) == 3:
         per_asset, combined_score, combined_verdict = concl
@@ -0,0 +1,114 @@
+"""
+Backtest engine benchmark: NumPy simulation (backtest_engine.py) vs MacroStrategy on backtrader.
+
+    python -m benchmarks.bench_backtest                  # vectorized engine: runs per minute
+    python -m benchmarks.bench_backtest --check 30       # + 30 random scenarios against backtrader
+
+Scenarios use the stored BTC/ETH prices with random signal tables (cadence, flags, confidence
+outside [0, 1] and NaN, dyn_min_score), fees, trailing stops, and opens jittered away from the
+previous close so that some entries are rejected for cash. The equity curve must be identical to
+the backtrader broker's values and the trade log CSV byte-for-byte identical.
+"""
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.analytics.backtest import _run_backtrader, _run_vectorized, _slice_price
+from src.analytics.backtest_engine import align_signals, simulate
+from src.config.settings import get_settings
+from src.services.data_loader import load_dataset
+
+BUDGET_RUNS_PER_MINUTE = 1000
+
+
+def _scenario(rng: np.random.Generator, df_price: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame, float, float]:
+    price = df_price.copy()
+    jitter = float(rng.choice([0.0, 0.02]))
+    if jitter:
+        prev = price["close"].shift(1).fillna(price["close"])
+        price["open"] = prev * (1 + rng.normal(0.0, jitter, len(price)))
+    dates = price["date"].iloc[:: int(rng.integers(1, 8))]
+    n = len(dates)
+    confidence = rng.uniform(-0.2, 1.2, n)
+    confidence[rng.random(n) < 0.05] = np.nan
+    signals = pd.DataFrame({
+        "date": dates.to_numpy(),
+        "total_score": rng.normal(0.0, 2.0, n),
+        "dyn_min_score": rng.uniform(1.0, 2.5, n),
+        "signal": rng.choice([-1, 0, 1, 1], n),
+        "confidence": confidence,
+    })
+    fee = float(rng.choice([0.0, 0.001, 0.01]))
+    stop = float(rng.choice([0.0, 0.05, 0.15, 0.5]))
+    return price, signals, fee, stop
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", type=int, default=0, metavar="N", help="compare N random scenarios with backtrader")
+    parser.add_argument("--runs", type=int, default=2000, help="simulations timed per asset")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    s = get_settings()
+    saved = s.backtest
+    dfs = {name: load_dataset(name) for name in s.files}
+    rng = np.random.default_rng(args.seed)
+
+    failed = False
+    with tempfile.TemporaryDirectory(prefix="mcs_bt_") as tmp:
+        s.backtest = dataclasses.replace(saved, trade_log_dir=tmp)
+        try:
+            for asset in ["BTC", "ETH"]:
+                df_price = _slice_price(dfs[asset.lower()])
+                price, signals, fee, stop = _scenario(rng, df_price)
+                bars = align_signals(price["date"], signals)
+                open_, close = price["open"].to_numpy(dtype=float), price["close"].to_numpy(dtype=float)
+                t0 = time.perf_counter()
+                for _ in range(args.runs):
+                    simulate(open_, close, bars, initial_capital=100.0, fee=fee, trailing_stop=stop)
+                per_run = (time.perf_counter() - t0) / args.runs
+                rate = 60.0 / per_run
+                status = "ok" if rate >= BUDGET_RUNS_PER_MINUTE else f"UNDER BUDGET ({BUDGET_RUNS_PER_MINUTE}/min)"
+                failed |= rate < BUDGET_RUNS_PER_MINUTE
+                print(f"{asset}: {len(price)} bars, simulate {per_run * 1000:.2f} ms -> {rate:,.0f} backtests/min [{status}]")
+
+                bt_seconds = vec_seconds = 0.0
+                for i in range(args.check):
+                    price, signals, fee, stop = _scenario(rng, df_price)
+                    s.backtest = dataclasses.replace(s.backtest, trailing_stop_pct=stop)
+                    t0 = time.perf_counter()
+                    ref, ref_log = _run_backtrader(dfs, asset, price, signals, 100.0, fee)
+                    t1 = time.perf_counter()
+                    ref_bytes = Path(ref_log).read_bytes()
+                    t2 = time.perf_counter()
+                    vec, vec_log = _run_vectorized(asset, price, signals, 100.0, fee)
+                    t3 = time.perf_counter()
+                    bt_seconds += t1 - t0
+                    vec_seconds += t3 - t2
+                    if not np.array_equal(ref["Equity"].to_numpy(), vec["Equity"].to_numpy()) or ref_bytes != Path(vec_log).read_bytes():
+                        failed = True
+                        print(f"{asset}: scenario {i} (fee={fee}, stop={stop}) DIFFERS from backtrader")
+                if args.check:
+                    print(f"{asset}: {args.check} scenarios identical to backtrader unless reported above; "
+                          f"backtrader {bt_seconds / args.check:.2f} s/run, vectorized with CSV log "
+                          f"{vec_seconds / args.check * 1000:.1f} ms/run")
+        finally:
+            s.backtest = saved
+
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Plotly figure payloads with and without server-side downsampling (ui.downsample).
+
+    python -m benchmarks.bench_charts                        # stored datasets
+    python -m benchmarks.bench_charts --hourly --years 5     # synthetic hourly market (benchmarks/synthetic.py)
+
+Builds the long-series charts of the dashboards (price candles, VIX deviation, risk-on/off, liquidity
+vacuum, rolling correlation, equity curve) and reports the build time, the number of plotted points
+and the size of the figure JSON that Streamlit ships to the browser.
+"""
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generate_market
+from src.analytics.statistics import add_vix_deviation_indicators
+from src.config.settings import get_settings
+from src.services.data_loader import load_dataset
+from src.ui import components
+
+NAMES = ["btc", "vix", "spx", "nasdaq", "dxy", "us10y"]
+
+
+def _figures(dfs: dict[str, pd.DataFrame]) -> dict[str, callable]:
+    btc = dfs["btc"]
+    equity = btc[["date", "close"]].assign(Equity=100.0 * btc["close"] / btc["close"].iloc[0])
+    return {
+        "candlestick": lambda: components.candlestick(btc, "BTC Price"),
+        "vix_deviation": lambda: components.vix_deviation(dfs["vix"]),
+        "normalised_performance": lambda: components.normalised_performance(
+            {"BTC %": btc, "S&P 500 %": dfs["spx"], "Nasdaq %": dfs["nasdaq"]}
+        ),
+        "liquidity_vacuum": lambda: components.liquidity_vacuum(btc, dfs["dxy"], dfs["us10y"]),
+        "rolling_correlation": lambda: components.rolling_correlation(btc, dfs["spx"]),
+        "equity_curve_chart": lambda: components.equity_curve_chart(equity, initial_capital=100.0),
+    }
+
+
+def _points(fig) -> int:
+    return sum(len(trace.x) for trace in fig.data if trace.x is not None)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hourly", action="store_true", help="synthetic hourly bars instead of the stored datasets")
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    if args.hourly:
+        dfs = generate_market(n_assets=2, years=args.years, freq="hourly")
+        dfs = {name: df.assign(date=df["date"].dt.tz_localize(None)) for name, df in dfs.items()}
+    else:
+        dfs = {name: load_dataset(name) for name in NAMES}
+        missing = [name for name, df in dfs.items() if df is None]
+        if missing:
+            raise SystemExit(f"datasets not found: {missing}")
+    dfs["vix"] = add_vix_deviation_indicators(dfs["vix"])
+    print(f"btc: {len(dfs['btc'])} bars, {dfs['btc']['date'].min():%Y-%m-%d} .. {dfs['btc']['date'].max():%Y-%m-%d}")
+
+    s = get_settings()
+    saved = s.ui
+    try:
+        for name, build in _figures(dfs).items():
+            row = []
+            for downsample in (False, True):
+                s.ui = dataclasses.replace(saved, downsample=downsample)
+                times = []
+                for _ in range(args.repeat):
+                    t0 = time.perf_counter()
+                    fig = build()
+                    payload = fig.to_json()
+                    times.append(time.perf_counter() - t0)
+                row.append((float(np.median(times)), _points(fig), len(payload)))
+            (t_off, p_off, b_off), (t_on, p_on, b_on) = row
+            print(f"{name:24s} full {p_off:8d} pts {b_off / 1024:9.1f} KiB {t_off * 1000:7.1f} ms | "
+                  f"downsampled {p_on:6d} pts {b_on / 1024:8.1f} KiB {t_on * 1000:7.1f} ms")
+    finally:
+        s.ui = saved
+
+
+if __name__ == "__main__":
+    main()
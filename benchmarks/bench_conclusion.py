@@ -0,0 +1,89 @@
+"""
+Conclusion tab: timeline lookup (src/analytics/conclusion_timeline.py) vs generate_conclusion per slider move.
+
+    python -m benchmarks.bench_conclusion                # 100 random as-of days
+    python -m benchmarks.bench_conclusion --days 0       # every day of the timeline
+
+Builds the timeline from the stored datasets (without writing it), then for each sampled as-of day
+compares the looked-up conclusion with generate_conclusion on the datasets filtered to
+[conclusion_min_date, day] and reports the time of both paths.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.analytics.conclusion_timeline import ConclusionTimeline, build_timeline, timeline_key, timeline_range
+from src.analytics.signal_generator import generate_conclusion
+from src.config.settings import get_settings
+from src.services.data_loader import filter_df, load_dataset
+
+
+def _equal(got, ref) -> bool:
+    if tuple(got[1:]) != tuple(ref[1:]):
+        return False
+    for asset, (table, *rest) in ref[0].items():
+        g_table, *g_rest = got[0][asset]
+        if tuple(g_rest) != tuple(rest):
+            return False
+        try:
+            pd.testing.assert_frame_equal(g_table.reset_index(drop=True), table.reset_index(drop=True), check_dtype=False)
+        except AssertionError:
+            return False
+    return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=100, help="as-of days to check (0 = all)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    s = get_settings()
+    if not s.compass_mode:
+        raise SystemExit("the timeline covers Compass mode only")
+    dfs = {name: load_dataset(name) for name in s.files}
+    missing = [name for name, df in dfs.items() if df is None]
+    if missing:
+        raise SystemExit(f"datasets not found: {missing}")
+
+    t0 = time.perf_counter()
+    df = build_timeline(dfs)
+    start, end = timeline_range(dfs)
+    timeline = ConclusionTimeline(df, start, end, timeline_key(dfs))
+    print(f"timeline {start} .. {end}: {len(df)} rows, {df.memory_usage(deep=True).sum() / 1024:.0f} KiB, "
+          f"built in {time.perf_counter() - t0:.1f}s")
+
+    days = pd.date_range(start, end, freq="D").date
+    if args.days:
+        rng = np.random.default_rng(args.seed)
+        days = sorted(rng.choice(days, size=min(args.days, len(days)), replace=False))
+
+    lookup = live = 0.0
+    mismatched = []
+    for day in days:
+        t0 = time.perf_counter()
+        got = timeline.at(day)
+        t1 = time.perf_counter()
+        ref = generate_conclusion({k: filter_df(v, start, day) for k, v in dfs.items()})
+        t2 = time.perf_counter()
+        lookup, live = lookup + (t1 - t0), live + (t2 - t1)
+        if not _equal(got, ref):
+            mismatched.append(day)
+
+    n = len(days)
+    print(f"{n} as-of days: lookup {lookup / n * 1000:.2f} ms, generate_conclusion {live / n * 1000:.1f} ms per slider move")
+    if mismatched:
+        print(f"MISMATCH on {len(mismatched)} days, first: {mismatched[:5]}")
+        raise SystemExit(1)
+    print("timeline equal to generate_conclusion on every checked day")
+
+
+if __name__ == "__main__":
+    main()
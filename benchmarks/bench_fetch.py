@@ -0,0 +1,98 @@
+"""
+Offline fetch benchmark: full update_all_data against the local HTTP stand-in
+(benchmarks/http_standin.py), run in a temporary copy of data/.
+
+    python -m benchmarks.bench_fetch
+    python -m benchmarks.bench_fetch --latency 0.5
+
+Scenarios: sequential (1 worker), concurrent (fetch.max_workers), and concurrent with faults
+(CFTC answers 503 twice, then recovers; ^GSPC is down for good), and the multi-ticker Yahoo job
+with ^GSPC down (the other tickers are fetched one by one, only spx fails).
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import dataclasses
+import io
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.http_standin import StandInServer
+from src.config.settings import get_settings
+from src.services.data_loader import load_dataset
+from src.services.updater import update_all_data
+
+
+def _same(df, ref) -> bool:
+    if df is None or ref is None:
+        return False
+    try:
+        pd.testing.assert_frame_equal(df, ref, check_dtype=False)
+        return True
+    except AssertionError:
+        return False
+
+
+def _run(data_root: Path, fetch, **server_kwargs) -> tuple[float, dict, StandInServer]:
+    s = get_settings()
+    with tempfile.TemporaryDirectory(prefix="mcs_fetch_") as tmp, StandInServer(data_root, **server_kwargs) as srv:
+        # Пустой data/ и cache/http: всё, что окажется на диске, пришло через стенд.
+        (Path(tmp) / "data" / "raw").mkdir(parents=True)
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            s.data_dir = "data/processed"
+            s.fetch = dataclasses.replace(fetch, yahoo_url=srv.url, cftc_url=srv.url)
+            s.updater = dataclasses.replace(s.updater, state_file=str(Path(tmp) / "update_state.json"))
+            t0 = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                status = update_all_data(full=True)
+            elapsed = time.perf_counter() - t0
+            frames = {name: load_dataset(name) for name in s.files}
+        finally:
+            os.chdir(cwd)
+    return elapsed, {"status": status, "frames": frames}, srv
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.3, help="stand-in latency per request, seconds")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    s = get_settings()
+    data_root = Path("data").resolve()
+    data_dir, fetch0, updater0 = s.data_dir, s.fetch, s.updater
+    reference = {name: load_dataset(name) for name in s.files}
+
+    base = dataclasses.replace(fetch0, yahoo_batch=False, backoff_base=0.05, rate_limits={"yahoo": 20.0, "cftc": 10.0})
+    scenarios = [
+        ("sequential", dataclasses.replace(base, max_workers=1), {}),
+        ("concurrent", base, {}),
+        ("faults", base, {"fail_first": {"/resource": 2}, "down": {"^GSPC"}}),
+        # Пакетная загрузка Yahoo: недоступный тикер валит только свой датасет
+        ("batch", dataclasses.replace(base, yahoo_batch=True), {"down": {"^GSPC"}}),
+    ]
+    try:
+        for label, fetch, faults in scenarios:
+            elapsed, out, srv = _run(data_root, fetch, latency=args.latency, **faults)
+            failed = {k: v for k, v in out["status"].items() if v.startswith("failed")}
+            same = [name for name, df in out["frames"].items() if _same(df, reference[name])]
+            print(
+                f"{label:10s} {elapsed:6.2f}s  requests={sum(srv.requests.values()):3d}  "
+                f"identical={len(same)}/{len(reference)}  failed={sorted(failed) or '-'}"
+            )
+    finally:
+        s.data_dir, s.fetch, s.updater = data_dir, fetch0, updater0
+        load_dataset.cache_clear()
+
+
+if __name__ == "__main__":
+    main()
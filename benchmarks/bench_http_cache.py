@@ -0,0 +1,118 @@
+"""
+Response cache of the fetchers (src/services/http_cache.py) against the local HTTP stand-in
+(benchmarks/http_standin.py), in a temporary copy of data/ with a fake clock:
+
+    python -m benchmarks.bench_http_cache
+    python -m benchmarks.bench_http_cache --latency 0.3
+
+Runs update_all_data repeatedly and reports the requests sent and the 304 answers of each run:
+cold (empty cache), repeated within the TTL, after the TTL with unchanged upstream (CFTC revalidates
+with 304, Yahoo is re-downloaded), after a new CFTC release, and a full refresh. Every run must leave
+the stored datasets equal to the reference ones.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import dataclasses
+import io
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.http_standin import StandInServer
+from src.config.settings import get_settings
+from src.services import http_cache
+from src.services.data_loader import load_dataset
+from src.services.updater import update_all_data
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = time.time()
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def _identical(reference: dict) -> int:
+    load_dataset.cache_clear()
+    n = 0
+    for name, ref in reference.items():
+        df = load_dataset(name)
+        try:
+            pd.testing.assert_frame_equal(df, ref, check_dtype=False)
+            n += 1
+        except (AssertionError, TypeError):
+            pass
+    return n
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.1, help="stand-in latency per request, seconds")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    s = get_settings()
+    data_root = Path("data").resolve()
+    saved = s.data_dir, s.fetch, s.updater, s.http_cache
+    reference = {name: load_dataset(name) for name in s.files}
+    clock = FakeClock()
+    ttl = max(s.http_cache.ttl.values())
+    failed = False
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="mcs_http_") as tmp, StandInServer(data_root, latency=args.latency) as srv:
+        (Path(tmp) / "data" / "raw").mkdir(parents=True)
+        os.chdir(tmp)
+        try:
+            s.data_dir = "data/processed"
+            s.fetch = dataclasses.replace(s.fetch, yahoo_url=srv.url, cftc_url=srv.url, yahoo_batch=False, backoff_base=0.05)
+            s.updater = dataclasses.replace(s.updater, state_file=str(Path(tmp) / "update_state.json"))
+            s.http_cache = dataclasses.replace(s.http_cache, enabled=True)
+            # Кэш с поддельными часами: response_cache() отдаёт его, пока dir/ttl совпадают с настройками
+            http_cache._CACHE = http_cache.ResponseCache(s.http_cache.dir, s.http_cache.ttl, clock=clock)
+
+            steps = [
+                ("cold (full)", True, None),
+                ("incremental", False, None),
+                ("within ttl", False, None),
+                ("after ttl", False, lambda: clock.advance(ttl + 1)),
+                ("new release", False, lambda: (clock.advance(ttl + 1), srv.touch_cot())),
+                ("full refresh", True, None),
+            ]
+            print(f"{'run':13s} {'time':>7s} {'requests':>9s} {'304':>4s}  identical  status")
+            for label, full, before in steps:
+                if before:
+                    before()
+                n_req, n_304 = sum(srv.requests.values()), srv.not_modified
+                t0 = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    status = update_all_data(full=full)
+                elapsed = time.perf_counter() - t0
+                same = _identical(reference)
+                bad = sorted(k for k, v in status.items() if v.startswith("failed"))
+                failed |= bool(bad) or same != len(reference)
+                print(f"{label:13s} {elapsed:6.2f}s {sum(srv.requests.values()) - n_req:9d} {srv.not_modified - n_304:4d}  "
+                      f"{same}/{len(reference)}        {bad or 'ok'}")
+            print("cache:", ", ".join(f"{src} {n} entries / {size / 1024:.0f} KiB" for src, (n, size) in http_cache.response_cache().stats().items()))
+        finally:
+            os.chdir(cwd)
+            s.data_dir, s.fetch, s.updater, s.http_cache = saved
+            http_cache._CACHE = None
+            load_dataset.cache_clear()
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Cold import time of app.py's dependencies (what `streamlit run app.py` imports before the first render).
+
+    python -m benchmarks.bench_imports                          # budget check
+    python -m benchmarks.bench_imports --profile 25             # + -X importtime, 25 slowest modules
+    python -m benchmarks.bench_imports --module src.analytics.backtest --profile 15
+
+Every measurement is a fresh interpreter. The frameworks app.py imports itself (streamlit, pandas, ...)
+are loaded first; the budget applies to what the project's modules add on top of them. Fails (exit 1)
+when that exceeds the budget or pulls in one of the heavy modules that are only needed on demand
+(data update, backtrader engine, ML).
+"""
+from __future__ import annotations
+
+import argparse
+import ast
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BUDGET_MS = 150.0
+HEAVY = ("yfinance", "requests", "sklearn", "joblib", "backtrader", "pyfolio")
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+{frameworks}
+t1 = time.perf_counter()
+before = set(sys.modules)
+{own}
+t2 = time.perf_counter()
+print(json.dumps({{"frameworks": t1 - t0, "own": t2 - t1, "new": sorted(set(sys.modules) - before)}}))
+"""
+
+
+def app_imports(path: str = "app.py") -> tuple[list[str], list[str]]:
+    """Top-level imports of app.py split into (frameworks, project modules)."""
+    tree = ast.parse(Path(path).read_text(encoding="utf-8"))
+    names: list[str] = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names += [a.name for a in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and node.module != "__future__":
+            names.append(node.module)
+    own = [n for n in names if n == "main" or n.startswith("src.")]
+    return [n for n in names if n not in own], own
+
+
+def _imports(modules: list[str]) -> str:
+    return "\n".join(f"import {m}" for m in modules) or "pass"
+
+
+def probe(frameworks: list[str], own: list[str]) -> dict:
+    code = _PROBE.format(frameworks=_imports(frameworks), own=_imports(own))
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def importtime_profile(modules: list[str], top: int) -> None:
+    """Prints the slowest modules (cumulative) and self time per top-level package from -X importtime."""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", _imports(modules)], capture_output=True, text=True, check=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cum_us)))
+
+    print(f"\n{'module':48s} {'cumulative':>11s} {'self':>9s}")
+    for name, self_us, cum_us in sorted(rows, key=lambda r: -r[2])[:top]:
+        print(f"{name:48s} {cum_us / 1000:9.1f}ms {self_us / 1000:7.1f}ms")
+
+    packages: dict[str, int] = {}
+    for name, self_us, _cum in rows:
+        packages[name.split(".")[0]] = packages.get(name.split(".")[0], 0) + self_us
+    print(f"\n{'package (self time)':48s} {'total':>11s}")
+    for name, us in sorted(packages.items(), key=lambda kv: -kv[1])[:top]:
+        print(f"{name:48s} {us / 1000:9.1f}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", action="append", default=None, help="measure these modules instead of app.py's imports")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters; the median is reported")
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS)
+    parser.add_argument("--profile", type=int, default=0, metavar="N", help="print the N slowest modules (-X importtime)")
+    args = parser.parse_args()
+
+    if args.module:
+        frameworks, own = [], args.module
+    else:
+        frameworks, own = app_imports()
+    print(f"frameworks: {', '.join(frameworks) or '-'}")
+    print(f"project:    {', '.join(own)}")
+
+    runs = [probe(frameworks, own) for _ in range(args.runs)]
+    fw_ms = statistics.median(r["frameworks"] for r in runs) * 1000
+    own_ms = statistics.median(r["own"] for r in runs) * 1000
+    heavy = sorted({m for r in runs for m in r["new"] if m.split(".")[0] in HEAVY and "." not in m})
+
+    failed = own_ms > args.budget_ms or bool(heavy)
+    status = "ok" if own_ms <= args.budget_ms else f"OVER BUDGET ({args.budget_ms:.0f} ms)"
+    print(f"cold import: frameworks {fw_ms:.0f} ms, project {own_ms:.0f} ms [{status}], {args.runs} runs (median)")
+    if heavy:
+        print(f"heavy modules imported eagerly: {', '.join(heavy)}")
+
+    if args.profile:
+        importtime_profile(frameworks + own, args.profile)
+
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
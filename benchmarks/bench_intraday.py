@@ -0,0 +1,104 @@
+"""
+Intraday storage (src/services/intraday.py): month-partitioned hourly bars, streamed resampling.
+
+    python -m benchmarks.bench_intraday                      # 5 years of synthetic hourly BTC
+    python -m benchmarks.bench_intraday --years 30 --backend feather
+
+Writes synthetic hourly bars (benchmarks/synthetic.py) into monthly partitions of a temporary data_dir,
+re-merges an overlapping tail, then compares resample() (daily UTC, daily New York, weekly) with a
+pandas resample of the whole history in memory and reports time and peak traced memory of both paths.
+"""
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import logging
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generate_market
+from src.config.settings import get_settings
+from src.services import intraday
+
+AGG = {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
+
+
+def _reference(bars: pd.DataFrame, rule: str, tz: str) -> pd.DataFrame:
+    """The whole history in memory, resampled by pandas."""
+    df = bars.set_index(bars["date"].dt.tz_convert(tz)).drop(columns="date")
+    freq = "W-MON" if rule == "W" else "D"
+    out = df.resample(freq, label="left", closed="left").agg(AGG).dropna(subset=["close"])
+    out.index = out.index.tz_convert("UTC").tz_localize(None)
+    return out.rename_axis("date").reset_index()
+
+
+def _measure(fn):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    out = fn()
+    elapsed = time.perf_counter() - t0
+    _cur, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return out, elapsed, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--backend", default=None, help="storage backend of the partitions (default: config)")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    bars = generate_market(n_assets=2, years=args.years, freq="hourly")["btc"]
+    s = get_settings()
+    saved = s.data_dir, s.storage
+    with tempfile.TemporaryDirectory() as tmp:
+        s.data_dir = tmp
+        if args.backend:
+            s.storage = dataclasses.replace(s.storage, backend=args.backend)
+        try:
+            t0 = time.perf_counter()
+            months = intraday.write_bars("btc", bars)
+            t_write = time.perf_counter() - t0
+            # Повторная загрузка хвоста с перекрытием: новые бары заменяют сохранённые
+            tail = bars.iloc[-24 * 10:].copy()
+            tail["close"] = tail["close"] * 1.01
+            bars = pd.concat([bars.iloc[:-len(tail)], tail], ignore_index=True)
+            t0 = time.perf_counter()
+            intraday.write_bars("btc", tail)
+            t_tail = time.perf_counter() - t0
+            print(f"{len(bars)} hourly bars -> {len(months)} partitions in {t_write:.2f}s, "
+                  f"10-day tail merged in {t_tail * 1000:.0f} ms")
+
+            failed = False
+            for rule, tz in [("D", "UTC"), ("D", "America/New_York"), ("W", "UTC")]:
+                got, t_stream, m_stream = _measure(lambda: intraday.resample("btc", rule, tz=tz))
+                ref, t_full, m_full = _measure(
+                    lambda: _reference(pd.concat(intraday.iter_bars("btc"), ignore_index=True).assign(
+                        date=lambda d: d["date"].dt.tz_localize("UTC")), rule, tz))
+                try:
+                    pd.testing.assert_frame_equal(got, ref, check_dtype=False, rtol=1e-6)
+                    verdict = "equal"
+                except AssertionError as e:
+                    failed, verdict = True, f"MISMATCH: {str(e).splitlines()[0]}"
+                print(f"{rule} {tz:17s} {len(got):6d} bars: streamed {t_stream:.2f}s / {m_stream / 2**20:6.1f} MiB peak, "
+                      f"in memory {t_full:.2f}s / {m_full / 2**20:6.1f} MiB peak — {verdict}")
+
+            last = intraday.resample("btc", "D").iloc[-1]
+            expected = bars[bars["date"].dt.normalize() == bars["date"].iloc[-1].normalize()]["close"].iloc[-1]
+            if not np.isclose(last["close"], expected):
+                failed = True
+                print("MISMATCH: re-merged tail not visible in the last daily bar")
+        finally:
+            s.data_dir, s.storage = saved
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
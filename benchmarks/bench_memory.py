@@ -0,0 +1,69 @@
+"""
+Memory footprint of the loaded datasets with pandas default dtypes vs the dtype schemas (settings.dtypes).
+
+    python -m benchmarks.bench_memory
+    python -m benchmarks.bench_memory --backend feather
+
+Loads every configured dataset twice through load_dataset (schemas off / on) and reports the deep memory
+usage per dataset and column changes; then checks that the Compass signals of BTC and ETH are equal.
+"""
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import logging
+
+import pandas as pd
+
+from src.analytics.signal_generator import generate_signals
+from src.config.settings import get_settings
+from src.services.data_loader import load_dataset
+
+
+def _load_all(names: list[str], enabled: bool) -> dict[str, pd.DataFrame]:
+    s = get_settings()
+    s.dtypes = dataclasses.replace(s.dtypes, enabled=enabled)
+    load_dataset.cache_clear()
+    return {name: df for name in names if (df := load_dataset(name)) is not None}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", default=None, help="storage backend to read (default: config)")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    s = get_settings()
+    saved_dtypes, saved_storage, saved_cache = s.dtypes, s.storage, s.signal_cache
+    if args.backend:
+        s.storage = dataclasses.replace(s.storage, backend=args.backend)
+    s.signal_cache = dataclasses.replace(s.signal_cache, enabled=False)
+    try:
+        names = list(s.files)
+        before = _load_all(names, enabled=False)
+        after = _load_all(names, enabled=True)
+
+        total_b = total_a = 0
+        print(f"{'dataset':10s} {'rows':>6s} {'default':>11s} {'schema':>11s}  changed columns")
+        for name in names:
+            if name not in before:
+                continue
+            b = int(before[name].memory_usage(deep=True).sum())
+            a = int(after[name].memory_usage(deep=True).sum())
+            total_b, total_a = total_b + b, total_a + a
+            changed = [f"{c}:{after[name][c].dtype}" for c in after[name].columns if after[name][c].dtype != before[name][c].dtype]
+            print(f"{name:10s} {len(after[name]):6d} {b / 1024:8.1f} KiB {a / 1024:8.1f} KiB  {', '.join(changed) or '-'}")
+        print(f"{'total':10s} {'':6s} {total_b / 1024:8.1f} KiB {total_a / 1024:8.1f} KiB  "
+              f"(-{(1 - total_a / max(total_b, 1)) * 100:.0f}%)")
+
+        for asset in ("BTC", "ETH"):
+            pd.testing.assert_frame_equal(generate_signals(before, asset), generate_signals(after, asset))
+        print("signals (BTC, ETH): equal with and without the schemas")
+    finally:
+        s.dtypes, s.storage, s.signal_cache = saved_dtypes, saved_storage, saved_cache
+        load_dataset.cache_clear()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+build_features over the signal loop's date-prefix slices: re-merging every source per call
+vs slicing the pre-aligned MarketPanel (src/analytics/market_panel.py).
+
+    python -m benchmarks.bench_panel                # weekly steps
+    python -m benchmarks.bench_panel --step 1 --check
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+
+import pandas as pd
+
+from src.analytics.features import build_features
+from src.analytics.market_panel import MarketPanel, data_fingerprint
+from src.analytics.signal_generator import _build_slice_plan, _signal_price_frame, _slice_at
+from src.config.settings import get_settings
+from src.services.data_loader import load_dataset
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--step", type=int, default=7, help="rows between evaluated dates")
+    parser.add_argument("--check", action="store_true", help="compare panel slices with the merge path")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    s = get_settings()
+    dfs = {name: load_dataset(name) for name in s.files}
+
+    t0 = time.perf_counter()
+    panel = MarketPanel.build(dfs, data_fingerprint(dfs))
+    print(f"panel build {1000 * (time.perf_counter() - t0):.0f} ms")
+
+    plan = _build_slice_plan(dfs)
+    for asset in ["BTC", "ETH"]:
+        price = _signal_price_frame(dfs, asset)
+        slices = [_slice_at(plan, d) for d in price["date"].iloc[:: args.step]]
+        for for_signals in (True, False):
+            timings = {}
+            outputs = {}
+            for label, p in [("merge", None), ("panel", panel)]:
+                t0 = time.perf_counter()
+                outputs[label] = [build_features(sl, asset, for_signals, panel=p) for sl in slices]
+                timings[label] = time.perf_counter() - t0
+            if args.check:
+                for a, b in zip(outputs["merge"], outputs["panel"]):
+                    pd.testing.assert_frame_equal(a, b, check_exact=True)
+            print(
+                f"{asset} for_signals={for_signals!s:5s} {len(slices)} slices: merge {timings['merge']:.2f}s, "
+                f"panel {timings['panel']:.2f}s (x{timings['merge'] / timings['panel']:.1f})"
+                + ("  identical" if args.check else "")
+            )
+
+
+if __name__ == "__main__":
+    main()
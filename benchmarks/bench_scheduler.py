@@ -0,0 +1,169 @@
+"""
+Release-calendar update scheduler (src/services/update_scheduler.py) against the local HTTP stand-in
+(benchmarks/http_standin.py) publishing data on a fake clock, in a temporary copy of data/:
+
+    python -m benchmarks.bench_scheduler
+    python -m benchmarks.bench_scheduler --start 2026-02-01 --days 21
+
+A full update as of --start, then --days of simulated time: the scheduler sleeps on the fake clock
+and polls each source group after its releases only. Reports polls and requests per group against
+naive hourly polling of everything, and checks that the stored datasets end equal to data/, that the
+incrementally extended signals equal generate_signals on the final data and that the incrementally
+rescored Conclusion timeline equals a full build_timeline.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import dataclasses
+import io
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.http_standin import StandInServer
+from src.analytics import conclusion_timeline
+from src.analytics.signal_generator import generate_signals
+from src.config.settings import get_settings
+from src.services import http_cache
+from src.services.data_loader import load_dataset
+from src.services.update_scheduler import UpdateScheduler
+from src.services.updater import update_all_data
+
+
+class FakeClock:
+    def __init__(self, start: pd.Timestamp) -> None:
+        self.now = start.timestamp()
+        self.slept = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+        self.slept += seconds
+
+
+def _identical(reference: dict) -> int:
+    load_dataset.cache_clear()
+    n = 0
+    for name, ref in reference.items():
+        try:
+            pd.testing.assert_frame_equal(load_dataset(name), ref, check_dtype=False)
+            n += 1
+        except (AssertionError, TypeError):
+            pass
+    return n
+
+
+def _check(label: str, fn) -> bool:
+    try:
+        fn()
+    except AssertionError as e:
+        print(f"{label}: MISMATCH {str(e).splitlines()[0]}")
+        return False
+    print(f"{label}: equal")
+    return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--start", default="2026-02-08 10:00", help="simulated start (UTC)")
+    parser.add_argument("--days", type=float, default=14.7, help="simulated duration")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    s = get_settings()
+    data_root = Path("data").resolve()
+    saved = s.data_dir, s.fetch, s.updater, s.http_cache, s.signal_cache
+    reference = {name: load_dataset(name) for name in s.files}
+    start = pd.Timestamp(args.start, tz="UTC")
+    end = start + pd.Timedelta(days=args.days)
+    clock = FakeClock(start)
+    failed = False
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="mcs_sched_") as tmp, StandInServer(data_root, clock=clock) as srv:
+        (Path(tmp) / "data" / "raw").mkdir(parents=True)
+        os.chdir(tmp)
+        try:
+            s.data_dir = "data/processed"
+            # Лимит запросов — реальные секунды, а время здесь поддельное
+            s.fetch = dataclasses.replace(s.fetch, yahoo_url=srv.url, cftc_url=srv.url, backoff_base=0.05, rate_limits={})
+            s.updater = dataclasses.replace(s.updater, state_file=str(Path(tmp) / "update_state.json"))
+            s.http_cache = dataclasses.replace(s.http_cache, enabled=True)
+            http_cache._CACHE = http_cache.ResponseCache(s.http_cache.dir, s.http_cache.ttl, clock=clock)
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                update_all_data(full=True)
+            load_dataset.cache_clear()
+            n_full = sum(srv.requests.values())
+            print(f"full update as of {start:%Y-%m-%d %H:%M} UTC: {n_full} requests")
+
+            scheduler = UpdateScheduler(clock=clock, sleep=clock.sleep)
+            requests = {}
+            poll = scheduler.poll
+
+            def counted(groups):
+                n = sum(srv.requests.values())
+                with contextlib.redirect_stdout(io.StringIO()):
+                    status = poll(groups)
+                for cal in groups:
+                    requests[cal.name] = requests.get(cal.name, 0) + (sum(srv.requests.values()) - n) / len(groups)
+                return status
+
+            scheduler.poll = counted
+            t0 = time.perf_counter()
+            scheduler.run(until=end)
+            elapsed = time.perf_counter() - t0
+
+            # Наивный вариант: каждый час инкрементальное обновление всех источников
+            n = sum(srv.requests.values())
+            http_cache.expire()
+            with contextlib.redirect_stdout(io.StringIO()):
+                update_all_data(full=False)
+            per_update = sum(srv.requests.values()) - n
+            hours = int(args.days * 24)
+
+            print(f"{args.days:g} simulated days in {elapsed:.1f}s ({clock.slept / 3600:.0f} h slept)")
+            print(f"{'group':10s} {'polls':>6s} {'requests':>9s}")
+            for cal in scheduler.calendars:
+                print(f"{cal.name:10s} {scheduler.polls[cal.name]:6d} {requests.get(cal.name, 0):9.0f}")
+            total = sum(requests.values())
+            print(f"{'total':10s} {sum(scheduler.polls.values()):6d} {total:9.0f}   "
+                  f"(hourly polling: {hours} polls, ~{hours * per_update} requests)")
+
+            same = _identical(reference)
+            failed |= same != len(reference)
+            print(f"stored datasets: {same}/{len(reference)} identical to data/")
+
+            dfs = {name: load_dataset(name) for name in s.files}
+            s.signal_cache = dataclasses.replace(s.signal_cache, enabled=False)
+            for asset in scheduler.assets:
+                failed |= not _check(f"{asset} extended signals vs generate_signals", lambda: pd.testing.assert_frame_equal(
+                    scheduler.signals[asset], generate_signals(dfs, asset)))
+            timeline = conclusion_timeline.load_timeline()
+            if timeline is None:
+                failed = True
+                print("conclusion timeline: MISSING")
+            else:
+                as_str = {col: str for col in conclusion_timeline.CATEGORIES}
+                failed |= not _check("incremental conclusion timeline vs build_timeline", lambda: pd.testing.assert_frame_equal(
+                    timeline.df.astype(as_str), conclusion_timeline.build_timeline(dfs).astype(as_str), check_dtype=False))
+        finally:
+            os.chdir(cwd)
+            s.data_dir, s.fetch, s.updater, s.http_cache, s.signal_cache = saved
+            http_cache._CACHE = None
+            load_dataset.cache_clear()
+            conclusion_timeline.load_timeline.cache_clear()
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
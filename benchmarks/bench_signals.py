@@ -0,0 +1,64 @@
+"""
+Compass signal generation benchmark: daily cadence (step_days=1) over the full history.
+
+    python -m benchmarks.bench_signals            # vectorized engine only
+    python -m benchmarks.bench_signals --check    # + reference loop and row-for-row comparison (slow)
+"""
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import logging
+import time
+
+import pandas as pd
+
+from src.analytics.compass_engine import generate_signals_vectorized
+from src.analytics.signal_generator import _generate_signals_compass_loop
+from src.config.settings import get_settings
+from src.services.data_loader import load_dataset
+
+BUDGET_SECONDS = 1.0
+
+
+def _best_of(fn, repeats: int) -> tuple[float, pd.DataFrame]:
+    best = float("inf")
+    out = None
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="also run the reference loop and compare outputs")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    logging.disable(logging.DEBUG)
+
+    s = get_settings()
+    s.compass_mode = True
+    s.signals = dataclasses.replace(s.signals, step_days=1)
+    dfs = {name: load_dataset(name) for name in s.files}
+
+    failed = False
+    for asset in ["BTC", "ETH"]:
+        elapsed, vec = _best_of(lambda: generate_signals_vectorized(dfs, asset), args.repeats)
+        status = "ok" if elapsed < BUDGET_SECONDS else f"OVER BUDGET ({BUDGET_SECONDS:.1f}s)"
+        failed |= elapsed >= BUDGET_SECONDS
+        print(f"{asset}: {len(vec)} daily signals, vectorized {elapsed * 1000:.1f} ms [{status}]")
+
+        if args.check:
+            loop_elapsed, ref = _best_of(lambda: _generate_signals_compass_loop(dfs, asset), 1)
+            pd.testing.assert_frame_equal(ref, vec)
+            print(f"{asset}: reference loop {loop_elapsed:.1f} s, outputs identical (x{loop_elapsed / elapsed:.0f})")
+
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Processed-data load benchmark: every configured dataset through load_dataset, per storage backend.
+
+    python -m benchmarks.bench_storage
+    python -m benchmarks.bench_storage --repeats 20 --backends csv feather
+
+Each backend gets a temporary copy of data_dir (binary ones via the storage migration); loads
+are compared to the CSV frames before timing.
+"""
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import logging
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from src.config.settings import get_settings
+from src.services.data_loader import load_dataset
+from src.services.storage import BACKENDS, migrate
+
+
+def _load_all(names) -> dict:
+    load_dataset.cache_clear()
+    return {name: load_dataset(name) for name in names}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    s = get_settings()
+    src_dir = Path(s.data_dir)
+    names = list(s.files)
+
+    s.storage = dataclasses.replace(s.storage, backend="csv")
+    reference = _load_all(names)
+
+    timings = {}
+    for backend in args.backends:
+        with tempfile.TemporaryDirectory(prefix="mcs_storage_") as tmp:
+            for rel_path in s.files.values():
+                if (src_dir / rel_path).exists():
+                    shutil.copy2(src_dir / rel_path, Path(tmp) / rel_path)
+            s.data_dir = tmp
+            s.storage = dataclasses.replace(s.storage, backend=backend)
+            if backend != "csv":
+                migrate(backend, tmp)
+                for rel_path in s.files.values():
+                    (Path(tmp) / rel_path).unlink(missing_ok=True)
+
+            loaded = _load_all(names)
+            for name in names:
+                if reference[name] is not None:
+                    pd.testing.assert_frame_equal(loaded[name].copy(), reference[name], check_dtype=False)
+
+            best = float("inf")
+            for _ in range(args.repeats):
+                t0 = time.perf_counter()
+                _load_all(names)
+                best = min(best, time.perf_counter() - t0)
+            timings[backend] = best
+
+    s.data_dir = str(src_dir)
+    load_dataset.cache_clear()
+
+    base = timings.get("csv")
+    for backend, elapsed in timings.items():
+        speedup = f" (x{base / elapsed:.1f} vs csv)" if base and backend != "csv" else ""
+        print(f"{backend:8s} {len(names)} datasets in {elapsed * 1000:7.1f} ms{speedup}")
+
+
+if __name__ == "__main__":
+    main()
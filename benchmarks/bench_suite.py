@@ -0,0 +1,263 @@
+"""
+End-to-end benchmark suite on synthetic market data (benchmarks/synthetic.py).
+
+    python -m benchmarks.bench_suite                                   # 2 assets, 5 years, daily
+    python -m benchmarks.bench_suite --assets 2,10,50 --years 2,10,30 --stages load_dataset,build_features
+    python -m benchmarks.bench_suite --freq hourly --years 2 --out bench.json
+    python -m benchmarks.bench_suite --compare bench_before.json --out bench_after.json
+
+For every (assets, years, freq) point the data are generated, written to a temporary data
+directory with the configured storage backend and timed stage by stage:
+
+    load_dataset          all datasets, cold (cache cleared)
+    build_features        for_signals=True and False, per benchmarked asset
+    generate_signals      Compass (configured engine) and legacy mode, per benchmarked asset
+    generate_conclusion   Compass and legacy mode
+    run_trend_validation  Compass, per benchmarked asset
+    run_backtest          legacy mode (backtest.engine), per benchmarked asset
+
+Every stage runs cold: the signal cache is off, and the load_dataset cache, the MarketPanel
+cache and the walk-forward models are reset before each repeat. Peak memory is the tracemalloc peak of one extra
+(untimed) run of the stage; the JSON also records the process max RSS.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import dataclasses
+import io
+import json
+import logging
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+from benchmarks.synthetic import FREQS, asset_names, generate_market, write_market
+from src.config.settings import get_settings
+from src.services.data_loader import load_dataset
+
+STAGES = [
+    "load_dataset",
+    "build_features",
+    "generate_signals",
+    "generate_conclusion",
+    "run_trend_validation",
+    "run_backtest",
+]
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def _reset_caches() -> None:
+    from src.analytics import market_panel
+    from src.analytics.ml import get_model_cache
+
+    load_dataset.cache_clear()
+    market_panel._PANELS.clear()
+    get_model_cache().clear()
+
+
+def _measure(fn: Callable[[], object], repeats: int, memory: bool) -> Dict[str, Optional[float]]:
+    times = []
+    for _ in range(repeats):
+        _reset_caches()
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    peak_mb = None
+    if memory:
+        _reset_caches()
+        tracemalloc.start()
+        try:
+            fn()
+            peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            tracemalloc.stop()
+    return {"seconds": min(times), "mean_seconds": sum(times) / len(times), "peak_mb": peak_mb}
+
+
+def _mode(compass: bool):
+    """Switches settings.compass_mode for the duration of a call."""
+
+    @contextlib.contextmanager
+    def ctx():
+        s = get_settings()
+        prev = s.compass_mode
+        s.compass_mode = compass
+        try:
+            yield
+        finally:
+            s.compass_mode = prev
+
+    return ctx
+
+
+def _cases(stages: List[str], assets: List[str], capital: float) -> List[tuple]:
+    """(stage, mode, asset, fn(dfs)) for the selected stages."""
+    from src.analytics.backtest import run_backtest
+    from src.analytics.features import build_features
+    from src.analytics.signal_generator import generate_conclusion, generate_signals
+    from src.analytics.trend_validation import run_trend_validation
+
+    cases: List[tuple] = []
+    if "load_dataset" in stages:
+        cases.append(("load_dataset", "-", "all", None))
+    for asset in assets:
+        if "build_features" in stages:
+            cases.append(("build_features", "signals", asset, lambda dfs, a=asset: build_features(dfs, a, for_signals=True)))
+            cases.append(("build_features", "ml", asset, lambda dfs, a=asset: build_features(dfs, a, for_signals=False)))
+        if "generate_signals" in stages:
+            for mode in ("compass", "legacy"):
+                cases.append(("generate_signals", mode, asset, lambda dfs, a=asset: generate_signals(dfs, a)))
+        if "run_trend_validation" in stages:
+            cases.append(("run_trend_validation", "compass", asset,
+                          lambda dfs, a=asset: run_trend_validation(dfs, a, initial_capital=capital)))
+        if "run_backtest" in stages:
+            cases.append(("run_backtest", "legacy", asset,
+                          lambda dfs, a=asset: run_backtest(dfs, a, initial_capital=capital, fee_pct=0.001)))
+    if "generate_conclusion" in stages:
+        for mode in ("compass", "legacy"):
+            cases.append(("generate_conclusion", mode, "BTC+ETH", generate_conclusion))
+    return cases
+
+
+def run_point(n_assets: int, years: int, freq: str, args: argparse.Namespace) -> List[dict]:
+    s = get_settings()
+    t0 = time.perf_counter()
+    dfs_gen = generate_market(n_assets, years, freq, seed=args.seed)
+    gen_seconds = time.perf_counter() - t0
+    bench_assets = [a.upper() for a in asset_names(n_assets)[: args.bench_assets]]
+    rows = {name: len(df) for name, df in dfs_gen.items()}
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="mcs_bench_") as tmp:
+        s.files = write_market(dfs_gen, Path(tmp) / "processed")
+        s.data_dir = str(Path(tmp) / "processed")
+        s.ml = dataclasses.replace(s.ml, model_cache_dir=str(Path(tmp) / "models"))
+        s.backtest = dataclasses.replace(s.backtest, trade_log_dir=str(Path(tmp) / "logs"))
+        s.signal_cache = dataclasses.replace(s.signal_cache, enabled=False)
+        del dfs_gen
+
+        load_all = lambda: {name: load_dataset(name) for name in s.files}  # noqa: E731
+        dfs = load_all()
+        for stage, mode, asset, fn in _cases(args.stages, bench_assets, s.backtest.initial_capital_default):
+            call = load_all if fn is None else (lambda f=fn: f(dfs))
+            ctx = _mode(mode != "legacy")
+            try:
+                with ctx(), contextlib.redirect_stdout(io.StringIO()):
+                    m = _measure(call, args.repeats, not args.no_memory)
+            except Exception as e:
+                # Стадия упала (например, несовместимая версия зависимости) — фиксируем и идём дальше.
+                tracemalloc.stop()
+                m = {"seconds": None, "mean_seconds": None, "peak_mb": None, "error": f"{type(e).__name__}: {e}"}
+            rec = {
+                "assets": n_assets,
+                "years": years,
+                "freq": freq,
+                "stage": stage,
+                "mode": mode,
+                "asset": asset,
+                "rows": rows.get(asset.lower(), sum(rows.values())),
+                **m,
+            }
+            results.append(rec)
+            if m.get("error"):
+                print(f"  {stage:21s} {mode:8s} {asset:8s}    FAILED  {m['error'][:80]}", flush=True)
+                continue
+            peak = "-" if m["peak_mb"] is None else f"{m['peak_mb']:.1f} MB"
+            print(f"  {stage:21s} {mode:8s} {asset:8s} {m['seconds']:9.3f}s  peak {peak}", flush=True)
+    print(f"  (data generated in {gen_seconds:.2f}s)")
+    return results
+
+
+def _meta(args: argparse.Namespace) -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    s = get_settings()
+    return {
+        "commit": commit,
+        "timestamp": pd.Timestamp.now(tz="UTC").isoformat(),
+        "python": sys.version.split()[0],
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "signals_engine": s.signals.engine,
+        "step_days": s.signals.step_days,
+        "storage_backend": s.storage.backend,
+        "parallel_workers": s.parallel.workers,
+        "repeats": args.repeats,
+        "seed": args.seed,
+    }
+
+
+def _key(r: dict) -> tuple:
+    return (r["assets"], r["years"], r["freq"], r["stage"], r["mode"], r["asset"])
+
+
+def compare(old_path: str, results: List[dict]) -> None:
+    old = {_key(r): r for r in json.loads(Path(old_path).read_text(encoding="utf-8"))["results"]}
+    print(f"\nvs {old_path}:")
+    for r in results:
+        prev = old.get(_key(r))
+        if prev is None or not prev["seconds"] or r["seconds"] is None:
+            continue
+        ratio = r["seconds"] / prev["seconds"]
+        print(f"  {r['assets']:>2}a {r['years']:>2}y {r['freq']:6s} {r['stage']:21s} {r['mode']:8s} {r['asset']:8s} "
+              f"{prev['seconds']:8.3f}s -> {r['seconds']:8.3f}s  (x{ratio:.2f})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--assets", type=_int_list, default=[2], help="comma-separated asset counts (2..50)")
+    parser.add_argument("--years", type=_int_list, default=[5], help="comma-separated history lengths (2..30)")
+    parser.add_argument("--freq", choices=FREQS, default="daily")
+    parser.add_argument("--stages", type=lambda v: v.split(","), default=STAGES, help=f"subset of {','.join(STAGES)}")
+    parser.add_argument("--bench-assets", type=int, default=1, help="assets timed by the per-asset stages")
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--out", default=None, help="write results JSON here")
+    parser.add_argument("--compare", default=None, help="previous results JSON to compare against")
+    args = parser.parse_args()
+
+    unknown = set(args.stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {sorted(unknown)}")
+
+    logging.disable(logging.CRITICAL)
+
+    s = get_settings()
+    saved = (s.data_dir, s.files, s.ml, s.backtest, s.compass_mode, s.signal_cache)
+    results: List[dict] = []
+    try:
+        for n_assets in args.assets:
+            for years in args.years:
+                print(f"{n_assets} assets, {years} years, {args.freq}:", flush=True)
+                results += run_point(n_assets, years, args.freq, args)
+    finally:
+        s.data_dir, s.files, s.ml, s.backtest, s.compass_mode, s.signal_cache = saved
+        load_dataset.cache_clear()
+
+    max_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"max RSS {max_rss_mb:.0f} MB")
+    if args.out:
+        payload = {"meta": {**_meta(args), "max_rss_mb": max_rss_mb}, "results": results}
+        Path(args.out).write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        print(f"results -> {args.out}")
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == "__main__":
+    main()
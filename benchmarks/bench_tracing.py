@@ -0,0 +1,121 @@
+"""
+Cost of the tracing facility (src/services/tracing.py).
+
+    python -m benchmarks.bench_tracing
+    python -m benchmarks.bench_tracing --step 1
+
+Micro: nanoseconds per trace()/span()/@traced call with tracing off vs a bare function call.
+Macro: the Compass reference loop (signals.engine: loop) with tracing off and on; the number of
+trace points hit in the traced run times the per-call cost when off bounds the disabled overhead.
+"""
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import logging
+import time
+import timeit
+
+from src.analytics.signal_generator import _generate_signals_compass_loop
+from src.config.settings import get_settings
+from src.services import tracing
+from src.services.data_loader import load_dataset
+
+# Допустимая доля выключенного трейсинга во времени цикла.
+BUDGET_FRACTION = 0.005
+
+
+def _noop(x):
+    return x
+
+
+@tracing.traced("bench.traced_noop")
+def _traced_noop(x):
+    return x
+
+
+def _ns_per_call(stmt, number: int = 200_000) -> float:
+    best = min(timeit.repeat(stmt, number=number, repeat=5))
+    return best / number * 1e9
+
+
+def _micro() -> dict:
+    frame = {"a": 1}
+
+    def bare():
+        _noop(frame)
+
+    def trace_lazy():
+        tracing.trace("bench", "frame: %s", lambda: frame)
+
+    def span_block():
+        with tracing.span("bench"):
+            pass
+
+    def traced_call():
+        _traced_noop(frame)
+
+    return {
+        "bare call": _ns_per_call(bare),
+        "trace() lazy arg": _ns_per_call(trace_lazy),
+        "with span()": _ns_per_call(span_block),
+        "@traced call": _ns_per_call(traced_call),
+    }
+
+
+def _best_of(fn, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--step", type=int, default=7, help="signals.step_days for the loop")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    s = get_settings()
+    s.compass_mode = True
+    s.signals = dataclasses.replace(s.signals, step_days=args.step, engine="loop")
+    base = dataclasses.replace(s.tracing, file=None, log_file=None, buffer_size=1_000_000)
+    dfs = {name: load_dataset(name) for name in s.files}
+
+    tracing.configure(dataclasses.replace(base, enabled=False))
+    micro = _micro()
+    for label, ns in micro.items():
+        print(f"{label:18s} {ns:7.1f} ns (tracing off)")
+    off_cost = max(v for k, v in micro.items() if k != "bare call") * 1e-9
+
+    run = lambda: _generate_signals_compass_loop(dfs, "BTC")  # noqa: E731
+    run()  # прогрев: MarketPanel, кэши
+
+    off = _best_of(run, args.repeats)
+
+    tracing.configure(dataclasses.replace(base, enabled=True))
+    tracing.reset()
+    run()
+    points = len(tracing.recent())
+    stats = tracing.span_stats()
+    on = _best_of(run, args.repeats)
+    tracing.configure(dataclasses.replace(base, enabled=False))
+
+    bound = points * off_cost
+    print(f"loop BTC step={args.step}: tracing off {off:.2f}s, on {on:.2f}s (x{on / off:.2f})")
+    print(f"trace points per run: {points}; upper bound of the off cost {bound * 1000:.2f} ms "
+          f"({100 * bound / off:.3f}% of the run)")
+    print("top spans (traced run):")
+    for name, st in list(stats.items())[:5]:
+        print(f"  {name:32s} n={st['count']:6d}  total={st['total_ms']:9.1f} ms  max={st['max_ms']:7.2f} ms")
+
+    if bound / off > BUDGET_FRACTION:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
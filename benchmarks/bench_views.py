@@ -0,0 +1,81 @@
+"""
+Date-range slicing of the app's datasets: DateView (filter_df) vs the boolean-mask copy.
+
+    python -m benchmarks.bench_views
+    python -m benchmarks.bench_views --queries 500
+
+Per query the seven datasets of a dashboard tab are sliced to a random (start, end); reports the
+time and the tracemalloc peak of one tab, and checks that both paths return equal frames.
+"""
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import logging
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from src.config.settings import get_settings
+from src.services.data_loader import _filter_mask, filter_df, load_dataset
+
+TAB = ["btc", "vix", "btc_cot", "spx", "nasdaq", "dxy", "us10y"]
+
+
+def _ranges(n: int, seed: int) -> list[tuple[dt.date, dt.date]]:
+    rng = np.random.default_rng(seed)
+    out = []
+    for _ in range(n):
+        start = dt.date(2016, 1, 1) + dt.timedelta(days=int(rng.integers(0, 3300)))
+        out.append((start, start + dt.timedelta(days=int(rng.integers(7, 2500)))))
+    return out
+
+
+def _run(fn, dfs, ranges) -> tuple[float, float]:
+    t0 = time.perf_counter()
+    for start, end in ranges:
+        for name in TAB:
+            fn(dfs[name], start, end)
+    per_tab = (time.perf_counter() - t0) / len(ranges)
+
+    start, end = ranges[0]
+    tracemalloc.start()
+    try:
+        for name in TAB:
+            fn(dfs[name], start, end)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return per_tab, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    s = get_settings()
+    dfs = {name: load_dataset(name) for name in TAB if name in s.files}
+    missing = [name for name in TAB if dfs.get(name) is None]
+    if missing:
+        raise SystemExit(f"datasets not found: {missing}")
+    ranges = _ranges(args.queries, args.seed)
+
+    for start, end in ranges:
+        for name in TAB:
+            pd.testing.assert_frame_equal(filter_df(dfs[name], start, end), _filter_mask(dfs[name], start, end))
+    print(f"{args.queries} ranges x {len(TAB)} datasets: views equal to the mask path")
+
+    rows = sum(len(df) for df in dfs.values())
+    for label, fn in [("mask + copy", _filter_mask), ("DateView", filter_df)]:
+        per_tab, peak = _run(fn, dfs, ranges)
+        print(f"{label:12s} {per_tab * 1000:7.2f} ms per tab ({rows} rows), peak alloc {peak / 1024:8.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+Local HTTP stand-in for the Yahoo chart API and the CFTC Socrata endpoint, served from the
+files under data/. Lets the fetch scheduler be exercised offline:
+
+    with StandInServer(latency=0.2, fail_first={"/resource": 2}, down={"^GSPC"}) as srv:
+        settings.fetch = dataclasses.replace(settings.fetch, yahoo_url=srv.url, cftc_url=srv.url)
+
+- latency    — seconds slept before every response;
+- fail_first — path prefix -> number of initial requests answered with 503;
+- down       — tickers / path prefixes that always answer 503.
+
+The Socrata endpoint sends ETag / Last-Modified of the COT data and answers conditional requests
+with 304 while it is unchanged; touch_cot() simulates a new CFTC release.
+
+With `clock` (epoch seconds, e.g. a fake clock) only data published by then is served: a crypto bar
+of day D from D+1 00:00 UTC, other bars from 16:00 exchange time of D, a COT report of Tuesday T
+from Friday T+3 15:30 New York (the ETag changes with every newly visible report).
+
+    python -m benchmarks.http_standin --port 8765    # serve until Ctrl+C
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import threading
+import time
+from collections import Counter
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional
+from urllib.parse import parse_qs, unquote, urlparse
+
+import pandas as pd
+
+from src.data_fetchers.cot_parser import MARKETS, RESOURCE_PATH
+from src.data_fetchers.finance_api import TICKERS
+
+# Биржевые таймзоны тикеров: даты баров в data/ записаны в них.
+TIMEZONES: Dict[str, str] = {
+    "^VIX": "America/Chicago",
+    "BTC-USD": "UTC",
+    "ETH-USD": "UTC",
+    "^GSPC": "America/New_York",
+    "^IXIC": "America/New_York",
+    "DX-Y.NYB": "America/New_York",
+    "^TNX": "America/Chicago",
+}
+
+
+def _load_bars(data_root: Path) -> Dict[str, pd.DataFrame]:
+    bars = {}
+    for name, ticker in TICKERS.items():
+        path = data_root / "raw" / "vix.csv" if name == "vix" else data_root / "processed" / f"{name}_price.csv"
+        if path.exists():
+            df = pd.read_csv(path)
+            df["ts"] = (pd.to_datetime(df["date"], utc=True) - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1)
+            # ts — полночь биржевого дня: крипто-бар закрыт через сутки, остальные — к 16:00 биржи
+            df["published"] = df["ts"] + (86400 if TIMEZONES.get(ticker) == "UTC" else 16 * 3600)
+            bars[ticker] = df
+    return bars
+
+
+def _load_cot(data_root: Path) -> Dict[str, pd.DataFrame]:
+    cot = {}
+    for asset, market in MARKETS.items():
+        path = data_root / "raw" / f"{asset.lower()}_cot_raw.csv"
+        if path.exists():
+            df = pd.read_csv(path, dtype=str)
+            release = pd.to_datetime(df["report_date_as_yyyy_mm_dd"].str[:10]) + pd.Timedelta(days=3, hours=15, minutes=30)
+            published = release.dt.tz_localize("America/New_York").dt.tz_convert("UTC")
+            cot[market] = df.assign(published=(published - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1))
+    return cot
+
+
+class StandInServer:
+    def __init__(
+        self,
+        data_root: str | Path = "data",
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        fail_first: Optional[Dict[str, int]] = None,
+        down: Optional[Iterable[str]] = None,
+        clock: Optional[Callable[[], float]] = None,
+    ):
+        self.bars = _load_bars(Path(data_root))
+        self.cot = _load_cot(Path(data_root))
+        self.latency = latency
+        self.fail_first = dict(fail_first or {})
+        self.down = set(down or ())
+        self.clock = clock
+        self.requests: Counter = Counter()
+        self.not_modified = 0
+        self.cot_version = 1
+        self.cot_modified = time.time()
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "StandInServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def touch_cot(self) -> None:
+        """New ETag / Last-Modified, as after a CFTC release (the data itself is unchanged)."""
+        with self._lock:
+            self.cot_version += 1
+            self.cot_modified = time.time()
+
+    def _visible(self, df: pd.DataFrame) -> pd.DataFrame:
+        return df if self.clock is None else df[df["published"] <= self.clock()]
+
+    def _cot_validators(self) -> tuple[str, str]:
+        visible = [self._visible(df)["published"] for df in self.cot.values()]
+        n = sum(len(v) for v in visible)
+        with self._lock:
+            modified = self.cot_modified
+            if self.clock is not None:
+                modified = max([float(v.max()) for v in visible if len(v)], default=0.0)
+            return f'"cot-{self.cot_version}-{n}"', formatdate(modified, usegmt=True)
+
+    # -------------
+    def _should_fail(self, path: str) -> bool:
+        with self._lock:
+            self.requests[path] += 1
+            if any(d in path for d in self.down):
+                return True
+            for prefix, n in self.fail_first.items():
+                if path.startswith(prefix) and n > 0:
+                    self.fail_first[prefix] = n - 1
+                    return True
+        return False
+
+    def _chart(self, ticker: str, query: dict) -> Optional[dict]:
+        df = self.bars.get(ticker)
+        if df is None:
+            return None
+        p1 = int(query.get("period1", ["0"])[0])
+        p2 = int(query.get("period2", [str(2**40)])[0])
+        df = self._visible(df)
+        df = df[(df["ts"] >= p1) & (df["ts"] <= p2)]
+        quote = {col: df[col].tolist() for col in ["open", "high", "low", "close", "volume"]}
+        return {"chart": {"result": [{
+            "meta": {"symbol": ticker, "exchangeTimezoneName": TIMEZONES.get(ticker, "UTC")},
+            "timestamp": df["ts"].tolist(),
+            "indicators": {"quote": [quote]},
+        }], "error": None}}
+
+    def _socrata(self, query: dict) -> list:
+        where = query.get("$where", [""])[0]
+        market = re.search(r"market_and_exchange_names='(.+?)'", where)
+        since = re.search(r"report_date_as_yyyy_mm_dd >= '(.+?)'", where)
+        df = self.cot.get(market.group(1)) if market else None
+        if df is None:
+            return []
+        df = self._visible(df).drop(columns="published")
+        if since:
+            df = df[df["report_date_as_yyyy_mm_dd"] >= since.group(1)]
+        offset = int(query.get("$offset", ["0"])[0])
+        limit = int(query.get("$limit", ["1000"])[0])
+        page = df.iloc[offset:offset + limit]
+        select = query.get("$select", [""])[0]
+        if select:
+            page = page[[c for c in select.split(",") if c in page.columns]]
+        return [{k: v for k, v in row.items() if isinstance(v, str)} for row in page.to_dict("records")]
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args) -> None:
+                pass
+
+            def _send(self, code: int, payload, headers: Optional[Dict[str, str]] = None) -> None:
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _socrata(self, query: dict) -> None:
+                etag, modified = server._cot_validators()
+                since = self.headers.get("If-Modified-Since")
+                unchanged = self.headers.get("If-None-Match") == etag or (
+                    "If-None-Match" not in self.headers and since is not None and since == modified
+                )
+                if unchanged:
+                    with server._lock:
+                        server.not_modified += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self._send(200, server._socrata(query), {"ETag": etag, "Last-Modified": modified})
+
+            def do_GET(self) -> None:
+                url = urlparse(self.path)
+                path = unquote(url.path)
+                query = parse_qs(url.query)
+                if server.latency:
+                    time.sleep(server.latency)
+                if server._should_fail(path):
+                    self._send(503, {"error": "stand-in failure"})
+                    return
+                if path.startswith("/v8/finance/chart/"):
+                    payload = server._chart(path.rsplit("/", 1)[-1], query)
+                    self._send(200, payload) if payload else self._send(404, {"error": "unknown ticker"})
+                elif path == RESOURCE_PATH:
+                    self._socrata(query)
+                else:
+                    self._send(404, {"error": "not found"})
+
+        return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+    with StandInServer(port=args.port, latency=args.latency) as srv:
+        print(f"Serving stand-in at {srv.url} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
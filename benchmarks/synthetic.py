@@ -0,0 +1,183 @@
+"""
+Synthetic market data shaped like data/processed: per-asset price frames and processed COT
+reports, plus VIX (with deviation_pct), SPX, Nasdaq, DXY and US10Y.
+
+    dfs = generate_market(n_assets=10, years=5, freq="daily", seed=0)
+    files = write_market(dfs, "/tmp/market")        # name -> file name, for settings.files
+
+    python -m benchmarks.synthetic --assets 10 --years 5 --out /tmp/market
+
+Assets are btc, eth, then x03, x04, ...; crypto trades every day (UTC), macro series on
+business days in their exchange time zone. COT reports are weekly (Tuesdays) and go through
+the same preprocess / build_indicators / calculate_z_score pipeline as the real reports.
+"""
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from src.analytics.indicators import build_indicators
+from src.analytics.statistics import add_vix_deviation_indicators, calculate_z_score
+from src.data_fetchers.cot_parser import preprocess
+from src.services.storage import write_dataset
+
+FREQS = ("daily", "hourly")
+DEFAULT_END = "2025-12-31"
+
+# name -> (time zone, start level, annual volatility)
+MACRO: Dict[str, tuple[str, float, float]] = {
+    "spx": ("America/New_York", 3000.0, 0.18),
+    "nasdaq": ("America/New_York", 9000.0, 0.24),
+    "dxy": ("America/New_York", 100.0, 0.07),
+    "us10y": ("America/Chicago", 1.5, 0.35),
+}
+VIX_TZ = "America/Chicago"
+MACRO_SESSION_HOURS = range(9, 16)
+
+
+def asset_names(n_assets: int) -> list[str]:
+    if not 2 <= n_assets <= 50:
+        raise ValueError("n_assets must be within 2..50")
+    return ["btc", "eth"] + [f"x{i:02d}" for i in range(3, n_assets + 1)]
+
+
+def _calendar(start: pd.Timestamp, end: pd.Timestamp, freq: str, tz: str, trading_days: bool) -> pd.DatetimeIndex:
+    days = pd.bdate_range(start, end) if trading_days else pd.date_range(start, end, freq="D")
+    if freq == "daily":
+        return days.tz_localize(tz)
+    hours = MACRO_SESSION_HOURS if trading_days else range(24)
+    stamps = (days.values[:, None] + np.array([np.timedelta64(h, "h") for h in hours])[None, :]).ravel()
+    return pd.DatetimeIndex(stamps).tz_localize(tz, nonexistent="shift_forward", ambiguous=False)
+
+
+def _periods_per_year(freq: str, trading_days: bool) -> float:
+    days = 252 if trading_days else 365
+    return days * (1 if freq == "daily" else len(MACRO_SESSION_HOURS) if trading_days else 24)
+
+
+def _ohlcv(rng: np.random.Generator, dates: pd.DatetimeIndex, start: float, vol: float, per_year: float, volume: float) -> pd.DataFrame:
+    n = len(dates)
+    sigma = vol / np.sqrt(per_year)
+    close = start * np.exp(np.cumsum(rng.normal(0.0, sigma, n)))
+    open_ = np.concatenate([[start], close[:-1]])
+    wick = np.abs(rng.normal(0.0, sigma / 2, (2, n)))
+    return pd.DataFrame({
+        "date": dates,
+        "open": open_,
+        "high": np.maximum(open_, close) * (1 + wick[0]),
+        "low": np.minimum(open_, close) * (1 - wick[1]),
+        "close": close,
+        "volume": (rng.lognormal(0.0, 0.5, n) * volume).round() if volume else np.zeros(n),
+    })
+
+
+def _vix(rng: np.random.Generator, dates: pd.DatetimeIndex, per_year: float) -> pd.DataFrame:
+    # Ornstein-Uhlenbeck в логарифме уровня: всплески и возврат к ~18.
+    n = len(dates)
+    theta, mu, sigma = 5.0 / per_year, np.log(18.0), 1.1 / np.sqrt(per_year)
+    x = np.empty(n)
+    x[0] = mu
+    shocks = rng.normal(0.0, sigma, n)
+    for i in range(1, n):
+        x[i] = x[i - 1] + theta * (mu - x[i - 1]) + shocks[i]
+    df = _ohlcv(rng, dates, 18.0, 0.0, per_year, 0.0)
+    df["close"] = np.exp(x)
+    df["open"] = np.concatenate([[df["close"].iloc[0]], df["close"].to_numpy()[:-1]])
+    df["high"] = np.maximum(df["open"], df["close"])
+    df["low"] = np.minimum(df["open"], df["close"])
+    return add_vix_deviation_indicators(df, window=252)
+
+
+def _cot(rng: np.random.Generator, asset: str, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+    dates = pd.date_range(start, end, freq="W-TUE")
+    n = len(dates)
+    oi = np.maximum(1000, 10_000 * np.exp(np.cumsum(rng.normal(0.0, 0.05, n))))
+    share = lambda lo, hi: oi * rng.uniform(lo, hi, n)  # noqa: E731
+    raw = pd.DataFrame({
+        "id": [f"{d:%y%m%d}{asset.upper()}" for d in dates],
+        "market_and_exchange_names": f"{asset.upper()} - SYNTHETIC EXCHANGE",
+        "report_date_as_yyyy_mm_dd": dates.strftime("%Y-%m-%dT00:00:00.000"),
+        "open_interest_all": oi.round(),
+        "comm_positions_long_all": share(0.05, 0.25).round(),
+        "comm_positions_short_all": share(0.05, 0.25).round(),
+        "noncomm_positions_long_all": share(0.3, 0.6).round(),
+        "noncomm_positions_short_all": share(0.3, 0.6).round(),
+        "nonrept_positions_long_all": share(0.1, 0.3).round(),
+        "nonrept_positions_short_all": share(0.1, 0.3).round(),
+    })
+    return calculate_z_score(build_indicators(preprocess(raw)))
+
+
+def generate_market(
+    n_assets: int = 2,
+    years: int = 5,
+    freq: str = "daily",
+    seed: int = 0,
+    end: str = DEFAULT_END,
+) -> Dict[str, pd.DataFrame]:
+    """Dataset name -> frame (names as in settings.files; extra assets as `<name>` / `<name>_cot`)."""
+    if freq not in FREQS:
+        raise ValueError(f"freq must be one of {FREQS}")
+    if not 2 <= years <= 30:
+        raise ValueError("years must be within 2..30")
+
+    rng = np.random.default_rng(seed)
+    end_ts = pd.Timestamp(end)
+    start_ts = end_ts - pd.DateOffset(years=years)
+
+    macro_per_year = _periods_per_year(freq, trading_days=True)
+    dfs: Dict[str, pd.DataFrame] = {"vix": _vix(rng, _calendar(start_ts, end_ts, freq, VIX_TZ, True), macro_per_year)}
+    for name, (tz, level, vol) in MACRO.items():
+        dates = _calendar(start_ts, end_ts, freq, tz, trading_days=True)
+        dfs[name] = _ohlcv(rng, dates, level, vol, macro_per_year, 4e9 if name in ("spx", "nasdaq") else 0.0)
+
+    crypto_dates = _calendar(start_ts, end_ts, freq, "UTC", trading_days=False)
+    crypto_per_year = _periods_per_year(freq, trading_days=False)
+    for i, asset in enumerate(asset_names(n_assets)):
+        level = 10_000.0 if asset == "btc" else 1_000.0 if asset == "eth" else float(rng.uniform(1, 500))
+        dfs[asset] = _ohlcv(rng, crypto_dates, level, float(rng.uniform(0.5, 1.0)), crypto_per_year, 3e10 / (i + 1))
+        dfs[f"{asset}_cot"] = _cot(rng, asset, start_ts, end_ts)
+    return dfs
+
+
+def file_name(name: str) -> str:
+    if name == "vix":
+        return "vix_processed.csv"
+    if name.endswith("_cot"):
+        return f"{name}_processed.csv"
+    return f"{name}_price.csv"
+
+
+def write_market(dfs: Dict[str, pd.DataFrame], root: str | Path, backend: str | None = None) -> Dict[str, str]:
+    """Writes every frame under `root` (storage backend as configured); returns name -> file name."""
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    files = {}
+    for name, df in dfs.items():
+        files[name] = file_name(name)
+        write_dataset(df, root / files[name], backend=backend)
+    return files
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--assets", type=int, default=2)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--freq", choices=FREQS, default="daily")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backend", default=None, help="storage backend (default: storage.backend)")
+    parser.add_argument("--out", required=True, help="output directory")
+    args = parser.parse_args()
+
+    dfs = generate_market(args.assets, args.years, args.freq, args.seed)
+    files = write_market(dfs, args.out, backend=args.backend)
+    rows = sum(len(df) for df in dfs.values())
+    print(f"{len(files)} datasets, {rows} rows -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,30 @@
+"""
+`python main.py` — update the datasets (same as the «Обновить» button).
+`python main.py <command>` — headless batch commands (src/services/batch.py), see `python main.py -h`.
+"""
 from __future__ import annotations
 
-from src.services.updater import update_all_data
+import sys
+
+from src.services import tracing
 
 
 def main() -> None:
-    update_all_data()
-    print("✓ All data updated.")
+    # updater тянет стек загрузчиков — импортируем только по нажатию «Обновить»
+    from src.services.updater import update_all_data
+
+    status = update_all_data()
+    failed = {name: st for name, st in status.items() if st.startswith("failed")}
+    for name, st in failed.items():
+        print(f"✗ {name}: {st}")
+    print("✓ All data updated." if not failed else f"✓ Data updated, {len(failed)} source(s) failed.")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    tracing.configure()
+    if len(sys.argv) == 1:
+        main()
+    else:
+        from src.services.batch import cli
+
+        sys.exit(cli(sys.argv[1:]))
@@ -0,0 +1,166 @@
+# src/analytics/backtest_engine.py
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+TRADE_LOG_COLUMNS = ["date", "price", "total_score", "dyn_min_score", "confidence", "signal_flag", "position_size", "equity", "event"]
+EVENTS = np.array(["HOLD", "BUY", "EXIT", "TRAIL_STOP"])
+HOLD, BUY, EXIT, TRAIL_STOP = range(len(EVENTS))
+
+
+@dataclass
+class SignalBars:
+    """Signal columns aligned to price bars; `present` marks bars that have a signal row."""
+    present: np.ndarray
+    flag: np.ndarray
+    total_score: np.ndarray
+    confidence: np.ndarray
+    dyn_min_score: Optional[np.ndarray]
+
+
+@dataclass
+class Simulation:
+    """Per-bar state of MacroStrategy under the backtrader broker, as seen from Strategy.next."""
+    position: np.ndarray
+    cash: np.ndarray
+    equity: np.ndarray
+    events: np.ndarray
+
+
+def align_signals(bar_dates: pd.Series, signals: Optional[pd.DataFrame]) -> SignalBars:
+    """Looks up the signal row of every bar by normalized date (what MacroStrategy.next does with .loc)."""
+    n = len(bar_dates)
+    if signals is None or signals.empty:
+        return SignalBars(np.zeros(n, dtype=bool), np.zeros(n, dtype=np.int64), np.zeros(n), np.zeros(n), None)
+
+    sig = signals.assign(date=pd.to_datetime(signals["date"]).dt.normalize()).drop_duplicates("date", keep="last")
+    rows = pd.Index(sig["date"]).get_indexer(pd.to_datetime(bar_dates))
+    hit = rows >= 0
+    take = np.where(hit, rows, 0)
+
+    def column(name: str, default: float) -> np.ndarray:
+        if name not in sig.columns:
+            return np.full(n, default)
+        return np.where(hit, sig[name].to_numpy(dtype=float)[take], default)
+
+    dyn = column("dyn_min_score", np.nan) if "dyn_min_score" in sig.columns else None
+    return SignalBars(hit, column("signal", 0.0).astype(np.int64), column("total_score", 0.0), column("confidence", 0.0), dyn)
+
+
+def _open_cash(cash: float, size: float, price: float, fee: float) -> float:
+    # BackBroker._execute: стоимость позиции, затем комиссия (CommissionInfo, percabs)
+    cash -= size * price
+    cash -= size * fee * price
+    return cash
+
+
+def _close_cash(cash: float, size: float, entry: float, price: float, fee: float) -> float:
+    cash += size * entry + size * (price - entry)
+    cash -= size * fee * price
+    return cash
+
+
+def simulate(
+    open_: np.ndarray,
+    close: np.ndarray,
+    bars: SignalBars,
+    initial_capital: float,
+    fee: float,
+    trailing_stop: float,
+) -> Simulation:
+    """
+    MacroStrategy without backtrader: long entries sized by confidence on signal 1, exit on signal 0,
+    trailing stop on closes, market orders filled at the next bar's open with a proportional fee
+    (rejected when the cash does not cover them). Jumps from trade to trade; each holding period is
+    scanned with array ops, so the cost grows with the number of trades rather than bars.
+    """
+    open_ = np.asarray(open_, dtype=float)
+    close = np.asarray(close, dtype=float)
+    n = len(close)
+    fee = float(fee)
+    stop = -float(trailing_stop)
+
+    events = np.full(n, HOLD, dtype=np.int8)
+    position = np.zeros(n)
+    entry = np.zeros(n)
+    cash_from = [0]
+    cash_values = [float(initial_capital)]
+
+    alloc = np.fmax(0.0, np.fmin(1.0, bars.confidence))  # max(0, min(1, conf)), NaN -> 1 как в Python
+    with np.errstate(divide="ignore", invalid="ignore"):
+        buyable = bars.present & (bars.flag == 1) & (alloc / close * (1 - fee) > 0)
+    buy_bars = np.flatnonzero(buyable)
+    exit_bars = np.flatnonzero(bars.present & (bars.flag == 0))
+
+    cash = float(initial_capital)
+    i = 0
+    while i < n and cash > 0:
+        j = np.searchsorted(buy_bars, i)
+        if j == len(buy_bars):
+            break
+        t = int(buy_bars[j])
+        events[t] = BUY
+        if t + 1 >= n:
+            break
+        size = (cash * float(alloc[t])) / float(close[t]) * (1 - fee)
+        # Проверка при подаче (по цене создания) и при исполнении по open следующего бара.
+        after = _open_cash(cash, size, float(open_[t + 1]), fee)
+        if _open_cash(cash, size, float(close[t]), fee) < 0.0 or after < 0.0:
+            i = t + 1
+            continue
+        cash, price_in = after, float(open_[t + 1])
+        cash_from.append(t + 1)
+        cash_values.append(cash)
+
+        e = np.searchsorted(exit_bars, t + 1)
+        last = int(exit_bars[e]) if e < len(exit_bars) else n - 1
+        window = close[t : last + 1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            stops = np.flatnonzero(window[1:] / np.maximum.accumulate(window)[1:] - 1 <= stop)
+        if stops.size:
+            k = t + 1 + int(stops[0])
+            events[k] = TRAIL_STOP
+        elif e < len(exit_bars):
+            k = last
+            events[k] = EXIT
+        else:
+            k = n - 1
+
+        position[t + 1 : k + 1] = size
+        entry[t + 1 : k + 1] = price_in
+        if k + 1 >= n:
+            break
+        cash = _close_cash(cash, size, price_in, float(open_[k + 1]), fee)
+        cash_from.append(k + 1)
+        cash_values.append(cash)
+        i = k + 1
+
+    cash_bars = np.repeat(cash_values, np.diff([*cash_from, n]))
+    # BackBroker._get_value: (value - unrealized) / leverage + unrealized для длинной позиции
+    value = position * close
+    unrealized = position * (close - entry)
+    equity = cash_bars + np.where(value > 0, (value - unrealized) + unrealized, value)
+    return Simulation(position=position, cash=cash_bars, equity=equity, events=events)
+
+
+def trade_log(dates: pd.Series, close: np.ndarray, bars: SignalBars, sim: Simulation) -> pd.DataFrame:
+    """Per-bar trade log with the columns and number formatting of MacroStrategy's CSV."""
+    if bars.dyn_min_score is None:
+        dyn = np.full(len(close), "", dtype=object)
+    else:
+        dyn = np.where(bars.present, np.char.mod("%.3f", bars.dyn_min_score), "")
+    return pd.DataFrame({
+        "date": pd.to_datetime(dates).dt.strftime("%Y-%m-%d").to_numpy(),
+        "price": np.char.mod("%.2f", close),
+        "total_score": np.char.mod("%.3f", bars.total_score),
+        "dyn_min_score": dyn,
+        "confidence": np.char.mod("%.3f", bars.confidence),
+        "signal_flag": bars.flag,
+        "position_size": np.char.mod("%.6f", sim.position),
+        "equity": np.char.mod("%.2f", sim.equity),
+        "event": EVENTS[sim.events],
+    }, columns=TRADE_LOG_COLUMNS)
@@ -0,0 +1,110 @@
+# src/analytics/backtrader_strategy.py
+"""Reference MacroStrategy on backtrader (backtest.engine: backtrader); imported only by that engine."""
+from __future__ import annotations
+
+import csv
+from typing import Optional
+
+import backtrader as bt
+import pandas as pd
+
+from src.analytics.backtest import _trade_log_path
+from src.analytics.backtest_engine import TRADE_LOG_COLUMNS
+from src.analytics.signal_generator import generate_signals
+from src.config.settings import get_settings
+
+
+class MacroStrategy(bt.Strategy):
+    params = (
+        ("asset", "BTC"),
+        ("dfs", None),
+        ("signals", None),
+        ("fee", 0.001),
+    )
+
+    def __init__(self):
+        s = get_settings()
+        self._trailing_stop = float(s.backtest.trailing_stop_pct)
+
+        signals_df: Optional[pd.DataFrame] = self.p.signals
+        if signals_df is None or signals_df.empty:
+            signals_df = generate_signals(self.p.dfs, self.p.asset)
+
+        if signals_df is None or signals_df.empty:
+            self.signals = pd.DataFrame(columns=["total_score", "signal", "confidence"]).set_index(pd.DatetimeIndex([]))
+        else:
+            tmp = signals_df.copy()
+            tmp["date"] = pd.to_datetime(tmp["date"]).dt.normalize()
+            self.signals = tmp.set_index("date")
+
+        self.high_watermark: Optional[float] = None
+        self.dates: list[pd.Timestamp] = []
+        self.equity_list: list[float] = []
+
+        self._log_path = _trade_log_path(self.p.asset)
+        self._log_file = open(self._log_path, "w", newline="", encoding="utf-8")
+        self._log_writer = csv.writer(self._log_file)
+        self._log_writer.writerow(TRADE_LOG_COLUMNS)
+
+    def next(self):
+        ts = pd.Timestamp(self.datetime.datetime(0)).normalize()
+        price = float(self.data.close[0])
+        equity = float(self.broker.getvalue())
+        pos_size = float(self.position.size)
+
+        event = "HOLD"
+        total = 0.0
+        conf = 0.0
+        sig_flag = 0
+        dyn_thr = None
+
+        if pos_size > 0:
+            if self.high_watermark is None:
+                self.high_watermark = price
+            self.high_watermark = max(self.high_watermark, price)
+            if (price / self.high_watermark - 1) <= -self._trailing_stop:
+                self.close()
+                event = "TRAIL_STOP"
+
+        if ts in self.signals.index:
+            row = self.signals.loc[ts]
+            total = float(row.get("total_score", 0.0))
+            conf = float(row.get("confidence", 0.0))
+            sig_flag = int(row.get("signal", 0))
+            dyn_thr = float(row.get("dyn_min_score")) if "dyn_min_score" in row else None
+
+            if sig_flag == 1 and pos_size <= 0:
+                cash = float(self.broker.getcash())
+                alloc = max(0.0, min(1.0, conf))
+                size = (cash * alloc) / price * (1 - self.p.fee)
+                if size > 0:
+                    self.buy(size=size)
+                    self.high_watermark = price
+                    event = "BUY"
+
+            elif sig_flag == 0 and pos_size > 0 and event == "HOLD":
+                self.close()
+                event = "EXIT"
+
+        self.dates.append(ts)
+        self.equity_list.append(equity)
+
+        self._log_writer.writerow(
+            [
+                ts.date().isoformat(),
+                f"{price:.2f}",
+                f"{total:.3f}",
+                "" if dyn_thr is None else f"{dyn_thr:.3f}",
+                f"{conf:.3f}",
+                sig_flag,
+                f"{pos_size:.6f}",
+                f"{equity:.2f}",
+                event,
+            ]
+        )
+
+    def stop(self):
+        try:
+            self._log_file.close()
+        except Exception:
+            pass
@@ -0,0 +1,421 @@
+# src/analytics/compass_engine.py
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.analytics.scoring import VIX_RATIONALES
+from src.analytics.statistics import QUANTILE_LEVELS, cot_rationale, get_deviation_levels, rolling_quantile_thresholds
+from src.config.settings import get_settings
+from src.services.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+SIGNAL_COLUMNS = ["date", "total_score", "verdict", "position", "confidence"]
+VIX_FACTOR = "VIX Risk Regime"
+COT_FACTOR = "COT Composite"
+COT_COLUMNS = {
+    "cot_comm": "COT_Index_Comm_26w",
+    "cot_large_inv": "COT_Index_Large_Inverted_26w",
+    "z_comm": "Z_Score_Comm",
+}
+QUANTILE_WINDOW = 504
+
+# Относительный допуск: сравнения dev_pct с σ-уровнем ближе этого порога пересчитываются
+# эталонным get_deviation_levels (expanding mean/std может отличаться от него на ulp).
+_LEVEL_TIE_TOL = 1e-9
+
+
+@dataclass
+class CompassInputs:
+    """
+    Point-in-time inputs of the Compass score for every step date of one asset.
+    Element k of every array is what _score_asset_compass sees on datasets sliced to date <= dates[k].
+    """
+    asset: str
+    dates: pd.Series
+    n_rows: np.ndarray
+    vix_rows: np.ndarray
+    cot_rows: np.ndarray
+    vix_dev: np.ndarray
+    vix_mean: np.ndarray
+    vix_std: np.ndarray
+    cot_comm: np.ndarray
+    cot_large_inv: np.ndarray
+    z_comm: np.ndarray
+    cot_thresh: np.ndarray
+    hist_rows: np.ndarray
+    fallback: np.ndarray
+    sources: Dict[str, pd.DataFrame]
+
+
+def _as_ns(values) -> np.ndarray:
+    return np.asarray(values).astype("datetime64[ns]")
+
+
+def _strictly_increasing(df: Optional[pd.DataFrame]) -> bool:
+    if df is None or df.empty:
+        return True
+    if "date" not in df.columns or not pd.api.types.is_datetime64_any_dtype(df["date"]):
+        return False
+    dates = df["date"]
+    return bool(dates.notna().all() and dates.is_monotonic_increasing and dates.is_unique)
+
+
+def fast_path_supported(dfs_full: Dict[str, pd.DataFrame], asset: str) -> bool:
+    """
+    Preconditions under which the vectorized engine is row-for-row identical to the loop:
+    sorted unique dates (every slice is a prefix), no NaN in VIX deviation and at least one
+    always-defined feature column (build_features never drops rows).
+    """
+    sc = get_settings().scoring
+    if not (sc.vix_enabled or sc.ml_enabled or sc.trend_filter_enabled):
+        return False
+
+    asset_key = asset.lower()
+    for key in (asset_key, "vix", f"{asset_key}_cot"):
+        if not _strictly_increasing(dfs_full.get(key)):
+            return False
+
+    vix = dfs_full.get("vix")
+    if vix is not None and not vix.empty:
+        if "deviation_pct" not in vix.columns or vix["deviation_pct"].isna().any():
+            return False
+    return True
+
+
+@traced("signals.compass_inputs")
+def build_compass_inputs(dfs_full: Dict[str, pd.DataFrame], asset: str, dates: Optional[pd.Series] = None) -> CompassInputs:
+    """
+    Single pass over the full history: slice sizes, latest values and expanding statistics per step.
+    `dates` overrides the step dates (every source is then sliced to date <= dates[k]).
+    """
+    s = get_settings()
+    sig = s.signals
+    sc = s.scoring
+    asset_key = asset.lower()
+
+    df_price = dfs_full[asset_key]
+    price_dates = _as_ns(df_price["date"].to_numpy())
+
+    if dates is None:
+        step_dates = pd.to_datetime(df_price["date"]).dt.normalize().reset_index(drop=True)
+        if s.compass_mode:
+            start_i = sig.min_start_bars
+        else:
+            start_i = max(sig.min_start_bars, int(len(df_price) * sig.start_fraction))
+        idx = np.arange(start_i, len(step_dates), int(sig.step_days))
+        dates = step_dates.iloc[idx].reset_index(drop=True)
+    else:
+        dates = pd.Series(pd.to_datetime(dates)).reset_index(drop=True)
+    d64 = _as_ns(dates.to_numpy())
+    k = len(dates)
+
+    n_rows = price_dates.searchsorted(d64, side="right")
+    visible = n_rows > 0
+    last = np.maximum(n_rows - 1, 0)
+    last_px = price_dates[last] if len(price_dates) else d64
+
+    vix_col = sc.vix_enabled or sc.ml_enabled
+    cot_col = sc.cot_enabled or sc.ml_enabled
+
+    # ---- VIX: nearest deviation для последней видимой цены + expanding σ-статистика
+    vix = dfs_full.get("vix")
+    vix_rows = np.zeros(k, dtype=int)
+    vix_dev = np.full(k, np.nan)
+    vix_mean = np.full(k, np.nan)
+    vix_std = np.full(k, np.nan)
+    if vix is not None and not vix.empty:
+        vix_dates = _as_ns(vix["date"].to_numpy())
+        dev = vix["deviation_pct"].to_numpy(dtype=float)
+        vix_rows = vix_dates.searchsorted(d64, side="right")
+
+        # merge_asof(direction="nearest") внутри среза; при равных расстояниях pandas берёт backward
+        back = np.minimum(vix_dates.searchsorted(last_px, side="right"), vix_rows) - 1
+        fwd = vix_dates.searchsorted(last_px, side="left")
+        back_c = np.maximum(back, 0)
+        fwd_c = np.minimum(fwd, len(vix_dates) - 1)
+        has_fwd = fwd < vix_rows
+        take_back = (back >= 0) & (~has_fwd | ((last_px - vix_dates[back_c]) <= (vix_dates[fwd_c] - last_px)))
+        nearest = np.where(take_back, back_c, fwd_c)
+
+        ok = (vix_rows > 0) & visible
+        vix_dev[ok] = dev[nearest[ok]]
+
+        dev_s = pd.Series(dev)
+        mean = dev_s.expanding().mean().to_numpy()
+        std = dev_s.expanding().std(ddof=0).to_numpy()
+        has_vix = vix_rows > 0
+        vix_mean[has_vix] = mean[vix_rows[has_vix] - 1]
+        vix_std[has_vix] = std[vix_rows[has_vix] - 1]
+
+    # ---- COT: backward as-of на каждую строку цены + ffill (как merge_asof + df.ffill в build_features)
+    cot = dfs_full.get(f"{asset_key}_cot")
+    cot_rows = np.zeros(k, dtype=int)
+    cot_latest = {name: np.full(k, np.nan) for name in COT_COLUMNS}
+    cot_thresh = np.full((k, len(QUANTILE_LEVELS)), np.nan)
+    hist_rows = np.where(visible, n_rows, 0) if vix_col else np.zeros(k, dtype=int)
+    if cot is not None and not cot.empty:
+        cot_dates = _as_ns(cot["date"].to_numpy())
+        cot_rows = cot_dates.searchsorted(d64, side="right")
+        pos = cot_dates.searchsorted(price_dates, side="right") - 1
+
+        complete = np.ones(len(price_dates), dtype=bool)
+        per_row: Dict[str, np.ndarray] = {}
+        for name, src_col in COT_COLUMNS.items():
+            src = pd.to_numeric(cot[src_col], errors="coerce").to_numpy(dtype=float)
+            col = np.where(pos >= 0, src[np.maximum(pos, 0)], np.nan)
+            per_row[name] = pd.Series(col).ffill().to_numpy()
+            cot_latest[name] = np.where(visible, per_row[name][last], np.nan)
+            complete &= ~np.isnan(per_row[name])
+
+        hist_rows = np.where(visible, np.cumsum(complete)[last], 0)
+        thresholds = rolling_quantile_thresholds(pd.Series(per_row["cot_comm"]), QUANTILE_WINDOW).to_numpy()
+        cot_thresh[visible] = thresholds[last[visible]]
+
+    fallback = ~visible | (n_rows < sig.min_feature_rows)
+    if vix_col:
+        fallback |= vix_rows == 0
+    if cot_col:
+        fallback |= cot_rows == 0
+
+    return CompassInputs(
+        asset=asset,
+        dates=dates,
+        n_rows=n_rows,
+        vix_rows=vix_rows,
+        cot_rows=cot_rows,
+        vix_dev=vix_dev,
+        vix_mean=vix_mean,
+        vix_std=vix_std,
+        cot_comm=cot_latest["cot_comm"],
+        cot_large_inv=cot_latest["cot_large_inv"],
+        z_comm=cot_latest["z_comm"],
+        cot_thresh=cot_thresh,
+        hist_rows=hist_rows,
+        fallback=fallback,
+        sources=dfs_full,
+    )
+
+
+def _vix_levels(inputs: CompassInputs, sigma_levels) -> Dict[str, np.ndarray]:
+    # Те же ключи и формулы, что в get_deviation_levels.
+    levels: Dict[str, np.ndarray] = {}
+    for sgm in sigma_levels:
+        levels[f"+{sgm}σ"] = inputs.vix_mean + sgm * inputs.vix_std
+        levels[f"-{sgm}σ"] = inputs.vix_mean - sgm * inputs.vix_std
+
+    used = [levels[key] for key in ("+3σ", "+2σ", "+1σ", "-3σ", "-2σ", "-1σ") if key in levels]
+    vix = inputs.sources.get("vix")
+    if not used or vix is None:
+        return levels
+
+    stacked = np.vstack(used)
+    tol = _LEVEL_TIE_TOL * np.maximum(1.0, np.abs(stacked))
+    near = np.any(np.abs(stacked - inputs.vix_dev) <= tol, axis=0) & ~inputs.fallback
+    for j in np.flatnonzero(near):
+        exact = get_deviation_levels(vix.iloc[: inputs.vix_rows[j]], sigma_levels=sigma_levels)
+        for key in levels:
+            levels[key][j] = exact[key]
+    return levels
+
+
+def vix_branch_vector(dev: np.ndarray, levels: Dict[str, np.ndarray]) -> np.ndarray:
+    """Branch of scoring.vix_score per element (index into VIX_RATIONALES; 6 — neutral)."""
+    conds = [
+        dev >= levels.get("+3σ", 999),
+        dev >= levels.get("+2σ", 999),
+        dev >= levels.get("+1σ", 999),
+        dev <= levels.get("-3σ", -999),
+        dev <= levels.get("-2σ", -999),
+        dev <= levels.get("-1σ", -999),
+    ]
+    return np.select(conds, np.arange(len(conds)), default=len(conds))
+
+
+def vix_score_vector(dev: np.ndarray, levels: Dict[str, np.ndarray]) -> np.ndarray:
+    """Vectorized scoring.vix_score: same branch order, defaults and scores."""
+    sc = get_settings().scoring
+    choices = np.array([
+        1000.0,
+        sc.vix_strong_risk_on_score,
+        sc.vix_risk_on_score,
+        -1000.0,
+        sc.vix_strong_risk_off_score,
+        sc.vix_risk_off_score,
+        0.0,
+    ])
+    return choices[vix_branch_vector(dev, levels)]
+
+
+def cot_composite_vector(comm: np.ndarray, z_comm: np.ndarray, thresh: np.ndarray) -> np.ndarray:
+    """Vectorized statistics.calculate_cot_composite (score only; large_inv affects the text only)."""
+    p5, p10, p90, p95 = thresh[:, 0], thresh[:, 1], thresh[:, 2], thresh[:, 3]
+    comm_part = np.select(
+        [comm >= p95, comm >= p90, (comm <= p5) | (comm <= 0), comm <= p10],
+        [2.2, 1.3, -2.2, -1.3],
+        default=0.0,
+    )
+    z_part = np.select([z_comm >= 3.0, z_comm <= -3.0], [2.0, -1.8], default=0.0)
+    return np.array([round(float(v), 2) for v in (0.0 + comm_part) + z_part])
+
+
+def compass_rationales(inputs: CompassInputs) -> Dict[str, np.ndarray]:
+    """
+    Factor -> rationale text per step, as _score_asset_compass writes it into the factor table
+    (meaningful for the steps scored by the vectorized pass, i.e. outside inputs.fallback).
+    """
+    s = get_settings()
+    sc = s.scoring
+    k = len(inputs.dates)
+
+    out: Dict[str, np.ndarray] = {}
+    if sc.vix_enabled:
+        branch = vix_branch_vector(inputs.vix_dev, _vix_levels(inputs, s.ui.sigma_levels))
+        out[VIX_FACTOR] = np.array(VIX_RATIONALES, dtype=object)[branch]
+    if sc.cot_enabled:
+        comm, thresh = inputs.cot_comm, inputs.cot_thresh
+        p5, p10, p90, p95 = thresh[:, 0], thresh[:, 1], thresh[:, 2], thresh[:, 3]
+        comm_branch = np.select([comm >= p95, comm >= p90, (comm <= p5) | (comm <= 0), comm <= p10], [0, 1, 2, 3], default=-1)
+        large_note = np.where(np.isnan(inputs.cot_large_inv), 50.0, inputs.cot_large_inv) <= p5
+        z = np.where(np.isnan(inputs.z_comm), 0.0, inputs.z_comm)
+        z_branch = np.select([z >= 3.0, z <= -3.0], [0, 1], default=-1)
+        texts = np.empty(k, dtype=object)
+        for j in range(k):
+            if np.isnan(thresh[j, 0]):
+                texts[j] = "COT: Not enough data for quantiles"
+            elif np.isnan(comm[j]):
+                texts[j] = "COT: No recent data"
+            else:
+                texts[j] = cot_rationale(int(comm_branch[j]), bool(large_note[j]), int(z_branch[j]))
+        out[COT_FACTOR] = texts
+    if not out:
+        out["No Factors"] = np.full(k, "No enabled factors or data available", dtype=object)
+    return out
+
+
+def _score_fallback_steps(inputs: CompassInputs) -> Dict[int, Tuple[pd.DataFrame, float, str, float]]:
+    # Редкие шаги (пустые срезы, мало строк) считаем эталонным скорером.
+    from src.analytics.signal_generator import _score_asset_compass
+
+    out: Dict[int, Tuple[pd.DataFrame, float, str, float]] = {}
+    for j in np.flatnonzero(inputs.fallback):
+        cur64 = inputs.dates.iloc[j].to_datetime64()
+        sliced: Dict[str, pd.DataFrame] = {}
+        for key, v in inputs.sources.items():
+            if v is None or v.empty:
+                sliced[key] = pd.DataFrame()
+            else:
+                sliced[key] = v.iloc[: v["date"].to_numpy().searchsorted(cur64, side="right")]
+        table, total, verdict, conf, _narr = _score_asset_compass(inputs.asset, sliced)
+        out[int(j)] = (table, total, verdict, conf)
+    return out
+
+
+def score_compass_inputs(
+    inputs: CompassInputs,
+    fallback: Optional[Dict[int, Tuple[pd.DataFrame, float, str, float]]] = None,
+) -> pd.DataFrame:
+    """
+    Scores all step dates in one vectorized pass; fallback steps go through the reference scorer
+    (`fallback` — their already computed _score_fallback_steps results).
+    """
+    s = get_settings()
+    sc = s.scoring
+    k = len(inputs.dates)
+
+    vix_col = sc.vix_enabled or sc.ml_enabled
+    cot_col = sc.cot_enabled or sc.ml_enabled
+
+    factors: Dict[str, np.ndarray] = {}
+    if sc.vix_enabled:
+        levels = _vix_levels(inputs, s.ui.sigma_levels)
+        factors[VIX_FACTOR] = vix_score_vector(inputs.vix_dev, levels)
+    if sc.cot_enabled:
+        usable = ~np.isnan(inputs.cot_thresh[:, 0]) & ~np.isnan(inputs.cot_comm)
+        z = np.where(np.isnan(inputs.z_comm), 0.0, inputs.z_comm)
+        composite = cot_composite_vector(inputs.cot_comm, z, inputs.cot_thresh) * sc.cot_weight
+        factors[COT_FACTOR] = np.where(usable, composite, 0.0)
+    if not factors:
+        factors["No Factors"] = np.zeros(k)
+
+    # Та же последовательность сложений, что у df_table["Score"].sum()
+    scores = list(factors.values())
+    total = scores[0].copy()
+    for arr in scores[1:]:
+        total = total + arr
+
+    thr = float(sc.verdict_buy)
+    verdict = np.where(total >= thr, "Bullish Trend", np.where(total <= -thr, "Bearish Trend", "Neutral")).astype(object)
+
+    n_required = int(vix_col) + 3 * int(cot_col)
+    latest_ok_num = np.full(k, int(vix_col))
+    if cot_col:
+        for arr in (inputs.cot_comm, inputs.cot_large_inv, inputs.z_comm):
+            latest_ok_num = latest_ok_num + (~np.isnan(arr)).astype(int)
+    latest_ok = latest_ok_num / max(1, n_required)
+    hist_ok = np.minimum(1.0, inputs.hist_rows / max(1, s.signals.min_feature_rows))
+    conf = np.clip(0.5 * latest_ok + 0.5 * hist_ok, 0.0, 1.0) if n_required else np.zeros(k)
+    confidence = np.array([round(float(c), 2) for c in conf])
+    verdict[confidence <= 0.01] = "No data"
+    total_score = np.array([round(float(t), 2) for t in total])
+
+    if fallback is None:
+        fallback = _score_fallback_steps(inputs) if inputs.fallback.any() else {}
+    for j, (_table, f_total, f_verdict, f_conf) in fallback.items():
+        total_score[j] = f_total
+        verdict[j] = f_verdict
+        confidence[j] = f_conf
+
+    # Порядок factor-колонок — по первому появлению, как у pd.DataFrame(list_of_dicts).
+    fast_names = list(factors)
+    order: List[str] = []
+    for j in range(k):
+        names = fallback[j][0]["Factor"].tolist() if j in fallback else fast_names
+        order.extend(n for n in names if n not in order)
+
+    columns: Dict[str, np.ndarray] = {}
+    for name in order:
+        col = np.full(k, np.nan)
+        if name in factors:
+            col[:] = factors[name]
+        columns[name] = col
+    for j, (table, *_rest) in fallback.items():
+        for name in order:
+            columns[name][j] = np.nan
+        for name, score in zip(table["Factor"].tolist(), table["Score"].tolist()):
+            columns[name][j] = score
+
+    return pd.DataFrame(
+        {
+            "date": inputs.dates,
+            "total_score": total_score,
+            "verdict": verdict.tolist(),
+            "position": (verdict == "Bullish Trend").astype(int),
+            "confidence": confidence,
+            **columns,
+        }
+    )
+
+
+@traced("signals.vectorized")
+def generate_signals_vectorized(dfs_full: Dict[str, pd.DataFrame], asset: str = "BTC") -> Optional[pd.DataFrame]:
+    """
+    Vectorized Compass signals. Returns None when the inputs violate fast_path_supported,
+    so the caller can fall back to the reference loop.
+    """
+    if not fast_path_supported(dfs_full, asset):
+        logger.info("Vectorized Compass engine unsupported for %s inputs, using reference loop", asset)
+        return None
+
+    inputs = build_compass_inputs(dfs_full, asset)
+    if len(inputs.dates) == 0:
+        return pd.DataFrame(columns=SIGNAL_COLUMNS)
+
+    df_signals = score_compass_inputs(inputs)
+    df_signals["date"] = pd.to_datetime(df_signals["date"]).dt.normalize()
+    return df_signals
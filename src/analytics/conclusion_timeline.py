@@ -0,0 +1,297 @@
+"""
+As-of Conclusion timeline: the Compass conclusion of BTC and ETH (factor scores, rationales, totals,
+verdicts, confidence) for every calendar day of [assets.conclusion_min_date, last data date], equal
+to generate_conclusion on the datasets filtered to [conclusion_min_date, day] as the Conclusion tab
+does. Written next to the derived artifacts by the "conclusion" stage of update_all_data:
+
+- conclusion_timeline.csv    one row per (day, asset, factor); asset, factor, rationale and verdict
+                             are stored as category codes;
+- conclusion_timeline.json   schema version, range, content key of the inputs and the categories.
+
+The tab then looks the selected day up instead of re-scoring. After an incremental update only the
+days from the earliest changed input date on are scored again (an as-of day sees no later data).
+Rebuild by hand:
+
+    python -m src.analytics.conclusion_timeline [--force]
+"""
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import hashlib
+import json
+import logging
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.analytics.compass_engine import (
+    _score_fallback_steps,
+    build_compass_inputs,
+    compass_rationales,
+    fast_path_supported,
+    score_compass_inputs,
+)
+from src.analytics.signal_generator import _combine_compass, _compass_narrative, _score_asset_compass
+from src.config.settings import get_settings
+from src.services.data_loader import filter_df, load_dataset, parse_dates
+from src.services.signal_cache import settings_key, signal_cache_key
+from src.services.storage import read_dataset, write_dataset
+from src.services.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+ASSETS = ("BTC", "ETH")
+NAME = "conclusion_timeline"
+COLUMNS = ["date", "asset", "factor", "score", "rationale", "total", "verdict", "confidence"]
+CATEGORIES = ["asset", "factor", "rationale", "verdict"]
+
+# Заглушка _score_asset_compass при нехватке данных: у неё пустой narrative
+_NO_DATA_FACTOR = "No data"
+
+
+def timeline_range(dfs: Dict[str, Optional[pd.DataFrame]]) -> tuple[dt.date, dt.date]:
+    """Range of the Conclusion slider: conclusion_min_date .. the latest date of any dataset."""
+    ends = [df["date"].max() for df in dfs.values() if df is not None and not df.empty and "date" in df.columns]
+    start = get_settings().assets.conclusion_min_date
+    return start, (pd.Timestamp(max(ends)).date() if ends else start)
+
+
+def timeline_key(dfs: Dict[str, Optional[pd.DataFrame]]) -> str:
+    """Content key of the timeline inputs: signal inputs and settings of both assets, the range."""
+    start, end = timeline_range(dfs)
+    h = hashlib.blake2b(digest_size=20)
+    h.update(f"{SCHEMA_VERSION}|{start}|{end}".encode("utf-8"))
+    for asset in ASSETS:
+        h.update(signal_cache_key(dfs, asset).encode("utf-8"))
+    return h.hexdigest()
+
+
+# -----------
+# Build
+# -----------
+def _reference_tables(frames: Dict[str, pd.DataFrame], asset: str, days: pd.DatetimeIndex, start: dt.date) -> list[tuple]:
+    """_score_asset_compass per day (inputs outside the vectorized engine's preconditions)."""
+    out = []
+    for day in days:
+        sliced = {k: filter_df(v, start, day) for k, v in frames.items()}
+        table, total, verdict, conf, _narr = _score_asset_compass(asset, sliced)
+        out.append((table, total, verdict, conf))
+    return out
+
+
+def _engine_tables(frames: Dict[str, pd.DataFrame], asset: str, days: pd.DatetimeIndex) -> list[tuple]:
+    """Factor tables of every day from one vectorized pass (reference scorer on its fallback days)."""
+    # Срез до конца дня: filter_df берёт строки с нормализованной датой <= day
+    cutoffs = pd.Series(days + pd.Timedelta(days=1) - pd.Timedelta(1, "ns"))
+    inputs = build_compass_inputs(frames, asset, dates=cutoffs)
+    fallback = _score_fallback_steps(inputs) if inputs.fallback.any() else {}
+    scored = score_compass_inputs(inputs, fallback=fallback)
+    texts = compass_rationales(inputs)
+
+    out = []
+    for j in range(len(days)):
+        if j in fallback:
+            table = fallback[j][0]
+        else:
+            names = list(texts)
+            table = pd.DataFrame({
+                "Factor": names,
+                "Score": [float(scored[name].iat[j]) for name in names],
+                "Rationale": [texts[name][j] for name in names],
+            })
+        out.append((table, float(scored["total_score"].iat[j]), scored["verdict"].iat[j], float(scored["confidence"].iat[j])))
+    return out
+
+
+@traced("signals.conclusion_timeline")
+def build_timeline(dfs: Dict[str, Optional[pd.DataFrame]], since: Optional[dt.date] = None) -> pd.DataFrame:
+    """
+    Long frame (COLUMNS) ordered by day, then asset in ASSETS order, then factor order; with `since`
+    only the days from it on (each still as of the whole range start).
+    """
+    start, end = timeline_range(dfs)
+    days = pd.date_range(max(start, since) if since is not None else start, end, freq="D")
+    frames = {k: filter_df(v, start, end) for k, v in dfs.items() if v is not None}
+
+    per_asset = {}
+    for asset in ASSETS:
+        if asset.lower() in frames and fast_path_supported(frames, asset):
+            per_asset[asset] = _engine_tables(frames, asset, days)
+        else:
+            logger.info("Conclusion timeline for %s: inputs outside the vectorized engine, scoring day by day", asset)
+            per_asset[asset] = _reference_tables(frames, asset, days, start)
+
+    cols: Dict[str, list] = {c: [] for c in COLUMNS}
+    for j, day in enumerate(days):
+        for asset in ASSETS:
+            table, total, verdict, conf = per_asset[asset][j]
+            n = len(table)
+            cols["date"] += [day] * n
+            cols["asset"] += [asset] * n
+            cols["factor"] += table["Factor"].tolist()
+            cols["score"] += [float(v) for v in table["Score"]]
+            cols["rationale"] += table["Rationale"].tolist()
+            cols["total"] += [total] * n
+            cols["verdict"] += [verdict] * n
+            cols["confidence"] += [conf] * n
+    out = pd.DataFrame(cols)
+    for col in CATEGORIES:
+        out[col] = out[col].astype("category")
+    return out
+
+
+# -----------
+# Lookup
+# -----------
+class ConclusionTimeline:
+    """
+    The stored timeline with row offsets per (day, asset): the conclusion of a day is a slice per
+    asset, located by arithmetic on the day number.
+    """
+
+    def __init__(self, df: pd.DataFrame, start: dt.date, end: dt.date, key: str):
+        self.df = df
+        self.start, self.end, self.key = start, end, key
+        n_days = (end - start).days + 1
+        day = (df["date"].to_numpy().astype("datetime64[D]") - np.datetime64(start, "D")).astype(np.int64)
+        asset = pd.Categorical(df["asset"], categories=list(ASSETS)).codes.astype(np.int64)
+        slot = day * len(ASSETS) + asset
+        # offsets[i]:offsets[i + 1] — строки слота i; данные отсортированы по слоту
+        self._offsets = np.searchsorted(slot, np.arange(n_days * len(ASSETS) + 1), side="left")
+
+    def covers(self, day: dt.date) -> bool:
+        return self.start <= day <= self.end
+
+    def _asset_result(self, day_idx: int, a: int) -> tuple[pd.DataFrame, float, str, float, str]:
+        lo, hi = self._offsets[day_idx * len(ASSETS) + a], self._offsets[day_idx * len(ASSETS) + a + 1]
+        rows = self.df.iloc[lo:hi]
+        if rows.empty:
+            return pd.DataFrame(), 0.0, "Neutral", 0.0, ""
+        table = pd.DataFrame({
+            "Factor": rows["factor"].astype(str).tolist(),
+            "Score": rows["score"].to_numpy(dtype=float),
+            "Rationale": rows["rationale"].astype(str).tolist(),
+        })
+        narrative = "" if table["Factor"].tolist() == [_NO_DATA_FACTOR] else _compass_narrative(table)
+        first = rows.iloc[0]
+        return table, float(first["total"]), str(first["verdict"]), float(first["confidence"]), narrative
+
+    def at(self, day: dt.date):
+        """generate_conclusion (Compass) as of `day`: (per_asset, combined score, verdict, narrative)."""
+        day_idx = (day - self.start).days
+        per_asset = {asset: self._asset_result(day_idx, a) for a, asset in enumerate(ASSETS)}
+        return (per_asset, *_combine_compass(per_asset))
+
+
+def _root() -> Path:
+    s = get_settings()
+    return Path(s.data_dir) / s.derived.dir
+
+
+def _read_meta(root: Path) -> dict:
+    try:
+        return json.loads((root / f"{NAME}.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _extend(dfs: Dict[str, Optional[pd.DataFrame]], since: dt.date) -> Optional[pd.DataFrame]:
+    """Stored rows before `since` + the days from `since` on; None when the stored timeline can't be reused."""
+    stored = load_timeline()
+    meta = _read_meta(_root())
+    start, _end = timeline_range(dfs)
+    if stored is None or meta.get("settings") != settings_key() or stored.start != start or since > stored.end + dt.timedelta(days=1):
+        return None
+    if since <= start:
+        return None
+    head = stored.df[stored.df["date"] < pd.Timestamp(since)]
+    tail = build_timeline(dfs, since=since)
+    df = pd.concat([head.astype({col: str for col in CATEGORIES}), tail.astype({col: str for col in CATEGORIES})], ignore_index=True)
+    for col in CATEGORIES:
+        df[col] = df[col].astype("category")
+    return df
+
+
+def write_timeline(dfs: Dict[str, Optional[pd.DataFrame]], since: Optional[dt.date] = None) -> Path:
+    """
+    Builds the timeline from the full datasets `dfs` and stores it with its content key. With `since`
+    (earliest date where the inputs changed) the stored timeline of the same settings keeps its days
+    before it and only the rest is scored.
+    """
+    root = _root()
+    root.mkdir(parents=True, exist_ok=True)
+    df = _extend(dfs, since) if since is not None else None
+    if df is None:
+        df = build_timeline(dfs)
+    else:
+        logger.info("Conclusion timeline: rescoring days from %s", since)
+    start, end = timeline_range(dfs)
+    codes = df.assign(**{col: df[col].cat.codes for col in CATEGORIES})
+    out = write_dataset(codes, root / f"{NAME}.csv")
+    meta = {
+        "schema_version": SCHEMA_VERSION,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "key": timeline_key(dfs),
+        "settings": settings_key(),
+        "categories": {col: df[col].cat.categories.tolist() for col in CATEGORIES},
+    }
+    # meta последним: до его записи читатели видят прежний ключ
+    (root / f"{NAME}.json").write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+    load_timeline.cache_clear()
+    return out
+
+
+def up_to_date(dfs: Dict[str, Optional[pd.DataFrame]]) -> bool:
+    meta = _read_meta(_root())
+    return meta.get("schema_version") == SCHEMA_VERSION and meta.get("key") == timeline_key(dfs)
+
+
+@lru_cache(maxsize=1)
+def load_timeline() -> Optional[ConclusionTimeline]:
+    """Stored timeline (None if disabled, missing, of another schema version or not in Compass mode)."""
+    s = get_settings()
+    if not (s.derived.enabled and s.compass_mode):
+        return None
+    root = _root()
+    meta = _read_meta(root)
+    if meta.get("schema_version") != SCHEMA_VERSION:
+        return None
+    df, backend = read_dataset(root / f"{NAME}.csv", float_precision="round_trip")
+    if df is None:
+        return None
+    if backend == "csv":
+        df = parse_dates(df)
+    for col in CATEGORIES:
+        df[col] = pd.Categorical.from_codes(df[col].to_numpy(dtype=np.int64), categories=meta["categories"][col])
+    start, end = dt.date.fromisoformat(meta["start"]), dt.date.fromisoformat(meta["end"])
+    return ConclusionTimeline(df, start, end, meta["key"])
+
+
+def timeline_for(dfs: Dict[str, Optional[pd.DataFrame]]) -> Optional[ConclusionTimeline]:
+    """The stored timeline if it was built from exactly `dfs` with the current settings, else None."""
+    timeline = load_timeline()
+    if timeline is None or timeline.key != timeline_key(dfs):
+        return None
+    return timeline
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--force", action="store_true", help="rebuild even if the stored timeline is up to date")
+    args = parser.parse_args()
+
+    dfs = {name: load_dataset(name) for name in get_settings().files}
+    if not args.force and up_to_date(dfs):
+        print(f"Conclusion timeline in {_root()} is up to date")
+        return
+    print(f"✓ {write_timeline(dfs)}")
+
+
+if __name__ == "__main__":
+    main()
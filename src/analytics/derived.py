@@ -0,0 +1,249 @@
+"""
+Derived series materialized by the "derive" stage of update_all_data:
+
+- <name>.csv      date, close and the columns of DERIVED_COLUMNS[name] (dxy_30d, us10y_30d,
+                  mom_30d, above_200ma, spx_corr) for every stored row;
+- btc_spx_corr    BTC / S&P 500 correlation on the daily calendar (Macro dashboard);
+- meta.json       schema version, correlation window and a digest of every source.
+
+build_features and the Macro dashboard take the stored columns when their frames are a date
+prefix (or, for the daily correlation, a date window) of the stored datasets, and recompute
+otherwise. Rebuild from the stored data after changing SCHEMA_VERSION:
+
+    python -m src.analytics.derived
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.config.settings import get_settings
+from src.services.data_loader import load_dataset, parse_dates
+from src.services.signal_cache import dataset_digest
+from src.services.storage import read_dataset, write_dataset
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+CORRELATION = "btc_spx_corr"
+CORR_WINDOW = 60
+CORR_MIN_PERIODS = 20
+
+# Датасет -> производные колонки; spx хранится без них как эталон для spx_corr
+DERIVED_COLUMNS: Dict[str, list[str]] = {
+    "btc": ["mom_30d", "above_200ma", "spx_corr"],
+    "eth": ["mom_30d", "above_200ma", "spx_corr"],
+    "dxy": ["dxy_30d"],
+    "us10y": ["us10y_30d"],
+    "spx": [],
+}
+
+_META = "meta.json"
+
+
+def change_30d(close: pd.Series) -> pd.Series:
+    return (close / close.shift(30) - 1) * 100
+
+
+def spx_correlation(df: pd.DataFrame, spx: pd.DataFrame) -> np.ndarray:
+    """60-row rolling correlation of the asset close with the nearest S&P 500 close, per asset row."""
+    merged = pd.merge_asof(
+        df[["date", "close"]].rename(columns={"close": "close_asset"}),
+        spx[["date", "close"]].rename(columns={"close": "close_spx"}),
+        on="date",
+        direction="nearest",
+    )
+    merged["spx_corr"] = merged["close_asset"].rolling(60, min_periods=30).corr(merged["close_spx"])
+    return pd.merge_asof(df[["date"]], merged[["date", "spx_corr"]], on="date", direction="nearest")["spx_corr"].to_numpy()
+
+
+def daily_correlation(
+    df_btc: pd.DataFrame,
+    df_spx: pd.DataFrame,
+    window: int = CORR_WINDOW,
+    min_periods: int = CORR_MIN_PERIODS,
+) -> pd.Series:
+    """BTC / S&P 500 rolling correlation on the daily calendar (S&P forward-filled over non-trading days)."""
+    btc_min, btc_max = df_btc["date"].min().normalize(), df_btc["date"].max().normalize()
+    spx_min, spx_max = df_spx["date"].min().normalize(), df_spx["date"].max().normalize()
+
+    start, end = min(btc_min, spx_min), max(btc_max, spx_max)
+    date_range = pd.date_range(start=start, end=end, freq="D")
+
+    # Внутридневные бары сводим к последнему закрытию дня перед переходом на дневной календарь
+    def daily_close(df: pd.DataFrame) -> pd.Series:
+        df = df.assign(date=df["date"].dt.normalize()).drop_duplicates("date", keep="last")
+        return df.set_index("date")["close"].reindex(date_range)
+
+    btc_series = daily_close(df_btc)
+    spx_series = daily_close(df_spx).ffill()
+
+    prices = pd.DataFrame({"btc": btc_series, "spx": spx_series}).dropna(subset=["btc"])
+    return prices["btc"].rolling(window=window, min_periods=min_periods).corr(prices["spx"])
+
+
+def _sorted(df: pd.DataFrame) -> pd.DataFrame:
+    df = df[["date", "close"]].copy()
+    if not pd.api.types.is_datetime64_any_dtype(df["date"]):
+        df["date"] = pd.to_datetime(df["date"])
+    return df.sort_values("date").reset_index(drop=True)
+
+
+def derive_all(dfs: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """Artifact name -> frame, computed from the full datasets exactly as build_features does."""
+    frames = {name: _sorted(df) for name, df in dfs.items() if name in DERIVED_COLUMNS and df is not None and not df.empty}
+    out: Dict[str, pd.DataFrame] = {}
+    for name, df in frames.items():
+        if name in ("dxy", "us10y"):
+            df[f"{name}_30d"] = change_30d(df["close"])
+        elif name in ("btc", "eth"):
+            df["mom_30d"] = (df["close"] / df["close"].shift(30) - 1) * 100
+            df["above_200ma"] = (df["close"] > df["close"].rolling(200, min_periods=100).mean()).astype(int)
+            if "spx" in frames:
+                df["spx_corr"] = spx_correlation(df, frames["spx"])
+        out[name] = df
+    if "btc" in frames and "spx" in frames:
+        corr = daily_correlation(frames["btc"], frames["spx"])
+        out[CORRELATION] = pd.DataFrame({"date": corr.index, "corr": corr.to_numpy()})
+    return out
+
+
+# -----------
+# Artifacts
+# -----------
+def _root() -> Path:
+    s = get_settings()
+    return Path(s.data_dir) / s.derived.dir
+
+
+def _digests(dfs: Dict[str, pd.DataFrame]) -> Dict[str, str]:
+    return {name: dataset_digest(dfs.get(name), ["date", "close"]) for name in DERIVED_COLUMNS}
+
+
+def _read_meta(root: Path) -> dict:
+    try:
+        return json.loads((root / _META).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def up_to_date(dfs: Dict[str, pd.DataFrame]) -> bool:
+    """Stored artifacts have the current schema version and were derived from exactly `dfs`."""
+    meta = _read_meta(_root())
+    return meta.get("schema_version") == SCHEMA_VERSION and meta.get("sources") == _digests(dfs)
+
+
+def write_derived(dfs: Dict[str, pd.DataFrame]) -> list[str]:
+    """Derives every artifact from the full datasets `dfs` and writes it next to the processed data."""
+    root = _root()
+    root.mkdir(parents=True, exist_ok=True)
+    artifacts = derive_all(dfs)
+    for name, df in artifacts.items():
+        write_dataset(df, root / f"{name}.csv")
+    meta = {
+        "schema_version": SCHEMA_VERSION,
+        "correlation": {"window": CORR_WINDOW, "min_periods": CORR_MIN_PERIODS},
+        "sources": _digests(dfs),
+        "artifacts": sorted(artifacts),
+    }
+    # meta последним: до его записи читатели видят старую версию схемы/источников
+    (root / _META).write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    load_derived.cache_clear()
+    return sorted(artifacts)
+
+
+@lru_cache(maxsize=None)
+def load_derived(name: str) -> Optional[pd.DataFrame]:
+    """Stored artifact `name` (None if derivation is disabled, missing or of another schema version)."""
+    if not get_settings().derived.enabled:
+        return None
+    root = _root()
+    meta = _read_meta(root)
+    if meta.get("schema_version") != SCHEMA_VERSION or name not in meta.get("artifacts", []):
+        return None
+    # round_trip: значения должны совпадать с пересчётом в build_features бит в бит
+    df, backend = read_dataset(root / f"{name}.csv", float_precision="round_trip")
+    if df is None:
+        return None
+    return parse_dates(df) if backend == "csv" else df
+
+
+def _prefix_rows(art: Optional[pd.DataFrame], df: pd.DataFrame) -> Optional[int]:
+    """Rows of `df` (date-sorted) if it is a prefix of the artifact's source rows, else None."""
+    m = len(df)
+    if art is None or m == 0 or m > len(art):
+        return None
+    # Весь общий префикс, а не только края: пересмотренная строка в середине тоже даёт пересчёт
+    d, ad = df["date"].to_numpy(), art["date"].to_numpy()[:m]
+    c, ac = df["close"].to_numpy(dtype=float), art["close"].to_numpy(dtype=float)[:m]
+    if not (np.array_equal(d, ad) and np.array_equal(c, ac, equal_nan=True)):
+        return None
+    return m
+
+
+def precomputed(name: str, df: pd.DataFrame, column: str) -> Optional[np.ndarray]:
+    """Stored `column` for the rows of `df` (date-sorted dataset `name` or a date prefix of it)."""
+    art = load_derived(name)
+    if art is None or column not in art.columns:
+        return None
+    m = _prefix_rows(art, df)
+    return None if m is None else art[column].to_numpy()[:m]
+
+
+def precomputed_spx_corr(name: str, df: pd.DataFrame, spx: pd.DataFrame) -> Optional[np.ndarray]:
+    """
+    Stored spx_corr for the rows of `df`. Valid when both frames are prefixes of the stored data and
+    the S&P slice is complete or reaches the last asset date (nearest matches are then the same).
+    """
+    art, art_spx = load_derived(name), load_derived("spx")
+    if art is None or "spx_corr" not in art.columns:
+        return None
+    m, ms = _prefix_rows(art, df), _prefix_rows(art_spx, spx)
+    if m is None or ms is None:
+        return None
+    if ms < len(art_spx) and spx["date"].to_numpy()[ms - 1] < df["date"].to_numpy()[m - 1]:
+        return None
+    return art["spx_corr"].to_numpy()[:m]
+
+
+def stored_daily_correlation(df_btc: pd.DataFrame, window: int, min_periods: int) -> Optional[pd.Series]:
+    """
+    Stored daily BTC / S&P 500 correlation over the dates of `df_btc` when it is a contiguous date
+    window of the stored BTC data (values at the left edge then include the preceding history).
+    """
+    if (window, min_periods) != (CORR_WINDOW, CORR_MIN_PERIODS) or df_btc.empty:
+        return None
+    art, corr = load_derived("btc"), load_derived(CORRELATION)
+    if art is None or corr is None:
+        return None
+    dates = art["date"].to_numpy()
+    i = int(dates.searchsorted(df_btc["date"].iloc[0]))
+    if _prefix_rows(art.iloc[i:], df_btc) is None:
+        return None
+    lo, hi = df_btc["date"].iloc[0].normalize(), df_btc["date"].iloc[-1].normalize()
+    rows = corr[(corr["date"] >= lo) & (corr["date"] <= hi)]
+    return pd.Series(rows["corr"].to_numpy(), index=pd.DatetimeIndex(rows["date"]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--force", action="store_true", help="rewrite even if the stored artifacts are up to date")
+    args = parser.parse_args()
+
+    dfs = {name: load_dataset(name, columns=["date", "close"]) for name in DERIVED_COLUMNS}
+    if not args.force and up_to_date(dfs):
+        print(f"Derived artifacts in {_root()} are up to date (schema v{SCHEMA_VERSION})")
+        return
+    for name in write_derived(dfs):
+        print(f"✓ {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,17 +2,15 @@
 from __future__ import annotations
 
 import logging
-from typing import Dict
+from typing import Dict, Optional
 
 import pandas as pd
 
+from src.analytics.derived import change_30d, precomputed, precomputed_spx_corr, spx_correlation
 from src.config.settings import get_settings
+from src.services.tracing import trace, traced
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-fh = logging.FileHandler('app.log', encoding='utf-8')
-fh.setLevel(logging.DEBUG)
-logger.addHandler(fh)
 
 
 def _ensure_datetime_inplace(df: pd.DataFrame) -> None:
@@ -20,9 +18,58 @@ def _ensure_datetime_inplace(df: pd.DataFrame) -> None:
         df["date"] = pd.to_datetime(df["date"])
 
 
-def build_features(dfs: Dict[str, pd.DataFrame], asset: str, for_signals: bool) -> pd.DataFrame:
-    logger.debug(f"Building features for {asset}, for_signals={for_signals}")
-    logger.debug(f"Input dfs keys: {list(dfs.keys())}")
+def _derived(name: str, df: pd.DataFrame, column: str, compute) -> pd.Series:
+    """Column materialized by the derive stage when `df` is a prefix of the stored dataset, else computed."""
+    values = precomputed(name, df, column)
+    if values is None:
+        return compute()
+    trace("features", "%s.%s from derived artifacts", name, column)
+    return pd.Series(values, index=df.index)
+
+
+FEATURE_COLUMNS = [
+    "vix_dev",
+    "cot_comm",
+    "cot_large_inv",
+    "z_comm", # ← обновлено
+    "mom_30d",
+    "dxy_30d",
+    "us10y_30d",
+    "spx_corr",
+    "above_200ma",
+]
+
+
+@traced("features.build_features")
+def build_features(dfs: Dict[str, pd.DataFrame], asset: str, for_signals: bool, panel=None) -> pd.DataFrame:
+    """
+    Feature frame for `asset`. With a MarketPanel built from the full data (and `dfs` being
+    that data or a date-prefix slice of it, as in the signal loop) the result is sliced from
+    the panel instead of being re-merged.
+    """
+    if panel is not None:
+        df = panel.features(dfs, asset, for_signals)
+        if df is not None:
+            return df
+
+    df = raw_features(dfs, asset, for_signals)
+    if df is None:
+        return pd.DataFrame()
+    return finalize_features(df, for_signals)
+
+
+def raw_features(
+    dfs: Dict[str, pd.DataFrame],
+    asset: str,
+    for_signals: bool,
+    positions: bool = False,
+) -> Optional[pd.DataFrame]:
+    """
+    Merged sources and derived columns before ffill/dropna (None without price data).
+    positions=True adds `_pos_<source>` columns: the matched source row of every price row.
+    """
+    trace("features", "Building features for %s, for_signals=%s", asset, for_signals)
+    trace("features", "Input dfs keys: %s", lambda: list(dfs.keys()))
 
     s = get_settings()
     sc = s.scoring
@@ -31,10 +78,10 @@ def build_features(dfs: Dict[str, pd.DataFrame], asset: str, for_signals: bool)
     df_price = dfs.get(asset_key)
     if df_price is None or df_price.empty:
         logger.warning(f"No price data for {asset}")
-        return pd.DataFrame()
+        return None
 
-    logger.debug(f"Price df shape: {df_price.shape}")
-    logger.debug(f"Price df head: {df_price.head().to_dict()}")
+    trace("features", "Price df shape: %s", df_price.shape)
+    trace("features", "Price df head: %s", lambda: df_price.head().to_dict())
 
     df = df_price[["date", "close"]].copy()
     _ensure_datetime_inplace(df)
@@ -45,11 +92,13 @@ def build_features(dfs: Dict[str, pd.DataFrame], asset: str, for_signals: bool)
             vix = dfs["vix"][["date", "deviation_pct"]].copy()
             _ensure_datetime_inplace(vix)
             vix = vix.sort_values("date").reset_index(drop=True)
-            logger.debug(f"VIX df shape before merge: {vix.shape}")
+            if positions:
+                vix["_pos_vix"] = range(len(vix))
+            trace("features", "VIX df shape before merge: %s", vix.shape)
             # FIX: Changed direction to "nearest" for VIX merge to handle potential date mismatches
             df = pd.merge_asof(df, vix, on="date", direction="nearest").rename(columns={"deviation_pct": "vix_dev"})
-            logger.debug(f"After VIX merge, df shape: {df.shape}")
-            logger.debug(f"Latest vix_dev: {df['vix_dev'].iloc[-1] if 'vix_dev' in df else 'None'}")
+            trace("features", "After VIX merge, df shape: %s", df.shape)
+            trace("features", "Latest vix_dev: %s", lambda: df['vix_dev'].iloc[-1] if 'vix_dev' in df else 'None')
 
     cot_key = f"{asset_key}_cot"
     if sc.cot_enabled or ml_enabled:
@@ -59,7 +108,9 @@ def build_features(dfs: Dict[str, pd.DataFrame], asset: str, for_signals: bool)
             ].copy()
             _ensure_datetime_inplace(cot)
             cot = cot.sort_values("date").reset_index(drop=True)
-            logger.debug(f"COT df shape before merge: {cot.shape}")
+            if positions:
+                cot["_pos_cot"] = range(len(cot))
+            trace("features", "COT df shape before merge: %s", cot.shape)
             df = pd.merge_asof(df, cot, on="date", direction="backward").rename(
                 columns={
                     "COT_Index_Comm_26w": "cot_comm",
@@ -67,68 +118,70 @@ def build_features(dfs: Dict[str, pd.DataFrame], asset: str, for_signals: bool)
                     "Z_Score_Comm": "z_comm", # ← z_comm
                 }
             )
-            logger.debug(f"After COT merge, df shape: {df.shape}")
-            logger.debug(f"Latest cot_comm: {df['cot_comm'].iloc[-1] if 'cot_comm' in df else 'None'}")
+            trace("features", "After COT merge, df shape: %s", df.shape)
+            trace("features", "Latest cot_comm: %s", lambda: df['cot_comm'].iloc[-1] if 'cot_comm' in df else 'None')
 
     if sc.liquidity_enabled or ml_enabled:
         if "dxy" in dfs and dfs["dxy"] is not None and not dfs["dxy"].empty:
             dxy = dfs["dxy"][["date", "close"]].copy()
             _ensure_datetime_inplace(dxy)
             dxy = dxy.sort_values("date").reset_index(drop=True)
-            dxy["dxy_30d"] = (dxy["close"] / dxy["close"].shift(30) - 1) * 100
-            logger.debug(f"DXY df shape before merge: {dxy.shape}")
-            df = pd.merge_asof(df, dxy[["date", "dxy_30d"]], on="date", direction="nearest")
-            logger.debug(f"After DXY merge, df shape: {df.shape}")
+            dxy["dxy_30d"] = _derived("dxy", dxy, "dxy_30d", lambda: change_30d(dxy["close"]))
+            trace("features", "DXY df shape before merge: %s", dxy.shape)
+            dxy_cols = ["date", "dxy_30d"]
+            if positions:
+                dxy["_pos_dxy"] = range(len(dxy))
+                dxy_cols.append("_pos_dxy")
+            df = pd.merge_asof(df, dxy[dxy_cols], on="date", direction="nearest")
+            trace("features", "After DXY merge, df shape: %s", df.shape)
 
         if "us10y" in dfs and dfs["us10y"] is not None and not dfs["us10y"].empty:
             us10y = dfs["us10y"][["date", "close"]].copy()
             _ensure_datetime_inplace(us10y)
             us10y = us10y.sort_values("date").reset_index(drop=True)
-            us10y["us10y_30d"] = (us10y["close"] / us10y["close"].shift(30) - 1) * 100
-            logger.debug(f"US10Y df shape before merge: {us10y.shape}")
-            df = pd.merge_asof(df, us10y[["date", "us10y_30d"]], on="date", direction="nearest")
-            logger.debug(f"After US10Y merge, df shape: {df.shape}")
+            us10y["us10y_30d"] = _derived("us10y", us10y, "us10y_30d", lambda: change_30d(us10y["close"]))
+            trace("features", "US10Y df shape before merge: %s", us10y.shape)
+            us10y_cols = ["date", "us10y_30d"]
+            if positions:
+                us10y["_pos_us10y"] = range(len(us10y))
+                us10y_cols.append("_pos_us10y")
+            df = pd.merge_asof(df, us10y[us10y_cols], on="date", direction="nearest")
+            trace("features", "After US10Y merge, df shape: %s", df.shape)
 
     if sc.correlation_enabled or ml_enabled:
         if "spx" in dfs and dfs["spx"] is not None and not dfs["spx"].empty:
             spx = dfs["spx"][["date", "close"]].copy()
             _ensure_datetime_inplace(spx)
             spx = spx.sort_values("date").reset_index(drop=True)
-            merged = pd.merge_asof(
-                df[["date", "close"]].rename(columns={"close": "close_asset"}),
-                spx.rename(columns={"close": "close_spx"}),
-                on="date",
-                direction="nearest"
-            )
-            merged["spx_corr"] = merged["close_asset"].rolling(60, min_periods=30).corr(merged["close_spx"])
-            df = pd.merge_asof(df, merged[["date", "spx_corr"]], on="date", direction="nearest")
-            logger.debug(f"After SPX corr, df shape: {df.shape}")
+            if positions:
+                spx["_pos_spx"] = range(len(spx))
+            corr = precomputed_spx_corr(asset_key, df, spx)
+            if positions:
+                # номер сматченной строки spx (merge nearest по датам цены)
+                df = pd.merge_asof(df, spx[["date", "_pos_spx"]], on="date", direction="nearest")
+            df["spx_corr"] = spx_correlation(df, spx) if corr is None else corr
+            trace("features", "After SPX corr, df shape: %s", df.shape)
 
     if sc.momentum_enabled or ml_enabled:
-        df["mom_30d"] = (df["close"] / df["close"].shift(30) - 1) * 100
-        logger.debug(f"mom_30d calculated")
+        df["mom_30d"] = _derived(asset_key, df, "mom_30d", lambda: (df["close"] / df["close"].shift(30) - 1) * 100)
+        trace("features", "mom_30d calculated")
 
     if sc.trend_filter_enabled or ml_enabled:
-        df["above_200ma"] = (df["close"] > df["close"].rolling(200, min_periods=100).mean()).astype(int)
-        logger.debug(f"above_200ma calculated")
+        df["above_200ma"] = _derived(
+            asset_key, df, "above_200ma", lambda: (df["close"] > df["close"].rolling(200, min_periods=100).mean()).astype(int)
+        )
+        trace("features", "above_200ma calculated")
 
     if not for_signals:
         horizon = int(s.ml.target_horizon_days)
         df["target"] = (df["close"].shift(-horizon) / df["close"] - 1) * 100
-        logger.debug(f"Target calculated for horizon {horizon}")
-
-    possible_cols = [
-        "vix_dev",
-        "cot_comm",
-        "cot_large_inv",
-        "z_comm", # ← обновлено
-        "mom_30d",
-        "dxy_30d",
-        "us10y_30d",
-        "spx_corr",
-        "above_200ma",
-    ]
-    feature_cols = [c for c in possible_cols if c in df.columns]
+        trace("features", "Target calculated for horizon %s", horizon)
+
+    return df
+
+
+def finalize_features(df: pd.DataFrame, for_signals: bool) -> pd.DataFrame:
+    feature_cols = [c for c in FEATURE_COLUMNS if c in df.columns]
     if not for_signals:
         feature_cols.append("target")
 
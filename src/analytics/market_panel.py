@@ -0,0 +1,323 @@
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import shutil
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.analytics.features import FEATURE_COLUMNS, change_30d, raw_features
+from src.config.settings import get_settings
+from src.services.shared_frames import attach_frame, export_frame
+from src.services.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+ASSETS = ["BTC", "ETH"]
+
+# (position key, dataset key, feature columns filled from the source row)
+_GROUPS = [
+    ("vix", "vix", ["vix_dev"]),
+    ("cot", "{asset}_cot", ["cot_comm", "cot_large_inv", "z_comm"]),
+    ("dxy", "dxy", ["dxy_30d"]),
+    ("us10y", "us10y", ["us10y_30d"]),
+    ("spx", "spx", ["spx_corr"]),
+]
+
+# Колонки датасетов, от которых зависят признаки (ключ версии данных и проверки fast path).
+_USED_COLUMNS: Dict[str, List[str]] = {
+    "btc": ["close"],
+    "eth": ["close"],
+    "vix": ["deviation_pct"],
+    "btc_cot": ["COT_Index_Comm_26w", "COT_Index_Large_Inverted_26w", "Z_Score_Comm"],
+    "eth_cot": ["COT_Index_Comm_26w", "COT_Index_Large_Inverted_26w", "Z_Score_Comm"],
+    "dxy": ["close"],
+    "us10y": ["close"],
+    "spx": ["close"],
+}
+
+_META = "meta.json"
+
+
+@dataclass
+class AssetPanel:
+    """Full-history features of one asset: pre-ffill frame, its ffill, and matched source rows."""
+
+    raw: pd.DataFrame
+    ffilled: pd.DataFrame
+    positions: pd.DataFrame  # int64 per position key, -1 = no match
+    first_valid: Dict[str, int]
+
+
+def _source_frames(dfs: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """Per-dataset arrays used to rebuild tail rows of a date-prefix slice."""
+    out: Dict[str, pd.DataFrame] = {}
+    vix = dfs.get("vix")
+    if vix is not None and not vix.empty:
+        out["vix"] = pd.DataFrame({"date": vix["date"].to_numpy(), "vix_dev": vix["deviation_pct"].to_numpy()})
+    for asset in ASSETS:
+        key = f"{asset.lower()}_cot"
+        cot = dfs.get(key)
+        if cot is not None and not cot.empty:
+            out[key] = pd.DataFrame({
+                "date": cot["date"].to_numpy(),
+                "cot_comm": cot["COT_Index_Comm_26w"].to_numpy(),
+                "cot_large_inv": cot["COT_Index_Large_Inverted_26w"].to_numpy(),
+                "z_comm": cot["Z_Score_Comm"].to_numpy(),
+            })
+    for key in ["dxy", "us10y"]:
+        df = dfs.get(key)
+        if df is not None and not df.empty:
+            out[key] = pd.DataFrame({"date": df["date"].to_numpy(), f"{key}_30d": change_30d(df["close"]).to_numpy()})
+    spx = dfs.get("spx")
+    if spx is not None and not spx.empty:
+        out["spx"] = pd.DataFrame({"date": spx["date"].to_numpy(), "close": spx["close"].to_numpy()})
+    return out
+
+
+def panel_supported(dfs: Dict[str, pd.DataFrame]) -> bool:
+    """Panel slicing assumes sorted, unique, tz-naive datetime dates in every used dataset."""
+    for key in _USED_COLUMNS:
+        df = dfs.get(key)
+        if df is None or df.empty:
+            continue
+        if "date" not in df.columns or any(c not in df.columns for c in _USED_COLUMNS[key]):
+            return False
+        dates = df["date"]
+        if not pd.api.types.is_datetime64_dtype(dates) or dates.isna().any():
+            return False
+        if not (dates.is_monotonic_increasing and dates.is_unique):
+            return False
+    return True
+
+
+def data_fingerprint(dfs: Dict[str, pd.DataFrame]) -> str:
+    """Content hash of the dataset columns the features depend on, plus the feature settings."""
+    s = get_settings()
+    h = hashlib.blake2b(digest_size=16)
+    settings_part = {"scoring": dataclasses.asdict(s.scoring), "horizon": s.ml.target_horizon_days}
+    h.update(json.dumps(settings_part, sort_keys=True, default=str).encode("utf-8"))
+    for key, cols in _USED_COLUMNS.items():
+        df = dfs.get(key)
+        h.update(key.encode("utf-8"))
+        if df is None or df.empty:
+            h.update(b"-")
+            continue
+        for col in ["date", *cols]:
+            h.update(np.ascontiguousarray(df[col].to_numpy()).tobytes())
+    return h.hexdigest()
+
+
+class MarketPanel:
+    """
+    All sources aligned to each asset's price dates, with derived features, built once per
+    data version (see data_fingerprint).
+
+    features() answers build_features for the full data or any date-prefix slice of it (the
+    signal loop's `date <= D` slices): rows whose matched source rows all lie inside the
+    slice are plain slices of the panel; only the tail rows matched past the slice cutoff
+    (and the target horizon) are recomputed.
+    """
+
+    def __init__(self, fingerprint: str, assets: Dict[str, AssetPanel], sources: Dict[str, pd.DataFrame]):
+        self.fingerprint = fingerprint
+        self.assets = assets
+        self.sources = sources
+        self._source_dates = {k: v["date"].to_numpy() for k, v in sources.items()}
+
+    @classmethod
+    def build(cls, dfs: Dict[str, pd.DataFrame], fingerprint: Optional[str] = None) -> "MarketPanel":
+        assets: Dict[str, AssetPanel] = {}
+        for asset in ASSETS:
+            raw = raw_features(dfs, asset, for_signals=False, positions=True)
+            if raw is None:
+                continue
+            pos_cols = [c for c in raw.columns if c.startswith("_pos_")]
+            positions = pd.DataFrame({
+                c[len("_pos_"):]: raw[c].fillna(-1).astype(np.int64).to_numpy() for c in pos_cols
+            })
+            raw = raw.drop(columns=pos_cols)
+            first_valid = {c: int(np.argmax(raw[c].notna().to_numpy())) if raw[c].notna().any() else len(raw) for c in raw.columns}
+            assets[asset] = AssetPanel(raw=raw, ffilled=raw.ffill(), positions=positions, first_valid=first_valid)
+        return cls(fingerprint or data_fingerprint(dfs), assets, _source_frames(dfs))
+
+    # -------------
+    def _prefix_len(self, df: Optional[pd.DataFrame], dates: np.ndarray) -> Optional[int]:
+        """Rows of `df` if it is a prefix of the panel's dataset with `dates`, else None."""
+        if df is None or df.empty:
+            return 0
+        m = len(df)
+        if m > len(dates) or "date" not in df.columns:
+            return None
+        d = df["date"].to_numpy()
+        if d[0] != dates[0] or d[-1] != dates[m - 1]:
+            return None
+        return m
+
+    def features(self, dfs: Dict[str, pd.DataFrame], asset: str, for_signals: bool) -> Optional[pd.DataFrame]:
+        """build_features(dfs, asset, for_signals) from the panel; None if `dfs` is not a prefix of its data."""
+        ap = self.assets.get(asset.upper())
+        if ap is None:
+            return None
+        asset_key = asset.lower()
+        n = self._prefix_len(dfs.get(asset_key), ap.raw["date"].to_numpy())
+        if not n:
+            return None
+
+        horizon = int(get_settings().ml.target_horizon_days)
+        cols = ["date", "close"]
+        a = n if for_signals else max(0, n - horizon)
+        matched: Dict[str, tuple[int, np.ndarray]] = {}
+        for pos_key, ds_template, group_cols in _GROUPS:
+            if pos_key not in ap.positions.columns:
+                continue
+            ds_key = ds_template.format(asset=asset_key)
+            m = self._prefix_len(dfs.get(ds_key), self._source_dates.get(ds_key, np.array([], dtype="M8[ns]")))
+            if m is None:
+                return None
+            if m == 0:
+                continue
+            pos = ap.positions[pos_key].to_numpy()[:n]
+            matched[pos_key] = (m, pos)
+            cols += group_cols
+            # позиции неубывающие: первая строка, сматченная за пределами среза
+            a = min(a, int(np.searchsorted(pos, m)))
+        cols += [c for c in ["mom_30d", "above_200ma"] if c in ap.raw.columns]
+        if not for_signals:
+            cols.append("target")
+        cols = [c for c in ap.raw.columns if c in cols]
+
+        head = ap.ffilled.iloc[:a][cols]
+        if a < n:
+            tail = self._tail(ap, asset_key, cols, matched, a, n, horizon, for_signals)
+            seed = head.iloc[-1:]
+            tail = pd.concat([seed, tail]).ffill().iloc[len(seed):]
+            out = pd.concat([head, tail])
+        else:
+            tail = None
+            out = head
+
+        if not for_signals:
+            return out.fillna(0).reset_index(drop=True)
+
+        # dropna(how="all") после ffill снимает только ведущий блок строк без единого признака
+        k = n
+        for c in cols:
+            if c not in FEATURE_COLUMNS:
+                continue
+            fv = ap.first_valid[c]
+            if fv >= a and tail is not None:
+                valid = tail[c].notna().to_numpy()
+                fv = a + int(np.argmax(valid)) if valid.any() else n
+            k = min(k, fv)
+        return out.iloc[k:].reset_index(drop=True)
+
+    def _tail(self, ap: AssetPanel, asset_key: str, cols: List[str], matched, a: int, n: int, horizon: int, for_signals: bool) -> pd.DataFrame:
+        tail = ap.raw.iloc[a:n][cols].copy()
+        for pos_key, ds_template, group_cols in _GROUPS:
+            if pos_key not in matched:
+                continue
+            m, pos = matched[pos_key]
+            src = self.sources[ds_template.format(asset=asset_key)]
+            p = np.minimum(pos[a:n], m - 1)
+            if pos_key == "spx":
+                # rolling corr в pandas зависит от всей истории окна — пересчитываем по срезу целиком
+                aligned = src["close"].to_numpy()[np.minimum(pos, m - 1)]
+                close = ap.raw["close"].iloc[:n].reset_index(drop=True)
+                corr = close.rolling(60, min_periods=30).corr(pd.Series(aligned))
+                tail["spx_corr"] = corr.to_numpy()[a:n]
+                continue
+            for c in group_cols:
+                values = src[c].to_numpy()[np.maximum(p, 0)]
+                tail[c] = np.where(p >= 0, values, np.nan) if (p < 0).any() else values
+        if not for_signals:
+            target = ap.raw["target"].to_numpy()[a:n].copy()
+            target[np.arange(a, n) + horizon >= n] = np.nan
+            tail["target"] = target
+        return tail
+
+    # -------------
+    def save(self, directory: str | Path) -> None:
+        root = Path(directory)
+        tmp = root.with_name(f"{root.name}.{os.getpid()}.tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        meta = {"fingerprint": self.fingerprint, "assets": {}, "sources": {}}
+        for asset, ap in self.assets.items():
+            meta["assets"][asset] = {
+                "raw": export_frame(ap.raw, tmp, prefix=f"{asset}_raw_"),
+                "ffilled": export_frame(ap.ffilled, tmp, prefix=f"{asset}_ff_"),
+                "positions": export_frame(ap.positions, tmp, prefix=f"{asset}_pos_"),
+                "first_valid": ap.first_valid,
+            }
+        for key, df in self.sources.items():
+            meta["sources"][key] = export_frame(df, tmp, prefix=f"src_{key}_")
+        (tmp / _META).write_text(json.dumps(meta), encoding="utf-8")
+        shutil.rmtree(root, ignore_errors=True)
+        os.replace(tmp, root)
+
+    @classmethod
+    def load(cls, directory: str | Path) -> Optional["MarketPanel"]:
+        """Memory-maps a saved panel (None if absent or unreadable)."""
+        root = Path(directory)
+        try:
+            meta = json.loads((root / _META).read_text(encoding="utf-8"))
+            assets = {
+                asset: AssetPanel(
+                    raw=attach_frame(m["raw"], root),
+                    ffilled=attach_frame(m["ffilled"], root),
+                    positions=attach_frame(m["positions"], root),
+                    first_valid=m["first_valid"],
+                )
+                for asset, m in meta["assets"].items()
+            }
+            sources = {key: attach_frame(spec, root) for key, spec in meta["sources"].items()}
+        except (OSError, ValueError, KeyError) as e:
+            logger.debug("No usable saved panel in %s: %s", root, e)
+            return None
+        return cls(meta["fingerprint"], assets, sources)
+
+
+_PANELS: "OrderedDict[str, MarketPanel]" = OrderedDict()
+_MAX_PANELS = 2
+
+
+@traced("features.market_panel")
+def get_market_panel(dfs: Dict[str, pd.DataFrame]) -> Optional[MarketPanel]:
+    """
+    MarketPanel for the full datasets `dfs` (None if their dates do not allow slicing).
+    Cached per data version in memory and, with `panel.persist`, next to the processed data.
+    """
+    if not panel_supported(dfs):
+        return None
+    fp = data_fingerprint(dfs)
+    panel = _PANELS.get(fp)
+    if panel is not None:
+        _PANELS.move_to_end(fp)
+        return panel
+
+    s = get_settings()
+    path = Path(s.data_dir) / s.panel.dir
+    if s.panel.persist:
+        panel = MarketPanel.load(path)
+        if panel is not None and panel.fingerprint != fp:
+            panel = None
+    if panel is None:
+        panel = MarketPanel.build(dfs, fp)
+        if s.panel.persist:
+            try:
+                panel.save(path)
+            except OSError as e:
+                logger.warning("Failed to save market panel to %s: %s", path, e)
+
+    _PANELS[fp] = panel
+    while len(_PANELS) > _MAX_PANELS:
+        _PANELS.popitem(last=False)
+    return panel
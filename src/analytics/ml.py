@@ -1,15 +1,27 @@
 from __future__ import annotations
 
+import dataclasses
+import hashlib
+import json
 import logging
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
 
+import joblib
 import pandas as pd
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.model_selection import TimeSeriesSplit
 
 from src.config.settings import get_settings
+from src.services.signal_cache import dataset_digest
 
 logger = logging.getLogger(__name__)
 
+# Шаги walk-forward идут по датам подряд: в памяти хватает последних моделей каждого актива
+_MEMORY_ENTRIES = 4
+
 FEATURES = ["vix_dev", "cot_comm", "cot_large_inv", "mom_30d", "dxy_30d", "us10y_30d", "spx_corr", "above_200ma"]
 
 
@@ -28,9 +40,108 @@ def train_ml_model(df_features: pd.DataFrame) -> RandomForestRegressor:
         n_jobs=s.ml.n_jobs,
     )
 
+    # Каждый fit обучает лес с нуля, поэтому результат — модель последнего фолда TimeSeriesSplit.
+    # Промежуточные фолды не обучаем: итоговая модель идентична.
     tscv = TimeSeriesSplit(n_splits=s.ml.n_splits)
-    for train_idx, _val_idx in tscv.split(X):
-        # OPTIMIZED: .take обычно быстрее/дешевле .iloc на массиве индексов, поведение идентично (позиционное).
-        model.fit(X.take(train_idx), y.take(train_idx))
+    *_, (train_idx, _val_idx) = tscv.split(X)
+    model.fit(X.take(train_idx), y.take(train_idx))
+
+    return model
+
+
+def _config_hash() -> str:
+    s = get_settings()
+    payload = {"ml": dataclasses.asdict(s.ml), "features": FEATURES}
+    payload["ml"].pop("model_cache_dir", None)
+    raw = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()[:12]
+
+
+class WalkForwardModels:
+    """
+    Walk-forward model manager for the legacy ML factor.
+
+    Training cutoffs are snapped to a fixed grid of `retrain_every_days` days, so every step
+    whose training data ends inside the same grid cell reuses one model (trained on rows up to
+    the cell start). The last few models are kept in memory (LRU) and all are persisted to disk, keyed by asset,
+    cutoff date, a digest of the training rows and the config hash.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, retrain_every_days: Optional[int] = None):
+        s = get_settings()
+        self.cache_dir = Path(cache_dir if cache_dir is not None else s.ml.model_cache_dir)
+        self.retrain_every_days = int(retrain_every_days if retrain_every_days is not None else s.ml.retrain_every_days)
+        self._memory: "OrderedDict[str, RandomForestRegressor]" = OrderedDict()
+
+    def cutoff_for(self, last_date) -> pd.Timestamp:
+        ts = pd.Timestamp(last_date).normalize()
+        if self.retrain_every_days <= 0:
+            return ts
+        days = (ts - pd.Timestamp(0)).days
+        return ts - pd.Timedelta(days=days % self.retrain_every_days)
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.joblib"
+
+    def get_model(self, asset: str, train_df: pd.DataFrame) -> RandomForestRegressor:
+        if train_df.empty or "date" not in train_df.columns:
+            return train_ml_model(train_df)
+
+        cutoff = self.cutoff_for(train_df["date"].iloc[-1])
+        train = train_df[pd.to_datetime(train_df["date"]) <= cutoff]
+        # Дайджест строк обучения: пересмотренные бары или чужие данные с тем же активом не берут старую модель
+        digest = dataset_digest(train, ["date", *FEATURES, "target"])[:12]
+        key = f"{asset.lower()}_{cutoff:%Y%m%d}_{digest}_{_config_hash()}"
+
+        model = self._memory.get(key)
+        if model is not None:
+            self._memory.move_to_end(key)
+            return model
+
+        path = self._path(key)
+        if path.exists():
+            try:
+                model = joblib.load(path)
+                self._remember(key, model)
+                logger.debug("Loaded walk-forward model %s", path)
+                return model
+            except Exception as e:
+                logger.warning("Failed to load cached model %s: %s", path, e)
+
+        model = train_ml_model(train)
+        self._remember(key, model)
+        if hasattr(model, "estimators_"):
+            self._save(model, path)
+        return model
+
+    def _remember(self, key: str, model: RandomForestRegressor) -> None:
+        self._memory[key] = model
+        self._memory.move_to_end(key)
+        while len(self._memory) > _MEMORY_ENTRIES:
+            self._memory.popitem(last=False)
+
+    def _save(self, model: RandomForestRegressor, path: Path) -> None:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            joblib.dump(model, tmp, compress=3)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning("Failed to persist model %s: %s", path, e)
+
+    def clear(self, disk: bool = False) -> None:
+        self._memory.clear()
+        if disk and self.cache_dir.exists():
+            for p in self.cache_dir.glob("*.joblib"):
+                p.unlink(missing_ok=True)
+
+
+_MODELS: WalkForwardModels | None = None
+
 
-    return model
\ No newline at end of file
+def get_model_cache() -> WalkForwardModels:
+    global _MODELS
+    ml = get_settings().ml
+    if _MODELS is None or _MODELS.cache_dir != Path(ml.model_cache_dir) or _MODELS.retrain_every_days != int(ml.retrain_every_days):
+        _MODELS = WalkForwardModels()
+    return _MODELS
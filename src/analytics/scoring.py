@@ -4,13 +4,23 @@ from __future__ import annotations
 from typing import Dict, Tuple
 
 from src.config.settings import get_settings
+from src.services.tracing import trace
 import logging
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-fh = logging.FileHandler('app.log', encoding='utf-8')
-fh.setLevel(logging.DEBUG)
-logger.addHandler(fh)
+
+
+# Тексты веток vix_score в порядке проверки (последний — нейтральная зона); по индексу ветки
+# их же берут векторный движок и таймлайн Conclusion.
+VIX_RATIONALES = (
+    "VIX ≥ +3σ → ЭКСТРЕМАЛЬНОЕ ДНО! Максимальная закупка в спот. Ожидаем мощнейшего отскока BTC (импульс VIX → симметричный рост актива)",
+    "VIX ≥ +2σ → Актив на дне! Закупаемся в спот (Buy the fear). При падении VIX BTC вырастет примерно в той же пропорции",
+    "VIX ≥ +1σ → Страх нарастает → умеренная покупка спота",
+    "VIX ≤ -3σ → Сверхкомплаенс → максимальная продажа / выход в кеш",
+    "VIX ≤ -2σ → Комплаенс на максимуме → сильная продажа / не держать",
+    "VIX ≤ -1σ → Комплаенс → умеренная продажа",
+    "VIX neutral (±1σ) — ждём движения",
+)
 
 
 def vix_score(dev_pct: float, levels: Dict[str, float]) -> Tuple[float, str]:
@@ -20,31 +30,31 @@ def vix_score(dev_pct: float, levels: Dict[str, float]) -> Tuple[float, str]:
     -3σ / -2σ = комплаенс на максимуме → сильная продажа"""
     s = get_settings().scoring
 
-    logger.debug(f"VIX dev_pct: {dev_pct}, levels: {levels}")
+    trace("scoring", "VIX dev_pct: %s, levels: %s", dev_pct, levels)
 
     if dev_pct >= levels.get("+3σ", 999):
         score = 1000  # чтобы гарантированно сработал Bullish
-        text = "VIX ≥ +3σ → ЭКСТРЕМАЛЬНОЕ ДНО! Максимальная закупка в спот. Ожидаем мощнейшего отскока BTC (импульс VIX → симметричный рост актива)"
+        text = VIX_RATIONALES[0]
     elif dev_pct >= levels.get("+2σ", 999):
         score = s.vix_strong_risk_on_score
-        text = "VIX ≥ +2σ → Актив на дне! Закупаемся в спот (Buy the fear). При падении VIX BTC вырастет примерно в той же пропорции"
+        text = VIX_RATIONALES[1]
     elif dev_pct >= levels.get("+1σ", 999):
         score = s.vix_risk_on_score
-        text = "VIX ≥ +1σ → Страх нарастает → умеренная покупка спота"
+        text = VIX_RATIONALES[2]
     elif dev_pct <= levels.get("-3σ", -999):
         score = -1000  # чтобы гарантированно сработал Bearish
-        text = "VIX ≤ -3σ → Сверхкомплаенс → максимальная продажа / выход в кеш"
+        text = VIX_RATIONALES[3]
     elif dev_pct <= levels.get("-2σ", -999):
         score = s.vix_strong_risk_off_score
-        text = "VIX ≤ -2σ → Комплаенс на максимуме → сильная продажа / не держать"
+        text = VIX_RATIONALES[4]
     elif dev_pct <= levels.get("-1σ", -999):
         score = s.vix_risk_off_score
-        text = "VIX ≤ -1σ → Комплаенс → умеренная продажа"
+        text = VIX_RATIONALES[5]
     else:
         score = 0.0
-        text = "VIX neutral (±1σ) — ждём движения"
+        text = VIX_RATIONALES[6]
 
-    logger.debug(f"VIX score: {score}, text: {text}")
+    trace("scoring", "VIX score: %s, text: %s", score, text)
     return score, text
 
 
@@ -2,22 +2,28 @@
 from __future__ import annotations
 
 import logging
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple
 
 import pandas as pd
 import numpy as np
 
 from src.analytics.statistics import get_deviation_levels
+from src.analytics.compass_engine import SIGNAL_COLUMNS as COMPASS_SIGNAL_COLUMNS
+from src.analytics.compass_engine import (
+    build_compass_inputs,
+    fast_path_supported,
+    generate_signals_vectorized,
+    score_compass_inputs,
+)
 from src.analytics.features import build_features
+from src.analytics.market_panel import get_market_panel
 from src.analytics.scoring import vix_score
 from src.analytics.statistics import calculate_cot_composite, get_quantile_thresholds
 from src.config.settings import get_settings
+from src.services.signal_cache import cached_signals
+from src.services.tracing import trace, traced
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-fh = logging.FileHandler('app.log', encoding='utf-8')
-fh.setLevel(logging.DEBUG)
-logger.addHandler(fh)
 
 
 # -------------------------
@@ -57,29 +63,29 @@ def _compass_confidence(df_feat: pd.DataFrame, required_cols: list[str], min_row
     return float(max(0.0, min(1.0, conf)))
 
 
-# src/analytics/signal_generator.py (modified function _score_asset_compass)
-def _score_asset_compass(asset: str, dfs: Dict[str, pd.DataFrame]) -> Tuple[pd.DataFrame, float, str, float, str]:
+@traced("signals.score_compass")
+def _score_asset_compass(asset: str, dfs: Dict[str, pd.DataFrame], panel=None) -> Tuple[pd.DataFrame, float, str, float, str]:
     """
     Returns:
     (df_table, total, verdict, confidence, narrative)
     """
-    logger.debug(f"Scoring asset {asset}")
-    logger.debug(f"dfs keys in score: {list(dfs.keys())}")
+    trace("signals", "Scoring asset %s", asset)
+    trace("signals", "dfs keys in score: %s", lambda: list(dfs.keys()))
 
     s = get_settings()
     sc = s.scoring
 
-    df_feat = build_features(dfs, asset, for_signals=True)
+    df_feat = build_features(dfs, asset, for_signals=True, panel=panel)
     if df_feat.empty or len(df_feat) < s.signals.min_feature_rows:
         logger.warning(f"No sufficient features for {asset}")
         empty_table = pd.DataFrame([["No data", 0.0, "Insufficient price or feature data"]], 
                                    columns=["Factor", "Score", "Rationale"])
         return empty_table, 0.0, "No data", 0.0, ""
 
-    logger.debug(f"Features df in score: {df_feat.shape}")
+    trace("signals", "Features df in score: %s", df_feat.shape)
 
     latest = df_feat.iloc[-1]
-    logger.debug(f"Latest features: {latest.to_dict()}")
+    trace("signals", "Latest features: %s", lambda: latest.to_dict())
 
     rows: list[tuple[str, float, str]] = []
 
@@ -121,7 +127,7 @@ def _score_asset_compass(asset: str, dfs: Dict[str, pd.DataFrame]) -> Tuple[pd.D
                         _safe_float(latest.get("z_comm"), default=0.0),
                         cot_thresh,
                     )
-                    rows.append(("COT Composite", float(cot_score), cot_text))
+                    rows.append(("COT Composite", float(cot_score) * sc.cot_weight, cot_text))
 
     # ==================== ГАРАНТИЯ (никогда не пустая таблица) ====================
     if not rows:
@@ -139,71 +145,84 @@ def _score_asset_compass(asset: str, dfs: Dict[str, pd.DataFrame]) -> Tuple[pd.D
     if confidence <= 0.01:
         verdict = "No data"
 
-    # Narrative
+    return df_table, round(total, 2), verdict, confidence, _compass_narrative(df_table)
+
+
+def _compass_narrative(df_table: pd.DataFrame) -> str:
     narrative_parts: list[str] = []
     for _, r in df_table.iterrows():
         narrative_parts.append(f"- **{r['Factor']}**: {r['Rationale']} (score {float(r['Score']):+.2f})")
-    narrative = "\n".join(narrative_parts) if narrative_parts else ""
+    return "\n".join(narrative_parts) if narrative_parts else ""
 
-    return df_table, round(total, 2), verdict, confidence, narrative
 
+def _score_assets(dfs: Dict[str, pd.DataFrame], assets: list[str]) -> dict:
+    """
+    score_asset for every asset: asset -> result tuple or the raised exception.
+    With parallel.workers > 1 the assets are scored in the process pool.
+    """
+    if get_settings().parallel.workers > 1:
+        from src.services.parallel import score_assets_parallel
 
-def _generate_conclusion_compass(dfs: Dict[str, pd.DataFrame]):
-    logger.debug("Generating compass conclusion")
-    per_asset: dict[str, tuple[pd.DataFrame, float, str, float, str]] = {}
-    valid_totals: list[float] = []
-    narratives: list[str] = []
+        return score_assets_parallel(dfs, assets)
 
-    for asset in ["BTC", "ETH"]:
+    out: dict = {}
+    for asset in assets:
         try:
-            df_table, total, verdict, conf, narrative = _score_asset_compass(asset, dfs)
-            per_asset[asset] = (df_table, total, verdict, conf, narrative)
-            if verdict != "No data":
-                valid_totals.append(float(total))
-            if narrative:
-                narratives.append(f"### {asset}\n{narrative}")
+            out[asset] = score_asset(asset, dfs)
         except Exception as e:
-            logger.exception("Compass score_asset failed for %s: %s", asset, e)
+            out[asset] = e
+    return out
+
+
+def _generate_conclusion_compass(dfs: Dict[str, pd.DataFrame]):
+    trace("signals", "Generating compass conclusion")
+    per_asset: dict[str, tuple[pd.DataFrame, float, str, float, str]] = {}
+    for asset, res in _score_assets(dfs, ["BTC", "ETH"]).items():
+        if isinstance(res, Exception):
+            logger.error("Compass score_asset failed for %s: %s", asset, res, exc_info=res)
             per_asset[asset] = (pd.DataFrame(), 0.0, "Neutral", 0.0, "")
+            continue
+        per_asset[asset] = res
+    return (per_asset, *_combine_compass(per_asset))
+
+
+def _combine_compass(per_asset: dict[str, tuple[pd.DataFrame, float, str, float, str]]) -> tuple[float, str, str]:
+    """(combined score, verdict, narrative) of the per-asset Compass results."""
+    valid_totals: list[float] = []
+    narratives: list[str] = []
+    for asset, (_table, total, verdict, _conf, narrative) in per_asset.items():
+        if verdict != "No data":
+            valid_totals.append(float(total))
+        if narrative:
+            narratives.append(f"### {asset}\n{narrative}")
 
     combined_score = sum(valid_totals) / len(valid_totals) if valid_totals else 0.0
     combined_score = round(float(combined_score), 2)
     combined_verdict = _compass_verdict(combined_score)
-    logger.debug(f"Combined score: {combined_score}, verdict: {combined_verdict}")
+    trace("signals", "Combined score: %s, verdict: %s", combined_score, combined_verdict)
 
     combined_narrative = "\n\n".join(narratives)
     if combined_narrative:
         combined_narrative = f"## Market narrative\n\n{combined_narrative}"
-    logger.debug(f"Combined narrative: {combined_narrative}")
+    trace("signals", "Combined narrative: %s", combined_narrative)
 
-    return per_asset, combined_score, combined_verdict, combined_narrative
+    return combined_score, combined_verdict, combined_narrative
 
 
-def _generate_signals_compass(dfs_full: Dict[str, pd.DataFrame], asset: str = "BTC") -> pd.DataFrame:
-    logger.debug(f"Generating compass signals for {asset}")
-    s = get_settings()
-    sig = s.signals
-    asset_key = asset.lower()
-    df_price = dfs_full.get(asset_key)
-    if df_price is None or len(df_price) < sig.min_price_rows:
-        logger.warning(f"No price data for signals {asset}")
-        return pd.DataFrame(columns=["date", "total_score", "verdict", "position", "confidence"])
+# ---------------------------------
+# Step loop (shared by both stacks)
+# ---------------------------------
+def _signal_price_frame(dfs_full: Dict[str, pd.DataFrame], asset: str) -> pd.DataFrame | None:
+    df_price = dfs_full.get(asset.lower())
+    if df_price is None or len(df_price) < get_settings().signals.min_price_rows:
+        return None
 
     df_price = df_price.copy()
     df_price["date"] = pd.to_datetime(df_price["date"]).dt.normalize()
-    df_price = df_price.sort_values("date").reset_index(drop=True)
-    logger.debug(f"Price for signals shape: {df_price.shape}")
+    return df_price.sort_values("date").reset_index(drop=True)
 
-    # FIX: В Compass mode игнорируем start_fraction, чтобы генерировать сигналы с начала (min_start_bars ~1)
-    if s.compass_mode:
-        start_i = sig.min_start_bars
-    else:
-        start_i = max(sig.min_start_bars, int(len(df_price) * sig.start_fraction))
-    
-    step = int(sig.step_days)
-    results = []
 
-    # slice plan (fast) — остальное без изменений
+def _build_slice_plan(dfs_full: Dict[str, pd.DataFrame]) -> dict:
     slice_plan = {}
     for k, v in dfs_full.items():
         if v is None or v.empty:
@@ -213,26 +232,52 @@ def _generate_signals_compass(dfs_full: Dict[str, pd.DataFrame], asset: str = "B
         fast = pd.api.types.is_datetime64_any_dtype(date_col) and getattr(date_col, "is_monotonic_increasing", False)
         date_values = date_col.to_numpy() if fast else None
         slice_plan[k] = (v, date_values, fast)
+    return slice_plan
 
+
+def _slice_at(slice_plan: dict, current_date: pd.Timestamp) -> Dict[str, pd.DataFrame]:
+    cur64 = current_date.to_datetime64()
     sliced: Dict[str, pd.DataFrame] = {}
+    for k, (v, date_values, fast) in slice_plan.items():
+        if v is None:
+            sliced[k] = pd.DataFrame()
+        elif fast:
+            sliced[k] = v.iloc[: date_values.searchsorted(cur64, side="right")]
+        else:
+            sliced[k] = v[v["date"] <= current_date]
+        trace("signals", "Sliced %s shape: %s", k, lambda: sliced[k].shape)
+    return sliced
+
+
+def _compass_positions(df_price: pd.DataFrame) -> range:
+    s = get_settings()
+    sig = s.signals
+    # FIX: В Compass mode игнорируем start_fraction, чтобы генерировать сигналы с начала (min_start_bars ~1)
+    if s.compass_mode:
+        start_i = sig.min_start_bars
+    else:
+        start_i = max(sig.min_start_bars, int(len(df_price) * sig.start_fraction))
+    return range(start_i, len(df_price), int(sig.step_days))
 
-    for i in range(start_i, len(df_price), step):
+
+def _compass_signal_rows(dfs_full: Dict[str, pd.DataFrame], asset: str, positions=None) -> list[dict]:
+    df_price = _signal_price_frame(dfs_full, asset)
+    if df_price is None:
+        return []
+    trace("signals", "Price for signals shape: %s", df_price.shape)
+
+    if positions is None:
+        positions = _compass_positions(df_price)
+    slice_plan = _build_slice_plan(dfs_full)
+    panel = get_market_panel(dfs_full)
+
+    results = []
+    for i in positions:
         current_date = df_price.loc[i, "date"]
-        logger.debug(f"Processing date {current_date}")
-        cur64 = current_date.to_datetime64()
-
-        for k, (v, date_values, fast) in slice_plan.items():
-            if v is None:
-                sliced[k] = pd.DataFrame()
-                continue
-            if fast:
-                pos = date_values.searchsorted(cur64, side="right")
-                sliced[k] = v.iloc[:pos]
-            else:
-                sliced[k] = v[v["date"] <= current_date]
-            logger.debug(f"Sliced {k} shape: {sliced[k].shape}")
+        trace("signals", "Processing date %s", current_date)
+        sliced = _slice_at(slice_plan, current_date)
 
-        table, total, verdict, conf, _narr = _score_asset_compass(asset, sliced)
+        table, total, verdict, conf, _narr = _score_asset_compass(asset, sliced, panel=panel)
 
         position = 1 if verdict == "Bullish Trend" else 0
         row = {
@@ -245,28 +290,55 @@ def _generate_signals_compass(dfs_full: Dict[str, pd.DataFrame], asset: str = "B
         if not table.empty:
             row.update(dict(zip(table["Factor"].tolist(), table["Score"].tolist())))
         results.append(row)
-        logger.debug(f"Signal row: {row}")
+        trace("signals", "Signal row: %s", row)
+    return results
+
 
+def _signals_frame(results: list[dict], empty_columns: list[str]) -> pd.DataFrame:
     if not results:
-        logger.warning("No signals generated")
-        return pd.DataFrame(columns=["date", "total_score", "verdict", "position", "confidence"])
+        return pd.DataFrame(columns=empty_columns)
 
     df_signals = pd.DataFrame(results).sort_values("date").reset_index(drop=True)
     df_signals["date"] = pd.to_datetime(df_signals["date"]).dt.normalize()
-    logger.debug(f"Signals df: {df_signals.to_dict()}")
+    return df_signals
+
 
+def _generate_signals_compass(dfs_full: Dict[str, pd.DataFrame], asset: str = "BTC") -> pd.DataFrame:
+    trace("signals", "Generating compass signals for %s", asset)
+    s = get_settings()
+    df_price = dfs_full.get(asset.lower())
+    if df_price is None or len(df_price) < s.signals.min_price_rows:
+        logger.warning(f"No price data for signals {asset}")
+        return pd.DataFrame(columns=COMPASS_SIGNAL_COLUMNS)
+
+    if s.signals.engine == "vectorized":
+        df_signals = generate_signals_vectorized(dfs_full, asset=asset)
+        if df_signals is not None:
+            return df_signals
+
+    return _generate_signals_compass_loop(dfs_full, asset=asset)
+
+
+def _generate_signals_compass_loop(dfs_full: Dict[str, pd.DataFrame], asset: str = "BTC") -> pd.DataFrame:
+    """Reference per-step implementation (signals.engine: loop); the vectorized engine must match it row-for-row."""
+    results = _compass_signal_rows(dfs_full, asset)
+    if not results:
+        logger.warning("No signals generated")
+    df_signals = _signals_frame(results, COMPASS_SIGNAL_COLUMNS)
+    trace("signals", "Signals df: %s", lambda: df_signals.to_dict())
     return df_signals
 
 
 # -----------------------------
 # Legacy hybrid stack (Scalpel)
 # -----------------------------
-def _score_asset_legacy(asset: str, dfs: Dict[str, pd.DataFrame]) -> Tuple[pd.DataFrame, float, str, float]:
+@traced("signals.score_legacy")
+def _score_asset_legacy(asset: str, dfs: Dict[str, pd.DataFrame], panel=None) -> Tuple[pd.DataFrame, float, str, float]:
     """
     Original implementation kept for backward compatibility.
     Imports are local to keep Compass mode lightweight.
     """
-    from src.analytics.ml import FEATURES, train_ml_model
+    from src.analytics.ml import FEATURES, get_model_cache
     from src.analytics.scoring import (
         apply_trend_filter,
         corr_penalty,
@@ -278,7 +350,7 @@ def _score_asset_legacy(asset: str, dfs: Dict[str, pd.DataFrame]) -> Tuple[pd.Da
     s = get_settings()
     sc = s.scoring
 
-    df_all = build_features(dfs, asset, for_signals=False)
+    df_all = build_features(dfs, asset, for_signals=False, panel=panel)
     if df_all.empty or len(df_all) < s.signals.min_feature_rows:
         return pd.DataFrame(), 0.0, "No data", 0.0
 
@@ -293,7 +365,7 @@ def _score_asset_legacy(asset: str, dfs: Dict[str, pd.DataFrame]) -> Tuple[pd.Da
     rows = []
 
     if sc.ml_enabled:
-        model = train_ml_model(train_df)
+        model = get_model_cache().get_model(asset, train_df)
         latest_row = latest.reindex(FEATURES).astype(float)
         try:
             predicted_return = float(model.predict(pd.DataFrame([latest_row]))[0])
@@ -356,12 +428,12 @@ def _score_asset_legacy(asset: str, dfs: Dict[str, pd.DataFrame]) -> Tuple[pd.Da
 
 def _generate_conclusion_legacy(dfs: Dict[str, pd.DataFrame]):
     per_asset = {}
-    for asset in ["BTC", "ETH"]:
-        try:
-            per_asset[asset] = _score_asset_legacy(asset, dfs)
-        except Exception as e:
-            logger.exception("score_asset failed for %s: %s", asset, e)
+    for asset, res in _score_assets(dfs, ["BTC", "ETH"]).items():
+        if isinstance(res, Exception):
+            logger.error("score_asset failed for %s: %s", asset, res, exc_info=res)
             per_asset[asset] = (pd.DataFrame(), 0.0, "Neutral", 0.0)
+        else:
+            per_asset[asset] = res
 
     combined = (per_asset["BTC"][1] + per_asset["ETH"][1]) / 2
     combined_verdict = (
@@ -378,49 +450,33 @@ def _generate_conclusion_legacy(dfs: Dict[str, pd.DataFrame]):
     return per_asset, round(combined, 2), combined_verdict
 
 
-def _generate_signals_legacy(dfs_full: Dict[str, pd.DataFrame], asset: str = "BTC") -> pd.DataFrame:
-    s = get_settings()
-    sig = s.signals
-    asset_key = asset.lower()
-    df_price = dfs_full.get(asset_key)
-    if df_price is None or len(df_price) < sig.min_price_rows:
-        return pd.DataFrame(columns=["date", "total_score", "verdict", "signal", "confidence"])
+LEGACY_SIGNAL_COLUMNS = ["date", "total_score", "verdict", "signal", "confidence"]
 
-    df_price = df_price.copy()
-    df_price["date"] = pd.to_datetime(df_price["date"]).dt.normalize()
-    df_price = df_price.sort_values("date").reset_index(drop=True)
 
+def _legacy_positions(df_price: pd.DataFrame) -> range:
+    sig = get_settings().signals
     start_i = max(sig.min_start_bars, int(len(df_price) * sig.start_fraction))
     step = int(sig.step_days)
-    results = []
+    return range(start_i, len(df_price) - step, step)
 
-    slice_plan = {}
-    for k, v in dfs_full.items():
-        if v is None or v.empty:
-            slice_plan[k] = (None, None, False)
-            continue
-        date_col = v["date"]
-        fast = pd.api.types.is_datetime64_any_dtype(date_col) and getattr(date_col, "is_monotonic_increasing", False)
-        date_values = date_col.to_numpy() if fast else None
-        slice_plan[k] = (v, date_values, fast)
 
-    sliced: Dict[str, pd.DataFrame] = {}
+def _legacy_signal_rows(dfs_full: Dict[str, pd.DataFrame], asset: str, positions=None) -> list[dict]:
+    sig = get_settings().signals
+    df_price = _signal_price_frame(dfs_full, asset)
+    if df_price is None:
+        return []
 
-    for i in range(start_i, len(df_price) - step, step):
+    if positions is None:
+        positions = _legacy_positions(df_price)
+    slice_plan = _build_slice_plan(dfs_full)
+    panel = get_market_panel(dfs_full)
+
+    results = []
+    for i in positions:
         current_date = df_price.loc[i, "date"]
-        cur64 = current_date.to_datetime64()
-
-        for k, (v, date_values, fast) in slice_plan.items():
-            if v is None:
-                sliced[k] = pd.DataFrame()
-                continue
-            if fast:
-                pos = date_values.searchsorted(cur64, side="right")
-                sliced[k] = v.iloc[:pos]
-            else:
-                sliced[k] = v[v["date"] <= current_date]
+        sliced = _slice_at(slice_plan, current_date)
 
-        table, total, verdict, conf = _score_asset_legacy(asset, sliced)
+        table, total, verdict, conf = _score_asset_legacy(asset, sliced, panel=panel)
 
         vix_df = sliced.get("vix", pd.DataFrame())
         latest_vix = float(vix_df["deviation_pct"].iloc[-1]) if not vix_df.empty and "deviation_pct" in vix_df.columns else 0.0
@@ -438,13 +494,11 @@ def _generate_signals_legacy(dfs_full: Dict[str, pd.DataFrame], asset: str = "BT
         if not table.empty:
             row.update(dict(zip(table["Factor"].tolist(), table["Score"].tolist())))
         results.append(row)
+    return results
 
-    if not results:
-        return pd.DataFrame(columns=["date", "total_score", "verdict", "signal", "confidence"])
 
-    df_signals = pd.DataFrame(results).sort_values("date").reset_index(drop=True)
-    df_signals["date"] = pd.to_datetime(df_signals["date"]).dt.normalize()
-    return df_signals
+def _generate_signals_legacy(dfs_full: Dict[str, pd.DataFrame], asset: str = "BTC") -> pd.DataFrame:
+    return _signals_frame(_legacy_signal_rows(dfs_full, asset), LEGACY_SIGNAL_COLUMNS)
 
 
 # -----------------
@@ -457,17 +511,93 @@ def score_asset(asset: str, dfs: Dict[str, pd.DataFrame]):
     return _score_asset_legacy(asset, dfs)
 
 
+@traced("signals.generate_conclusion")
 def generate_conclusion(dfs: Dict[str, pd.DataFrame]):
-    logger.debug("Starting generate_conclusion")
+    trace("signals", "Starting generate_conclusion")
     s = get_settings()
     if s.compass_mode:
         return _generate_conclusion_compass(dfs)
     return _generate_conclusion_legacy(dfs)
 
 
+def uses_step_loop(dfs_full: Dict[str, pd.DataFrame], asset: str) -> bool:
+    """True when signals for `asset` come from the per-step loop (legacy stack or Compass reference engine)."""
+    s = get_settings()
+    if not s.compass_mode:
+        return True
+    return s.signals.engine != "vectorized" or not fast_path_supported(dfs_full, asset)
+
+
+def signal_step_positions(dfs_full: Dict[str, pd.DataFrame], asset: str) -> range:
+    """Positions (rows of the normalized price frame) evaluated by the step loop."""
+    df_price = _signal_price_frame(dfs_full, asset)
+    if df_price is None:
+        return range(0)
+    if get_settings().compass_mode:
+        return _compass_positions(df_price)
+    return _legacy_positions(df_price)
+
+
+def signal_rows(dfs_full: Dict[str, pd.DataFrame], asset: str, positions=None) -> list[dict]:
+    """Raw signal rows of the step loop for a subset of positions (used by parallel chunks)."""
+    if get_settings().compass_mode:
+        return _compass_signal_rows(dfs_full, asset, positions)
+    return _legacy_signal_rows(dfs_full, asset, positions)
+
+
+def signals_frame(results: list[dict]) -> pd.DataFrame:
+    """Assembles signal rows exactly like the serial loop does."""
+    columns = COMPASS_SIGNAL_COLUMNS if get_settings().compass_mode else LEGACY_SIGNAL_COLUMNS
+    return _signals_frame(results, columns)
+
+
+@traced("signals.generate_signals")
 def generate_signals(dfs_full: Dict[str, pd.DataFrame], asset: str = "BTC") -> pd.DataFrame:
-    logger.debug(f"Starting generate_signals for {asset}")
+    trace("signals", "Starting generate_signals for %s", asset)
+    return cached_signals(dfs_full, asset, lambda: _generate_signals(dfs_full, asset))
+
+
+def _generate_signals(dfs_full: Dict[str, pd.DataFrame], asset: str) -> pd.DataFrame:
     s = get_settings()
+    if s.parallel.workers > 1 and uses_step_loop(dfs_full, asset):
+        from src.services.parallel import generate_signals_parallel
+
+        return generate_signals_parallel(dfs_full, asset)
     if s.compass_mode:
         return _generate_signals_compass(dfs_full, asset=asset)
-    return _generate_signals_legacy(dfs_full, asset=asset)
\ No newline at end of file
+    return _generate_signals_legacy(dfs_full, asset=asset)
+
+
+def extend_signals(dfs_full: Dict[str, pd.DataFrame], asset: str, previous: Optional[pd.DataFrame], since) -> pd.DataFrame:
+    """
+    generate_signals after the inputs changed from `since` on (data_loader.earliest_change): the rows of
+    `previous` (signals of the earlier data) dated before it are kept — a step row sees only data up to
+    its date — and only the later step dates are scored. Goes through the signal cache like generate_signals.
+    """
+    if previous is None or since is None:
+        return generate_signals(dfs_full, asset)
+    return cached_signals(dfs_full, asset, lambda: _extend_signals(dfs_full, asset, previous, pd.Timestamp(since).normalize()))
+
+
+def _extend_signals(dfs_full: Dict[str, pd.DataFrame], asset: str, previous: pd.DataFrame, since: pd.Timestamp) -> pd.DataFrame:
+    df_price = _signal_price_frame(dfs_full, asset)
+    if df_price is None:
+        return _generate_signals(dfs_full, asset)
+    positions = list(signal_step_positions(dfs_full, asset))
+    step_dates = df_price["date"].iloc[positions].reset_index(drop=True)
+    is_new = (step_dates >= since).to_numpy()
+
+    kept = previous[previous["date"] < since]
+    # Шаги считаются от начала ряда (legacy — от доли длины): если старые даты шагов сдвинулись, считаем заново
+    if not np.array_equal(kept["date"].to_numpy(), step_dates[~is_new].to_numpy()):
+        return _generate_signals(dfs_full, asset)
+    if not is_new.any():
+        return kept.reset_index(drop=True)
+
+    if uses_step_loop(dfs_full, asset):
+        fresh = signals_frame(signal_rows(dfs_full, asset, [p for p, new in zip(positions, is_new) if new]))
+    else:
+        fresh = score_compass_inputs(build_compass_inputs(dfs_full, asset, dates=step_dates[is_new]))
+        fresh["date"] = pd.to_datetime(fresh["date"]).dt.normalize()
+    trace("signals", "Extended %s signals: %d kept, %d scored from %s", asset, len(kept), len(fresh), since)
+    return pd.concat([kept, fresh], ignore_index=True)
@@ -1,17 +1,18 @@
 # src/analytics/statistics.py
 from __future__ import annotations
 
-from typing import Dict, Iterable, Optional, Tuple
+import math
+from bisect import bisect_left, insort
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
 import logging
 
+from src.services.tracing import trace
+
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-fh = logging.FileHandler('app.log', encoding='utf-8')
-fh.setLevel(logging.DEBUG)
-logger.addHandler(fh)
 
 
 def add_vix_deviation_indicators(
@@ -48,7 +49,7 @@ def get_deviation_levels(
     for s in sigma_levels:
         levels[f"+{s}σ"] = mean + s * std
         levels[f"-{s}σ"] = mean - s * std
-    logger.debug(f"Deviation levels for {col}: {levels}")
+    trace("statistics", "Deviation levels for %s: %s", col, levels)
 
     return levels
 
@@ -71,6 +72,65 @@ def get_quantile_thresholds(series: pd.Series, window: int = 504) -> Optional[Di
     }
 
 
+QUANTILE_LEVELS: Dict[str, float] = {"p5": 0.05, "p10": 0.10, "p90": 0.90, "p95": 0.95}
+
+
+class RollingQuantileWindow:
+    """
+    Sorted sliding window over the last `window` values: bisect insert/evict,
+    order statistics by index. Quantiles use numpy's "linear" method bit-for-bit,
+    so results equal Series.quantile on the same window.
+    """
+
+    def __init__(self, window: int):
+        self.window = int(window)
+        self._fifo: deque = deque()
+        self._sorted: List[float] = []
+
+    def __len__(self) -> int:
+        return len(self._sorted)
+
+    def push(self, value: float) -> None:
+        insort(self._sorted, value)
+        self._fifo.append(value)
+        if len(self._fifo) > self.window:
+            old = self._fifo.popleft()
+            del self._sorted[bisect_left(self._sorted, old)]
+
+    def quantile(self, q: float) -> float:
+        # numpy _quantile(method="linear"): virtual index (n-1)*q + _lerp
+        n = len(self._sorted)
+        virtual = (n - 1) * q
+        if virtual >= n - 1:
+            return self._sorted[-1]
+        lo = math.floor(virtual)
+        t = virtual - lo
+        a, b = self._sorted[lo], self._sorted[lo + 1]
+        diff = b - a
+        if t >= 0.5:
+            return b - diff * (1 - t)
+        return a + diff * t
+
+
+def rolling_quantile_thresholds(series: pd.Series, window: int = 504) -> pd.DataFrame:
+    """
+    get_quantile_thresholds for every prefix of `series` in one pass:
+    row i equals get_quantile_thresholds(series.iloc[:i + 1], window) (NaN where it would be None).
+    """
+    values = pd.to_numeric(series, errors="coerce").to_numpy(dtype=float)
+    out = np.full((len(values), len(QUANTILE_LEVELS)), np.nan)
+    rq = RollingQuantileWindow(window)
+    qs = list(QUANTILE_LEVELS.values())
+    last: Optional[List[float]] = None
+    for i, v in enumerate(values):
+        if not math.isnan(v):
+            rq.push(float(v))
+            last = [round(rq.quantile(q), 2) for q in qs]
+        if last is not None:
+            out[i] = last
+    return pd.DataFrame(out, index=series.index, columns=list(QUANTILE_LEVELS))
+
+
 def calculate_z_score(
     df: pd.DataFrame,
     column: str = "Comm_Net", # ← ИЗМЕНЕНО: теперь Commercial
@@ -86,6 +146,24 @@ def calculate_z_score(
     return df.reset_index(drop=True)
 
 
+# Части текста COT Composite по веткам (-1 — ветка не сработала).
+COT_COMM_PARTS = ("Comm ≥95p → Strong Bull", "Comm ≥90p → Bull", "Comm ≤5p/≤0 → Strong Bear", "Comm ≤10p → Bear")
+COT_LARGE_NOTE = "LargeInv ≤5p (note)"
+COT_Z_PARTS = ("Comm Z ≥3.0 → Strong Bull boost", "Comm Z ≤-3.0 → Strong Bear penalty")
+
+
+def cot_rationale(comm_branch: int, large_note: bool, z_branch: int) -> str:
+    """Text of calculate_cot_composite for the given branches."""
+    parts: list[str] = []
+    if comm_branch >= 0:
+        parts.append(COT_COMM_PARTS[comm_branch])
+    if large_note:
+        parts.append(COT_LARGE_NOTE)
+    if z_branch >= 0:
+        parts.append(COT_Z_PARTS[z_branch])
+    return " | ".join(parts) if parts else "COT neutral"
+
+
 def calculate_cot_composite(
     comm_idx: float,
     large_inv_idx: float,
@@ -94,36 +172,33 @@ def calculate_cot_composite(
 ) -> tuple[float, str]:
     """COT Composite с Z-score коммерсантов (высокий Z = bullish)."""
     score = 0.0
-    parts: list[str] = []
+    comm_branch = z_branch = -1
 
     # Commercial Index
     if comm_idx >= thresholds["p95"]:
         score += 2.2
-        parts.append("Comm ≥95p → Strong Bull")
+        comm_branch = 0
     elif comm_idx >= thresholds["p90"]:
         score += 1.3
-        parts.append("Comm ≥90p → Bull")
+        comm_branch = 1
     elif comm_idx <= thresholds["p5"] or comm_idx <= 0:
         score -= 2.2
-        parts.append("Comm ≤5p/≤0 → Strong Bear")
+        comm_branch = 2
     elif comm_idx <= thresholds["p10"]:
         score -= 1.3
-        parts.append("Comm ≤10p → Bear")
-
-    if large_inv_idx <= thresholds["p5"]:
-        parts.append("LargeInv ≤5p (note)")
+        comm_branch = 3
 
     # Commercial Z-Score (smart money)
     if z_comm >= 3.0:
         score += 2.0
-        parts.append("Comm Z ≥3.0 → Strong Bull boost")
+        z_branch = 0
     elif z_comm <= -3.0:
         score -= 1.8
-        parts.append("Comm Z ≤-3.0 → Strong Bear penalty")
+        z_branch = 1
 
     cot_score = round(score, 2)
-    cot_text = " | ".join(parts) if parts else "COT neutral"
-    logger.debug(f"COT composite score: {cot_score}, text: {cot_text}")
+    cot_text = cot_rationale(comm_branch, large_inv_idx <= thresholds["p5"], z_branch)
+    trace("statistics", "COT composite score: %s, text: %s", cot_score, cot_text)
     return cot_score, cot_text
 
 
@@ -137,7 +212,7 @@ def compute_max_drawdown(equity: pd.Series) -> float:
     peak = eq.cummax()
     dd = (eq / peak) - 1.0
     max_dd = float(dd.min())
-    logger.debug(f"Max drawdown: {max_dd}")
+    trace("statistics", "Max drawdown: %s", max_dd)
     return max_dd
 
 
@@ -149,10 +224,39 @@ def compute_sharpe(returns: pd.Series, periods_per_year: int = 252) -> float:
     if std == 0.0:
         return 0.0
     sharpe = float((r.mean() / std) * np.sqrt(periods_per_year))
-    logger.debug(f"Sharpe: {sharpe}")
+    trace("statistics", "Sharpe: %s", sharpe)
     return sharpe
 
 
+def backtest_metrics(returns: pd.Series, periods_per_year: int = 252) -> Dict[str, float]:
+    """
+    Total return, Sharpe, Sortino, max drawdown and Calmar of periodic returns, with the
+    definitions of pyfolio.timeseries.perf_stats (empyrical) for a zero risk-free rate.
+    """
+    r = np.asarray(returns, dtype=float)
+    growth = np.cumprod(r + 1.0)
+    ending = np.prod(r + 1.0)
+    total_return = float(ending - 1.0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = float(np.nanmean(r) / np.nanstd(r, ddof=1) * np.sqrt(periods_per_year))
+        downside = np.sqrt(np.nanmean(np.square(np.minimum(r, 0.0)))) * np.sqrt(periods_per_year)
+        sortino = float(np.nanmean(r) * periods_per_year / downside)
+
+        cumulative = np.concatenate([[100.0], 100.0 * growth])
+        peak = np.fmax.accumulate(cumulative)
+        max_dd = float(np.nanmin((cumulative - peak) / peak))
+
+        annual_return = ending ** (1.0 / (len(r) / periods_per_year)) - 1.0
+        calmar = float(annual_return / abs(max_dd)) if max_dd < 0 else float("nan")
+    if np.isinf(calmar):
+        calmar = float("nan")
+
+    metrics = {"total_return": total_return, "sharpe": sharpe, "sortino": sortino, "max_dd": max_dd, "calmar": calmar}
+    trace("statistics", "Backtest metrics: %s", metrics)
+    return metrics
+
+
 def _price_series(df_price: pd.DataFrame) -> pd.Series:
     if df_price is None or df_price.empty:
         return pd.Series(dtype=float)
@@ -170,68 +274,102 @@ def forward_return(price: pd.Series, start_ts: pd.Timestamp, end_ts: pd.Timestam
     if pd.isna(start_px) or pd.isna(end_px) or start_px == 0:
         return None
     fwd_ret = float(end_px / start_px - 1.0)
-    logger.debug(f"Forward return from {start_ts} to {end_ts}: {fwd_ret}")
+    trace("statistics", "Forward return from %s to %s: %s", start_ts, end_ts, fwd_ret)
     return fwd_ret
 
 
-def trend_accuracy(
+CONFUSION_KEYS = ["bull_correct", "bull_wrong", "bear_correct", "bear_wrong", "evaluated"]
+DEFAULT_HORIZONS = (1, 3, 6, 12)
+
+
+def _asof_values(index: np.ndarray, values: np.ndarray, ts: np.ndarray) -> np.ndarray:
+    """price.asof(ts) for every ts: last value with date <= ts (NaN before the first date)."""
+    pos = np.searchsorted(index, ts.astype(index.dtype), side="right") - 1
+    out = values[np.maximum(pos, 0)]
+    return np.where(pos >= 0, out, np.nan)
+
+
+def confusion_counts(
+    bull: np.ndarray,
+    bear: np.ndarray,
+    start_px: np.ndarray,
+    end_px: np.ndarray,
+    total: int,
+) -> Tuple[float, float, Dict[str, int]]:
+    """(accuracy, coverage, confusion) of directional signals given their start/end prices (NaN = unresolved)."""
+    ok = ~np.isnan(start_px) & ~np.isnan(end_px) & (start_px != 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fr = end_px / start_px - 1.0
+    up, down = ok & (fr > 0), ok & (fr < 0)
+    counts = {
+        "bull_correct": int(np.sum(bull & up)),
+        "bull_wrong": int(np.sum(bull & down)),
+        "bear_correct": int(np.sum(bear & down)),
+        "bear_wrong": int(np.sum(bear & up)),
+        "evaluated": int(np.sum(ok)),
+    }
+    correct = counts["bull_correct"] + counts["bear_correct"]
+    evaluated = counts["evaluated"]
+    acc = float(correct / evaluated) if evaluated > 0 else 0.0
+    cov = float(evaluated / total) if total > 0 else 0.0
+    return acc, cov, counts
+
+
+def trend_accuracy_matrix(
     signals: pd.DataFrame,
     df_price: pd.DataFrame,
-    horizon_months: int,
+    horizons: Iterable[int] = DEFAULT_HORIZONS,
     bullish_label: str = "Bullish Trend",
     bearish_label: str = "Bearish Trend",
-) -> Tuple[float, float, Dict[str, int]]:
+) -> pd.DataFrame:
+    """
+    Trend accuracy for several forward horizons at once: one row per horizon (months) with
+    accuracy, coverage and the confusion counts. A Bullish/Bearish signal is evaluated when
+    both the price on its date and `horizon` months later resolve (as-of, NaN prices skipped).
+    """
+    horizons = [int(h) for h in horizons]
+    columns = ["horizon_months", "accuracy", "coverage", *CONFUSION_KEYS]
+    empty = pd.DataFrame([[h, 0.0, 0.0, 0, 0, 0, 0, 0] for h in horizons], columns=columns)
     if signals is None or signals.empty or df_price is None or df_price.empty:
-        return 0.0, 0.0, {"bull_correct": 0, "bull_wrong": 0, "bear_correct": 0, "bear_wrong": 0, "evaluated": 0}
+        return empty
 
-    sig = signals.copy()
-    sig["date"] = pd.to_datetime(sig["date"]).dt.normalize()
-    sig = sig.sort_values("date").reset_index(drop=True)
-
-    price = _price_series(df_price)
+    price = _price_series(df_price).dropna()
     if price.empty:
-        return 0.0, 0.0, {"bull_correct": 0, "bull_wrong": 0, "bear_correct": 0, "bear_wrong": 0, "evaluated": 0}
-
-    total = len(sig)
-    evaluated = 0
-    correct = 0
-    bull_correct = bull_wrong = bear_correct = bear_wrong = 0
-
-    for _, row in sig.iterrows():
-        verdict = str(row.get("verdict", ""))
-        if verdict not in (bullish_label, bearish_label):
-            continue
-
-        start_ts = pd.Timestamp(row["date"]).normalize()
-        end_ts = (start_ts + pd.DateOffset(months=int(horizon_months))).normalize()
-
-        fr = forward_return(price, start_ts, end_ts)
-        if fr is None:
-            continue
-
-        evaluated += 1
-        if verdict == bullish_label:
-            if fr > 0:
-                correct += 1
-                bull_correct += 1
-            elif fr < 0:
-                bull_wrong += 1
-        else:
-            if fr < 0:
-                correct += 1
-                bear_correct += 1
-            elif fr > 0:
-                bear_wrong += 1
-
-    accuracy = float(correct / evaluated) if evaluated > 0 else 0.0
-    coverage = float(evaluated / total) if total > 0 else 0.0
-
-    confusion = {
-        "bull_correct": int(bull_correct),
-        "bull_wrong": int(bull_wrong),
-        "bear_correct": int(bear_correct),
-        "bear_wrong": int(bear_wrong),
-        "evaluated": int(evaluated),
-    }
-    logger.debug(f"Trend accuracy: {accuracy}, coverage: {coverage}, confusion: {confusion}")
+        return empty
+    index = price.index.to_numpy()
+    values = price.to_numpy(dtype=float)
+
+    total = len(signals)
+    verdict = signals["verdict"].astype(str).to_numpy() if "verdict" in signals.columns else np.full(total, "")
+    bull = verdict == bullish_label
+    bear = verdict == bearish_label
+    directional = bull | bear
+
+    start = pd.DatetimeIndex(pd.to_datetime(signals["date"]).to_numpy()[directional]).normalize()
+    bull, bear = bull[directional], bear[directional]
+    start_px = _asof_values(index, values, start.to_numpy())
+
+    rows = []
+    for h in horizons:
+        end = (start + pd.DateOffset(months=h)).normalize()
+        end_px = _asof_values(index, values, end.to_numpy())
+        acc, cov, counts = confusion_counts(bull, bear, start_px, end_px, total)
+        rows.append([h, acc, cov, *(counts[k] for k in CONFUSION_KEYS)])
+    out = pd.DataFrame(rows, columns=columns)
+    trace("statistics", "Trend accuracy matrix: %s", lambda: out.to_dict("records"))
+    return out
+
+
+def trend_accuracy(
+    signals: pd.DataFrame,
+    df_price: pd.DataFrame,
+    horizon_months: int,
+    bullish_label: str = "Bullish Trend",
+    bearish_label: str = "Bearish Trend",
+) -> Tuple[float, float, Dict[str, int]]:
+    row = trend_accuracy_matrix(signals, df_price, [horizon_months], bullish_label, bearish_label).iloc[0]
+    accuracy = float(row["accuracy"])
+    coverage = float(row["coverage"])
+    confusion = {k: int(row[k]) for k in CONFUSION_KEYS}
+    trace("statistics", "Trend accuracy: %s, coverage: %s, confusion: %s", accuracy, coverage, confusion)
     return accuracy, coverage, confusion
\ No newline at end of file
@@ -0,0 +1,300 @@
+"""
+Parameter sweep for Compass trend validation.
+
+    python -m src.analytics.sweep --grid verdict_buy=1,1.5,2 --grid sigma_levels=1-2,1-2-3 --grid step_days=7,30
+    python -m src.analytics.sweep --grid-file sweep.yaml --asset ETH --start 2021-01-01 --out sweep.csv
+
+A grid maps parameter names (see PARAMETERS) to lists of values; every combination is one
+configuration. The Compass inputs (as-of VIX/COT values, expanding σ statistics, rolling COT
+quantiles) are built once per asset at a daily cadence; each configuration takes every
+step_days-th row, scores it with the vectorized Compass engine and evaluates the same metrics
+as run_trend_validation. With parallel.workers > 1 the configurations run in the process pool.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import dataclasses
+import itertools
+import logging
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from src.analytics.compass_engine import CompassInputs, build_compass_inputs, fast_path_supported, score_compass_inputs
+from src.analytics.statistics import (
+    _asof_values,
+    _price_series,
+    compute_max_drawdown,
+    compute_sharpe,
+    confusion_counts,
+)
+from src.analytics.trend_validation import _slice_price
+from src.config.settings import Settings, get_settings, set_settings
+from src.services.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+
+def _sigma_levels(value: Any) -> List[int]:
+    if isinstance(value, str):
+        return [int(v) for v in value.replace("-", " ").split()]
+    return [int(v) for v in value]
+
+
+@dataclass(frozen=True)
+class SweepParameter:
+    section: str
+    field: str
+    parse: Callable[[Any], Any]
+
+
+PARAMETERS: Dict[str, SweepParameter] = {
+    "verdict_buy": SweepParameter("scoring", "verdict_buy", float),
+    "sigma_levels": SweepParameter("ui", "sigma_levels", _sigma_levels),
+    "step_days": SweepParameter("signals", "step_days", int),
+    "vix_strong_risk_on_score": SweepParameter("scoring", "vix_strong_risk_on_score", float),
+    "vix_risk_on_score": SweepParameter("scoring", "vix_risk_on_score", float),
+    "vix_strong_risk_off_score": SweepParameter("scoring", "vix_strong_risk_off_score", float),
+    "vix_risk_off_score": SweepParameter("scoring", "vix_risk_off_score", float),
+    "cot_weight": SweepParameter("scoring", "cot_weight", float),
+}
+
+METRICS = ["total_return", "max_dd", "sharpe", "trend_accuracy", "trend_coverage", "exposure", "n_signals"]
+
+
+def expand_grid(grid: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    """Every combination of the grid values, in grid key order (values parsed per PARAMETERS)."""
+    unknown = set(grid) - set(PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {sorted(unknown)} (known: {sorted(PARAMETERS)})")
+    names = list(grid)
+    values = [[PARAMETERS[name].parse(v) for v in grid[name]] for name in names]
+    return [dict(zip(names, combo)) for combo in itertools.product(*values)]
+
+
+def apply_params(settings: Settings, params: Dict[str, Any]) -> Settings:
+    """Copy of `settings` in Compass mode with the swept fields replaced."""
+    sections: Dict[str, Dict[str, Any]] = {}
+    for name, value in params.items():
+        p = PARAMETERS[name]
+        sections.setdefault(p.section, {})[p.field] = value
+    changes = {sec: dataclasses.replace(getattr(settings, sec), **fields) for sec, fields in sections.items()}
+    return dataclasses.replace(settings, compass_mode=True, **changes)
+
+
+@contextlib.contextmanager
+def _installed(settings: Settings) -> Iterator[None]:
+    prev = get_settings()
+    set_settings(settings)
+    try:
+        yield
+    finally:
+        set_settings(prev)
+
+
+@dataclass
+class SweepContext:
+    """Shared precomputation of one asset: daily-cadence Compass inputs and the validation window."""
+    asset: str
+    inputs: CompassInputs
+    in_range: np.ndarray
+    bar_dates: np.ndarray
+    asset_ret: np.ndarray
+    start_px: np.ndarray
+    end_px: np.ndarray
+    initial_capital: float
+
+
+def prepare_sweep(
+    dfs: Dict[str, pd.DataFrame],
+    asset: str,
+    initial_capital: float,
+    start_date=None,
+    end_date=None,
+) -> SweepContext:
+    s = get_settings()
+    daily = dataclasses.replace(s, compass_mode=True, signals=dataclasses.replace(s.signals, step_days=1))
+    with _installed(daily):
+        if not fast_path_supported(dfs, asset):
+            raise ValueError(f"Sweep needs inputs supported by the vectorized Compass engine ({asset})")
+        inputs = build_compass_inputs(dfs, asset)
+
+    df_price = _slice_price(dfs[asset.lower()], start_date=start_date, end_date=end_date)
+    if len(df_price) < 2:
+        raise ValueError(f"Not enough prices for {asset} in the sweep window")
+
+    step_dates = pd.DatetimeIndex(inputs.dates)
+    in_range = np.ones(len(step_dates), dtype=bool)
+    if start_date is not None:
+        in_range &= step_dates >= pd.to_datetime(start_date)
+    if end_date is not None:
+        in_range &= step_dates <= pd.to_datetime(end_date)
+
+    # Цены на дату шага и через trend_horizon_months — как в trend_accuracy_matrix.
+    price = _price_series(df_price).dropna()
+    index, values = price.index.to_numpy(), price.to_numpy(dtype=float)
+    end = (step_dates + pd.DateOffset(months=int(s.compass.trend_horizon_months))).normalize()
+
+    return SweepContext(
+        asset=asset,
+        inputs=inputs,
+        in_range=in_range,
+        bar_dates=df_price["date"].to_numpy().astype("datetime64[ns]"),
+        asset_ret=df_price["close"].pct_change().fillna(0.0).to_numpy(),
+        start_px=_asof_values(index, values, step_dates.to_numpy()),
+        end_px=_asof_values(index, values, end.to_numpy()),
+        initial_capital=float(initial_capital),
+    )
+
+
+def _every(inputs: CompassInputs, step: int) -> CompassInputs:
+    # Шаги с step_days=k — каждая k-я строка дневных шагов (общий старт min_start_bars).
+    fields = {}
+    for f in dataclasses.fields(inputs):
+        value = getattr(inputs, f.name)
+        if isinstance(value, np.ndarray):
+            fields[f.name] = value[::step]
+        elif isinstance(value, pd.Series):
+            fields[f.name] = value.iloc[::step].reset_index(drop=True)
+    return dataclasses.replace(inputs, **fields)
+
+
+def evaluate(ctx: SweepContext) -> Dict[str, float]:
+    """Trend-validation metrics of the installed settings on the shared inputs."""
+    s = get_settings()
+    step = int(s.signals.step_days)
+    inputs = _every(ctx.inputs, step)
+    in_range = ctx.in_range[::step]
+    if not len(inputs.dates) or not in_range.any():
+        return {name: float("nan") for name in METRICS} | {"n_signals": 0.0}
+
+    verdict = np.asarray(score_compass_inputs(inputs)["verdict"], dtype=object)[in_range]
+    dates = pd.DatetimeIndex(inputs.dates).to_numpy().astype("datetime64[ns]")[in_range]
+
+    # Позиция дня = вердикт последнего сигнала <= дня (merge_asof backward), иначе Neutral.
+    last = np.searchsorted(dates, ctx.bar_dates, side="right") - 1
+    bull = verdict == "Bullish Trend"
+    pos = np.where(last >= 0, bull[np.maximum(last, 0)], False).astype(int)
+    equity = pd.Series(ctx.initial_capital * np.cumprod(1.0 + ctx.asset_ret * pos))
+
+    bear = verdict == "Bearish Trend"
+    directional = bull | bear
+    acc, cov, _ = confusion_counts(
+        bull[directional],
+        bear[directional],
+        ctx.start_px[::step][in_range][directional],
+        ctx.end_px[::step][in_range][directional],
+        len(verdict),
+    )
+    return {
+        "total_return": float(equity.iloc[-1] / ctx.initial_capital - 1.0),
+        "max_dd": compute_max_drawdown(equity),
+        "sharpe": compute_sharpe(equity.pct_change().fillna(0.0)),
+        "trend_accuracy": acc,
+        "trend_coverage": cov,
+        "exposure": float(pos.mean()),
+        "n_signals": float(len(verdict)),
+    }
+
+
+def evaluate_configs(ctx: SweepContext, configs: List[Dict[str, Any]], base: Optional[Settings] = None) -> List[Dict[str, Any]]:
+    """evaluate() for each configuration under `base` (current settings) with its parameters applied."""
+    base = base or get_settings()
+    rows = []
+    for params in configs:
+        with _installed(apply_params(base, params)):
+            rows.append({**params, **evaluate(ctx)})
+    return rows
+
+
+@traced("sweep.run")
+def run_sweep(
+    dfs: Dict[str, pd.DataFrame],
+    grid: Dict[str, Sequence[Any]],
+    asset: str = "BTC",
+    initial_capital: Optional[float] = None,
+    start_date=None,
+    end_date=None,
+    rank_by: str = "sharpe",
+    workers: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Evaluates every grid configuration for `asset` and returns one row per configuration
+    (parameters + METRICS), best `rank_by` first, with a 1-based `rank` column.
+    """
+    if rank_by not in METRICS:
+        raise ValueError(f"rank_by must be one of {METRICS}")
+    s = get_settings()
+    configs = expand_grid(grid)
+    capital = float(initial_capital if initial_capital is not None else s.backtest.initial_capital_default)
+    ctx = prepare_sweep(dfs, asset, capital, start_date=start_date, end_date=end_date)
+
+    workers = int(workers or s.parallel.workers)
+    if workers > 1 and len(configs) > 1:
+        from src.services.parallel import evaluate_sweep_parallel
+
+        rows = evaluate_sweep_parallel(dfs, ctx, configs, workers=workers)
+    else:
+        rows = evaluate_configs(ctx, configs)
+
+    table = pd.DataFrame(rows, columns=[*grid, *METRICS])
+    table = table.sort_values([rank_by, "total_return"], ascending=False, na_position="last", kind="stable")
+    table.insert(0, "rank", np.arange(1, len(table) + 1))
+    return table.reset_index(drop=True)
+
+
+def _parse_grid_arg(items: List[str]) -> Dict[str, List[str]]:
+    grid: Dict[str, List[str]] = {}
+    for item in items:
+        name, sep, values = item.partition("=")
+        if not sep:
+            raise ValueError(f"--grid expects name=v1,v2,...: {item!r}")
+        grid[name.strip()] = [v.strip() for v in values.split(",") if v.strip()]
+    return grid
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--grid", action="append", default=[], help="name=v1,v2,... (sigma_levels as 1-2,1-2-3)")
+    parser.add_argument("--grid-file", default=None, help="YAML/JSON mapping name -> list of values")
+    parser.add_argument("--asset", default="BTC", choices=["BTC", "ETH"])
+    parser.add_argument("--start", default=None)
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--capital", type=float, default=None)
+    parser.add_argument("--rank-by", default="sharpe", choices=METRICS)
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: parallel.workers)")
+    parser.add_argument("--top", type=int, default=20, help="rows printed")
+    parser.add_argument("--out", default=None, help="write the full table (.csv, .json, .parquet or .arrow)")
+    args = parser.parse_args()
+
+    grid: Dict[str, Sequence[Any]] = {}
+    if args.grid_file:
+        grid.update(yaml.safe_load(Path(args.grid_file).read_text(encoding="utf-8")) or {})
+    grid.update(_parse_grid_arg(args.grid))
+    if not grid:
+        parser.error("empty grid: pass --grid or --grid-file")
+
+    from src.services.data_loader import load_dataset
+    from src.services.signal_cache import input_columns
+
+    dfs = {name: load_dataset(name, columns=cols) for name, cols in input_columns(args.asset.lower()).items()}
+    t0 = time.perf_counter()
+    table = run_sweep(dfs, grid, args.asset, args.capital, args.start, args.end, args.rank_by, args.workers)
+    elapsed = time.perf_counter() - t0
+
+    print(f"{len(table)} configurations for {args.asset} in {elapsed:.1f}s, ranked by {args.rank_by}:")
+    print(table.head(args.top).to_string(index=False))
+    if args.out:
+        from src.utils.helpers import write_table
+
+        print(f"results -> {write_table(table, args.out)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,18 @@
 # src/analytics/trend_validation.py
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Dict
 
 import pandas as pd
 import logging
 
 from src.analytics.signal_generator import generate_signals
-from src.analytics.statistics import compute_max_drawdown, compute_sharpe, trend_accuracy
+from src.analytics.statistics import CONFUSION_KEYS, compute_max_drawdown, compute_sharpe, trend_accuracy_matrix
 from src.config.settings import get_settings
+from src.services.tracing import trace, traced
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-fh = logging.FileHandler('app.log', encoding='utf-8')
-fh.setLevel(logging.DEBUG)
-logger.addHandler(fh)
 
 
 @dataclass
@@ -24,6 +21,8 @@ class TrendValidationResult:
     metrics: Dict[str, float]
     confusion: Dict[str, int]
     signals: pd.DataFrame
+    # horizon_months, accuracy, coverage + confusion counts per horizon
+    horizons: pd.DataFrame = field(default_factory=pd.DataFrame)
 
 
 def _slice_price(df: pd.DataFrame, start_date=None, end_date=None) -> pd.DataFrame:
@@ -37,6 +36,7 @@ def _slice_price(df: pd.DataFrame, start_date=None, end_date=None) -> pd.DataFra
     return df.reset_index(drop=True)
 
 
+@traced("trend_validation.run")
 def run_trend_validation(
     dfs: Dict[str, pd.DataFrame],
     asset: str,
@@ -49,7 +49,7 @@ def run_trend_validation(
     - No fees, no trailing stop, no intra-month trading.
     - Monthly regime signals from generate_signals (step_days=30 by default).
     """
-    logger.debug(f"Running trend validation for {asset}, capital={initial_capital}, start={start_date}, end={end_date}")
+    trace("trend_validation", "Running trend validation for %s, capital=%s, start=%s, end=%s", asset, initial_capital, start_date, end_date)
 
     s = get_settings()
     asset_key = asset.lower()
@@ -65,7 +65,7 @@ def run_trend_validation(
 
     # Monthly signals (already compass-aware).
     signals = generate_signals(dfs, asset=asset)
-    logger.debug(f"All signals shape: {signals.shape}")
+    trace("trend_validation", "All signals shape: %s", signals.shape)
 
     if start_date is not None or end_date is not None:
         tmp = signals.copy()
@@ -75,13 +75,13 @@ def run_trend_validation(
         if end_date is not None:
             tmp = tmp[tmp["date"] <= pd.to_datetime(end_date)]
         signals = tmp.reset_index(drop=True)
-    logger.debug(f"Filtered signals shape: {signals.shape}")
+    trace("trend_validation", "Filtered signals shape: %s", signals.shape)
 
     if signals.empty:
         # If we can't compute signals, fall back to "cash" curve.
         equity_curve = df_price[["date", "close"]].copy()
         equity_curve["Equity"] = float(initial_capital)
-        logger.debug("No signals, fallback to cash curve")
+        trace("trend_validation", "No signals, fallback to cash curve")
         return TrendValidationResult(
             equity_curve=equity_curve,
             metrics={"total_return": 0.0, "bh_total_return": float(df_price["close"].iloc[-1] / df_price["close"].iloc[0] - 1.0)},
@@ -101,13 +101,13 @@ def run_trend_validation(
     daily = pd.merge_asof(daily, sig, on="date", direction="backward")
     daily["verdict"] = daily["verdict"].fillna("Neutral")
     daily["pos"] = (daily["verdict"] == "Bullish Trend").astype(int)
-    logger.debug(f"Daily positions shape: {daily.shape}")
+    trace("trend_validation", "Daily positions shape: %s", daily.shape)
 
     # Strategy equity
     daily["asset_ret"] = daily["close"].pct_change().fillna(0.0)
     daily["strategy_ret"] = daily["asset_ret"] * daily["pos"]
     daily["Equity"] = float(initial_capital) * (1.0 + daily["strategy_ret"]).cumprod()
-    logger.debug(f"Equity calculated")
+    trace("trend_validation", "Equity calculated")
 
     equity_curve = daily[["date", "close", "Equity"]].copy()
 
@@ -126,11 +126,15 @@ def run_trend_validation(
     sharpe = compute_sharpe(equity_curve["Equity"].pct_change().fillna(0.0))
     bh_sharpe = compute_sharpe(bh_ret)
 
-    acc, cov, confusion = trend_accuracy(
+    main_horizon = int(s.compass.trend_horizon_months)
+    horizons = trend_accuracy_matrix(
         signals=signals,
         df_price=df_price,
-        horizon_months=int(s.compass.trend_horizon_months),
+        horizons=sorted({main_horizon, *s.compass.validation_horizons}),
     )
+    main_row = horizons.loc[horizons["horizon_months"] == main_horizon].iloc[0]
+    acc, cov = float(main_row["accuracy"]), float(main_row["coverage"])
+    confusion = {k: int(main_row[k]) for k in CONFUSION_KEYS}
 
     metrics = {
         "total_return": total_return,
@@ -144,6 +148,6 @@ def run_trend_validation(
         "trend_coverage": cov,
         "horizon_months": float(s.compass.trend_horizon_months),
     }
-    logger.debug(f"Metrics: {metrics}")
+    trace("trend_validation", "Metrics: %s", metrics)
 
-    return TrendValidationResult(equity_curve=equity_curve, metrics=metrics, confusion=confusion, signals=signals)
\ No newline at end of file
+    return TrendValidationResult(equity_curve=equity_curve, metrics=metrics, confusion=confusion, signals=signals, horizons=horizons)
\ No newline at end of file
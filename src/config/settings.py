@@ -4,16 +4,12 @@ from __future__ import annotations
 import datetime as dt
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 
 import yaml
 import logging
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-fh = logging.FileHandler('app.log', encoding='utf-8')
-fh.setLevel(logging.DEBUG)
-logger.addHandler(fh)
 
 CONFIG_PATH = Path("config.yaml")
 
@@ -42,6 +38,19 @@ class UISettings:
     sigma_levels: List[int]
     default_years: int
     slider_step_days: int
+    downsample: bool
+    chart_width_px: int
+    points_per_px: float
+    candle_px: int
+    webgl_min_points: int
+
+    @property
+    def max_points(self) -> int:
+        return max(3, int(self.chart_width_px * self.points_per_px))
+
+    @property
+    def max_candles(self) -> int:
+        return max(1, self.chart_width_px // max(1, self.candle_px))
 
 
 @dataclass(frozen=True)
@@ -72,6 +81,8 @@ class SignalsSettings:
     min_start_bars: int
     min_price_rows: int
     min_feature_rows: int
+    # "vectorized" — single-pass Compass engine; "loop" — reference per-step implementation.
+    engine: str
 
     # Legacy / trading-only (kept for backward compatibility)
     dyn_min_score_base: float
@@ -88,6 +99,9 @@ class MLSettings:
     target_horizon_days: int
     min_train_rows: int
     pred_to_score_divisor: float
+    # Walk-forward: модель переобучается раз в N дней (0 — на каждом шаге), кэш на диске.
+    retrain_every_days: int
+    model_cache_dir: str
 
 
 @dataclass(frozen=True)
@@ -121,6 +135,8 @@ class ScoringSettings:
     corr_slope: float
 
     cot_enabled: bool
+    # Множитель оценки COT Composite в Compass (1.0 — как рассчитано).
+    cot_weight: float
     ml_enabled: bool
 
 
@@ -130,12 +146,154 @@ class BacktestSettings:
     fee_default: float
     trailing_stop_pct: float
     trade_log_dir: str
+    # "vectorized" — NumPy engine (backtest_engine.py); "backtrader" — reference MacroStrategy on Cerebro.
+    engine: str
 
 
 @dataclass(frozen=True)
 class CompassSettings:
     trend_horizon_months: int
     validation_metrics: List[str]
+    # Горизонты (мес.) матрицы точности во вкладке Trend Validation.
+    validation_horizons: List[int]
+
+
+@dataclass(frozen=True)
+class ParallelSettings:
+    # 1 — всё считается в текущем процессе; >1 — ProcessPoolExecutor по активам и чанкам дат.
+    workers: int
+    chunks_per_worker: int
+
+
+@dataclass(frozen=True)
+class StorageSettings:
+    # csv | feather | npy — формат файлов в data_dir (см. src/services/storage.py).
+    backend: str
+
+
+@dataclass(frozen=True)
+class UpdaterSettings:
+    # incremental — докачиваем только хвост после последней сохранённой даты; full — всё заново.
+    mode: str
+    overlap_days: int
+    full_refresh_days: int
+    state_file: str
+
+
+@dataclass(frozen=True)
+class SchedulerSettings:
+    # Фоновый режим обновления: группа источников опрашивается после своего релиза (+delay_minutes),
+    # пока ожидаемых данных нет — каждые retry_minutes, но не дольше give_up_hours.
+    delay_minutes: float
+    retry_minutes: float
+    give_up_hours: float
+    max_sleep_minutes: float
+
+
+@dataclass(frozen=True)
+class FetchSettings:
+    max_workers: int
+    retries: int
+    backoff_base: float
+    backoff_max: float
+    # source -> requests per second (0 = без ограничения)
+    rate_limits: Dict[str, float]
+    yahoo_batch: bool
+    # Переопределение эндпоинтов (локальный стенд / зеркало); None — боевые адреса.
+    yahoo_url: str | None
+    cftc_url: str | None
+    timeout: float
+
+
+@dataclass(frozen=True)
+class HttpCacheSettings:
+    # Дисковый кэш ответов загрузчиков (<dir>/<source>/): ответ младше ttl[source] секунд отдаётся без
+    # запроса; старше — CFTC перепроверяется условным запросом (ETag / Last-Modified), Yahoo перекачивается.
+    enabled: bool
+    dir: str
+    ttl: Dict[str, float]
+
+
+@dataclass(frozen=True)
+class PanelSettings:
+    # persist — хранить MarketPanel в data_dir/<dir> (memmap) между запусками.
+    persist: bool
+    dir: str
+
+
+@dataclass(frozen=True)
+class DerivedSettings:
+    # Производные ряды, материализованные этапом derive в update_all_data (data_dir/<dir>).
+    enabled: bool
+    dir: str
+
+
+@dataclass(frozen=True)
+class IntradaySettings:
+    # Внутридневные бары (data_dir/<dir>/<asset>/<interval>/YYYY-MM.*), одна партиция на месяц.
+    enabled: bool
+    interval: str
+    assets: Tuple[str, ...]
+    dir: str
+    lookback_days: int
+    # Приложение берёт дневные бары активов из resample партиций (хвост свежее дневного датасета)
+    serve_daily: bool
+
+
+# Схемы типов датасетов (ключи files): применяются при загрузке и сохранении (storage.coerce_dtypes).
+# float32 — только колонки для графиков; close, deviation_pct и индексы COT питают расчёты сигналов
+# и бэктеста и остаются float64. Позиции COT — целые в пределах int32.
+_PRICE_DTYPES = {"high": "float32", "low": "float32", "volume": "float32"}
+_COT_DTYPES = {
+    "open_interest_all": "int32",
+    "Comm_Net": "int32",
+    "Large_Specs_Net": "int32",
+    "Small_Traders_Net": "int32",
+    "COT_Index_Large_26w": "float32",
+}
+DEFAULT_DTYPES: Dict[str, Dict[str, str]] = {
+    "vix": {**_PRICE_DTYPES, "rolling_mean": "float32"},
+    "btc_cot": _COT_DTYPES,
+    "eth_cot": _COT_DTYPES,
+    "btc": _PRICE_DTYPES,
+    "eth": _PRICE_DTYPES,
+    "spx": _PRICE_DTYPES,
+    "nasdaq": _PRICE_DTYPES,
+    "dxy": _PRICE_DTYPES,
+    "us10y": _PRICE_DTYPES,
+}
+
+
+@dataclass(frozen=True)
+class DtypeSettings:
+    # enabled=false — датасеты грузятся с типами pandas по умолчанию (float64/int64/str).
+    enabled: bool
+    schemas: Dict[str, Dict[str, str]]
+
+    def schema(self, name: str | None) -> Dict[str, str]:
+        """Column -> dtype of dataset `name` (empty when disabled or not declared)."""
+        if not self.enabled or name is None:
+            return {}
+        return self.schemas.get(name, {})
+
+
+@dataclass(frozen=True)
+class SignalCacheSettings:
+    # Кэш generate_signals по хэшу входных данных и настроек (feather-файлы, LRU по размеру).
+    enabled: bool
+    dir: str
+    max_mb: float
+
+
+@dataclass(frozen=True)
+class TraceSettings:
+    # enabled=false — trace()/span() сразу возвращаются (без форматирования и таймеров).
+    enabled: bool
+    buffer_size: int
+    file: str | None
+    # Журнал приложения (app.log) — один корневой обработчик вместо FileHandler в каждом модуле.
+    log_file: str | None
+    log_level: str
 
 
 @dataclass(frozen=False)
@@ -156,6 +314,19 @@ class Settings:
     compass_mode: bool
     compass: CompassSettings
 
+    parallel: ParallelSettings
+    storage: StorageSettings
+    updater: UpdaterSettings
+    scheduler: SchedulerSettings
+    fetch: FetchSettings
+    http_cache: HttpCacheSettings
+    panel: PanelSettings
+    derived: DerivedSettings
+    intraday: IntradaySettings
+    dtypes: DtypeSettings
+    tracing: TraceSettings
+    signal_cache: SignalCacheSettings
+
 
 _SETTINGS: Settings | None = None
 
@@ -174,6 +345,11 @@ def get_settings() -> Settings:
         sigma_levels=list(ui_raw.get("sigma_levels", raw.get("sigma_levels", [1, 2]))),
         default_years=int(ui_raw.get("default_years", 3)),
         slider_step_days=int(ui_raw.get("slider_step_days", 7)),
+        downsample=bool(ui_raw.get("downsample", True)),
+        chart_width_px=int(ui_raw.get("chart_width_px", 1200)),
+        points_per_px=float(ui_raw.get("points_per_px", 1.0)),
+        candle_px=int(ui_raw.get("candle_px", 3)),
+        webgl_min_points=int(ui_raw.get("webgl_min_points", 5000)),
     )
 
     assets_raw = raw.get("assets", {})
@@ -202,6 +378,7 @@ def get_settings() -> Settings:
         min_start_bars=int(sig_raw.get("min_start_bars", 200)),
         min_price_rows=int(sig_raw.get("min_price_rows", 300)),
         min_feature_rows=int(sig_raw.get("min_feature_rows", 50)),
+        engine=str(sig_raw.get("engine", "vectorized")),
         dyn_min_score_base=float(dyn_raw.get("base", 1.5)),
         dyn_min_score_vix_scale=float(dyn_raw.get("vix_scale", 0.3)),
         dyn_min_score_vix_divisor=float(dyn_raw.get("vix_divisor", 50.0)),
@@ -216,6 +393,8 @@ def get_settings() -> Settings:
         target_horizon_days=int(ml_raw.get("target_horizon_days", 30)),
         min_train_rows=int(ml_raw.get("min_train_rows", 50)),
         pred_to_score_divisor=float(ml_raw.get("pred_to_score_divisor", 5.0)),
+        retrain_every_days=int(ml_raw.get("retrain_every_days", 30)),
+        model_cache_dir=str(ml_raw.get("model_cache_dir", "cache/models")),
     )
 
     sc_raw = raw.get("scoring", {})
@@ -256,6 +435,7 @@ def get_settings() -> Settings:
         corr_slope=float(corr.get("slope", -0.7)),
 
         cot_enabled=bool(_get(sc_raw, "cot.enabled", True)),
+        cot_weight=float(_get(sc_raw, "cot.weight", 1.0)),
         ml_enabled=bool(_get(sc_raw, "ml.enabled", True)),
     )
 
@@ -265,6 +445,7 @@ def get_settings() -> Settings:
         fee_default=float(bt_raw.get("fee_default", 0.0)),
         trailing_stop_pct=float(bt_raw.get("trailing_stop_pct", 0.0)),
         trade_log_dir=str(bt_raw.get("trade_log_dir", "logs")),
+        engine=str(bt_raw.get("engine", "vectorized")),
     )
 
     compass_mode = bool(raw.get("compass_mode", False))
@@ -272,6 +453,100 @@ def get_settings() -> Settings:
     compass = CompassSettings(
         trend_horizon_months=int(compass_raw.get("trend_horizon_months", 3)),
         validation_metrics=list(compass_raw.get("validation_metrics", ["accuracy", "regime_return"])),
+        validation_horizons=[int(h) for h in compass_raw.get("validation_horizons", [1, 3, 6, 12])],
+    )
+
+    par_raw = raw.get("parallel", {}) or {}
+    parallel = ParallelSettings(
+        workers=max(1, int(par_raw.get("workers", 1))),
+        chunks_per_worker=max(1, int(par_raw.get("chunks_per_worker", 4))),
+    )
+
+    storage_raw = raw.get("storage", {}) or {}
+    storage = StorageSettings(backend=str(storage_raw.get("backend", "csv")).lower())
+
+    upd_raw = raw.get("updater", {}) or {}
+    updater = UpdaterSettings(
+        mode=str(upd_raw.get("mode", "incremental")).lower(),
+        overlap_days=max(0, int(upd_raw.get("overlap_days", 7))),
+        full_refresh_days=int(upd_raw.get("full_refresh_days", 30)),
+        state_file=str(upd_raw.get("state_file", "data/raw/update_state.json")),
+    )
+
+    sched_raw = raw.get("scheduler", {}) or {}
+    scheduler = SchedulerSettings(
+        delay_minutes=max(0.0, float(sched_raw.get("delay_minutes", 20))),
+        retry_minutes=max(1.0, float(sched_raw.get("retry_minutes", 60))),
+        give_up_hours=max(0.0, float(sched_raw.get("give_up_hours", 24))),
+        max_sleep_minutes=max(1.0, float(sched_raw.get("max_sleep_minutes", 60))),
+    )
+
+    fetch_raw = raw.get("fetch", {}) or {}
+    fetch = FetchSettings(
+        max_workers=max(1, int(fetch_raw.get("max_workers", 8))),
+        retries=max(0, int(fetch_raw.get("retries", 3))),
+        backoff_base=float(fetch_raw.get("backoff_base", 1.0)),
+        backoff_max=float(fetch_raw.get("backoff_max", 30.0)),
+        rate_limits={str(k): float(v) for k, v in (fetch_raw.get("rate_limits", {"yahoo": 2.0, "cftc": 2.0}) or {}).items()},
+        yahoo_batch=bool(fetch_raw.get("yahoo_batch", True)),
+        yahoo_url=fetch_raw.get("yahoo_url") or None,
+        cftc_url=fetch_raw.get("cftc_url") or None,
+        timeout=float(fetch_raw.get("timeout", 30.0)),
+    )
+
+    hc_raw = raw.get("http_cache", {}) or {}
+    http_cache = HttpCacheSettings(
+        enabled=bool(hc_raw.get("enabled", True)),
+        dir=str(hc_raw.get("dir", "cache/http")),
+        ttl={"yahoo": 900.0, "cftc": 3600.0, **{str(k): float(v) for k, v in (hc_raw.get("ttl") or {}).items()}},
+    )
+
+    panel_raw = raw.get("panel", {}) or {}
+    panel = PanelSettings(
+        persist=bool(panel_raw.get("persist", False)),
+        dir=str(panel_raw.get("dir", "panel")),
+    )
+
+    derived_raw = raw.get("derived", {}) or {}
+    derived = DerivedSettings(
+        enabled=bool(derived_raw.get("enabled", True)),
+        dir=str(derived_raw.get("dir", "derived")),
+    )
+
+    intraday_raw = raw.get("intraday", {}) or {}
+    intraday = IntradaySettings(
+        enabled=bool(intraday_raw.get("enabled", False)),
+        interval=str(intraday_raw.get("interval", "1h")),
+        assets=tuple(str(a).lower() for a in (intraday_raw.get("assets") or ["btc", "eth"])),
+        dir=str(intraday_raw.get("dir", "intraday")),
+        lookback_days=int(intraday_raw.get("lookback_days", 729)),
+        serve_daily=bool(intraday_raw.get("serve_daily", False)),
+    )
+
+    dtypes_raw = raw.get("dtypes", {}) or {}
+    overrides = dtypes_raw.get("overrides", {}) or {}
+    dtypes = DtypeSettings(
+        enabled=bool(dtypes_raw.get("enabled", True)),
+        schemas={
+            name: {**DEFAULT_DTYPES.get(name, {}), **{str(c): str(t) for c, t in (overrides.get(name) or {}).items()}}
+            for name in {*DEFAULT_DTYPES, *overrides}
+        },
+    )
+
+    trace_raw = raw.get("tracing", {}) or {}
+    tracing = TraceSettings(
+        enabled=bool(trace_raw.get("enabled", False)),
+        buffer_size=max(1, int(trace_raw.get("buffer_size", 10_000))),
+        file=trace_raw.get("file") or None,
+        log_file=trace_raw.get("log_file", "app.log") or None,
+        log_level=str(trace_raw.get("log_level", "INFO")).upper(),
+    )
+
+    cache_raw = raw.get("signal_cache", {}) or {}
+    signal_cache = SignalCacheSettings(
+        enabled=bool(cache_raw.get("enabled", True)),
+        dir=str(cache_raw.get("dir", "cache/signals")),
+        max_mb=float(cache_raw.get("max_mb", 256)),
     )
 
     _SETTINGS = Settings(
@@ -287,5 +562,23 @@ def get_settings() -> Settings:
         backtest=backtest,
         compass_mode=compass_mode,
         compass=compass,
+        parallel=parallel,
+        storage=storage,
+        updater=updater,
+        scheduler=scheduler,
+        fetch=fetch,
+        http_cache=http_cache,
+        panel=panel,
+        derived=derived,
+        intraday=intraday,
+        dtypes=dtypes,
+        tracing=tracing,
+        signal_cache=signal_cache,
     )
-    return _SETTINGS
\ No newline at end of file
+    return _SETTINGS
+
+
+def set_settings(settings: Settings) -> None:
+    """Installs an already built Settings object (worker processes receive the parent's settings)."""
+    global _SETTINGS
+    _SETTINGS = settings
\ No newline at end of file
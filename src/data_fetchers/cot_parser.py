@@ -1,11 +1,15 @@
 from __future__ import annotations
 
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 import pandas as pd
-import requests
+
+from src.config.settings import get_settings
+from src.services.fetch_scheduler import rate_limiter
+from src.services.http_cache import response_cache
 
 BASE_URL = "https://publicreporting.cftc.gov/resource/6dca-aqww.json"
+RESOURCE_PATH = "/resource/6dca-aqww.json"
 LIMIT = 50000
 
 MARKETS: Dict[str, str] = {
@@ -13,25 +17,94 @@ MARKETS: Dict[str, str] = {
     "ETH": "ETHER CASH SETTLED - CHICAGO MERCANTILE EXCHANGE",
 }
 
+POSITION_COLUMNS = [
+    "open_interest_all",
+    "comm_positions_long_all",
+    "comm_positions_short_all",
+    "noncomm_positions_long_all",
+    "noncomm_positions_short_all",
+    "nonrept_positions_long_all",
+    "nonrept_positions_short_all",
+]
+# Колонки отчёта, которые запрашиваются ($select) и хранятся в data/raw; остальные — в архиве
+RAW_COLUMNS = ["id", "market_and_exchange_names", "report_date_as_yyyy_mm_dd", *POSITION_COLUMNS]
+# Схема обработанного COT-датасета: всё, что читают признаки, скоринг и графики
+PROCESSED_COLUMNS = [
+    "date",
+    "open_interest_all",
+    "Comm_Net",
+    "Large_Specs_Net",
+    "Small_Traders_Net",
+    "COT_Index_Comm_26w",
+    "COT_Index_Large_26w",
+    "COT_Index_Large_Inverted_26w",
+    "Z_Score_Comm",
+]
+
 
-def fetch_cot_raw(asset: str = "BTC") -> pd.DataFrame:
+def fetch_cot_raw(asset: str = "BTC", since: Optional[str] = None) -> pd.DataFrame:
+    """
+    CFTC reports for `asset`; with `since` (YYYY-MM-DD) only reports dated on/after it.
+    Goes through the response cache: a fresh entry is returned as is, a stale one is revalidated
+    with a conditional request for the first page (304 — the stored frame, nothing re-downloaded).
+    """
     market = MARKETS.get(asset.upper())
     if not market:
         raise ValueError(f"Unknown asset: {asset}")
 
+    where = f"market_and_exchange_names='{market}'"
+    if since:
+        where += f" AND report_date_as_yyyy_mm_dd >= '{pd.Timestamp(since):%Y-%m-%dT00:00:00}'"
+
+    cfg = get_settings().fetch
+    url = cfg.cftc_url.rstrip("/") + RESOURCE_PATH if cfg.cftc_url else BASE_URL
+    query = {"$select": ",".join(RAW_COLUMNS), "$where": where}
+
+    cache = response_cache()
+    entry = cache.get("cftc", url, query) if cache is not None else None
+    if entry is not None and cache.is_fresh("cftc", entry):
+        return entry.frame
+
+    import requests
+
     offset = 0
     data: List[dict] = []
+    first = None
     while True:
-        params = {"$limit": LIMIT, "$offset": offset, "$where": f"market_and_exchange_names='{market}'"}
-        r = requests.get(BASE_URL, params=params, timeout=30)
+        params = {**query, "$limit": LIMIT, "$offset": offset}
+        # Валидаторы Socrata описывают весь набор данных: 304 на первую страницу — без изменений
+        headers = entry.conditional_headers() if entry is not None and offset == 0 else {}
+        rate_limiter("cftc").acquire()
+        r = requests.get(url, params=params, headers=headers, timeout=cfg.timeout)
+        if r.status_code == 304 and entry is not None:
+            return cache.revalidated("cftc", url, query, entry).frame
         r.raise_for_status()
+        if first is None:
+            first = r
         batch = r.json()
         if not batch:
             break
         data.extend(batch)
         offset += LIMIT
 
-    return pd.DataFrame(data)
+    df = pd.DataFrame(data)
+    if cache is not None:
+        cache.put("cftc", url, query, df, etag=first.headers.get("ETag"), last_modified=first.headers.get("Last-Modified"))
+    return df
+
+
+def split_raw(df: pd.DataFrame) -> tuple[pd.DataFrame, Optional[pd.DataFrame]]:
+    """Raw reports -> (RAW_COLUMNS, the other columns keyed by id and report date or None)."""
+    unused = [c for c in df.columns if c not in RAW_COLUMNS]
+    if not unused:
+        return df, None
+    keys = [c for c in ["id", "report_date_as_yyyy_mm_dd"] if c in df.columns]
+    return df[[c for c in df.columns if c in RAW_COLUMNS]], df[keys + unused]
+
+
+def compact(df: pd.DataFrame) -> pd.DataFrame:
+    """Processed COT frame reduced to PROCESSED_COLUMNS."""
+    return df[[c for c in PROCESSED_COLUMNS if c in df.columns]]
 
 
 def preprocess(df: pd.DataFrame) -> pd.DataFrame:
@@ -39,16 +112,7 @@ def preprocess(df: pd.DataFrame) -> pd.DataFrame:
     df = df.rename(columns={"report_date_as_yyyy_mm_dd": "date"})
     df["date"] = pd.to_datetime(df["date"])
 
-    num_cols = [
-        "open_interest_all",
-        "comm_positions_long_all",
-        "comm_positions_short_all",
-        "noncomm_positions_long_all",
-        "noncomm_positions_short_all",
-        "nonrept_positions_long_all",
-        "nonrept_positions_short_all",
-    ]
-    df[num_cols] = df[num_cols].apply(pd.to_numeric, errors="coerce").fillna(0)
+    df[POSITION_COLUMNS] = df[POSITION_COLUMNS].apply(pd.to_numeric, errors="coerce").fillna(0)
 
     df = df.sort_values("date").reset_index(drop=True)
     df["Comm_Net"] = df["comm_positions_long_all"] - df["comm_positions_short_all"]
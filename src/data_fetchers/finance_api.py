@@ -1,62 +1,220 @@
 from __future__ import annotations
 
-from functools import lru_cache
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
 
 import pandas as pd
-import yfinance as yf
 
 from src.config.settings import get_settings
+from src.services.fetch_scheduler import rate_limiter
+from src.services.http_cache import cached_frame, response_cache
+
+logger = logging.getLogger(__name__)
+
+TICKERS: Dict[str, str] = {
+    "vix": "^VIX",
+    "btc": "BTC-USD",
+    "eth": "ETH-USD",
+    "spx": "^GSPC",
+    "nasdaq": "^IXIC",
+    "dxy": "DX-Y.NYB",
+    "us10y": "^TNX",
+}
+
+DEFAULT_STARTS: Dict[str, str] = {
+    "vix": "2019-05-12",
+    "btc": "2020-05-12",
+    "eth": "2023-03-28",
+    "spx": "2020-05-12",
+    "nasdaq": "2020-05-12",
+    "dxy": "2020-05-12",
+    "us10y": "2020-05-12",
+}
+
+CHART_PATH = "/v8/finance/chart/{ticker}"
+
+_COLUMNS = {
+    "Date": "date",
+    "Open": "open",
+    "High": "high",
+    "Low": "low",
+    "Close": "close",
+    "Volume": "volume",
+}
+
+
+def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+    return df.reset_index().rename(columns=_COLUMNS)[["date", "open", "high", "low", "close", "volume"]]
+
+
+def _is_intraday(interval: str) -> bool:
+    return interval.endswith(("m", "h")) and not interval.endswith("mo")
+
+
+def _fetch_chart(base_url: str, ticker: str, start: str, interval: str = "1d") -> pd.DataFrame:
+    """Bars from a Yahoo chart-API compatible endpoint (mirror or the local stand-in); daily dates at midnight."""
+    import requests
+
+    params = {
+        "period1": int(pd.Timestamp(start, tz="UTC").timestamp()),
+        "period2": int(pd.Timestamp.now(tz="UTC").timestamp()),
+        "interval": interval,
+    }
+    rate_limiter("yahoo").acquire()
+    r = requests.get(base_url.rstrip("/") + CHART_PATH.format(ticker=ticker), params=params, timeout=get_settings().fetch.timeout)
+    r.raise_for_status()
+    result = (r.json().get("chart", {}).get("result") or [None])[0]
+    if not result or not result.get("timestamp"):
+        return pd.DataFrame(columns=list(_COLUMNS.values()))
+
+    tz = result.get("meta", {}).get("exchangeTimezoneName", "UTC")
+    quote = result["indicators"]["quote"][0]
+    dates = pd.to_datetime(result["timestamp"], unit="s", utc=True).tz_convert(tz)
+    df = pd.DataFrame({
+        "date": dates if _is_intraday(interval) else dates.normalize(),
+        "open": quote["open"],
+        "high": quote["high"],
+        "low": quote["low"],
+        "close": quote["close"],
+        "volume": quote["volume"],
+    })
+    return df.dropna(subset=["close"]).reset_index(drop=True)
+
+
+def _cache_url(ticker: str) -> str:
+    return (get_settings().fetch.yahoo_url or "yfinance").rstrip("/") + CHART_PATH.format(ticker=ticker)
 
 
-@lru_cache(maxsize=None)
 def _fetch_yahoo(ticker: str, start: str, interval: str = "1d") -> pd.DataFrame:
+    """Bars of one ticker since `start` through the response cache (fresh for http_cache.ttl.yahoo)."""
+    params = {"start": start, "interval": interval}
+    return cached_frame("yahoo", _cache_url(ticker), params, lambda: _download(ticker, start, interval))
+
+
+def _download(ticker: str, start: str, interval: str) -> pd.DataFrame:
+    base_url = get_settings().fetch.yahoo_url
+    if base_url:
+        df = _fetch_chart(base_url, ticker, start, interval)
+        if df.empty:
+            raise RuntimeError(f"Failed to load {ticker} from {base_url}")
+        return df
+
+    import yfinance as yf
+
+    rate_limiter("yahoo").acquire()
     df = yf.Ticker(ticker).history(start=start, interval=interval)
     if df.empty:
         raise RuntimeError(f"Failed to load {ticker} from Yahoo Finance")
-
-    df = (
-        df.reset_index()
-        .rename(
-            columns={
-                "Date": "date",
-                "Open": "open",
-                "High": "high",
-                "Low": "low",
-                "Close": "close",
-                "Volume": "volume",
-            }
-        )[
-            ["date", "open", "high", "low", "close", "volume"]
-        ]
+    return _normalize(df)
+
+
+def fetch_intraday(ticker: str, start: str, interval: str = "1h") -> pd.DataFrame:
+    """Intraday bars since `start`; not cached — the tail grows every bar."""
+    return _download(ticker, start, interval)
+
+
+def fetch_yahoo_batch(starts: Dict[str, str], interval: str = "1d") -> Dict[str, pd.DataFrame]:
+    """
+    Several tickers at once: ticker -> bars since its own start (empty frame if none).
+    Tickers with a fresh cached response are not downloaded; the rest come from one multi-ticker
+    yfinance download from the earliest start (with `fetch.yahoo_url` set, concurrent per-ticker
+    requests). A ticker that fails comes back empty; the others are unaffected.
+    """
+    cache = response_cache()
+    out: Dict[str, pd.DataFrame] = {}
+    stale: Dict[str, str] = {}
+    for ticker, start in starts.items():
+        entry = cache.get("yahoo", _cache_url(ticker), {"start": start, "interval": interval}) if cache else None
+        if entry is not None and cache.is_fresh("yahoo", entry):
+            out[ticker] = entry.frame
+        else:
+            stale[ticker] = start
+    if stale:
+        for ticker, df in _download_batch(stale, interval).items():
+            # Пустой ответ не кэшируем: при полной загрузке он ошибка и повторяется
+            if cache is not None and not df.empty:
+                cache.put("yahoo", _cache_url(ticker), {"start": stale[ticker], "interval": interval}, df)
+            out[ticker] = df
+    return {ticker: out[ticker] for ticker in starts}
+
+
+def _download_batch(starts: Dict[str, str], interval: str) -> Dict[str, pd.DataFrame]:
+    cfg = get_settings().fetch
+    if cfg.yahoo_url:
+        return _download_chart_batch(cfg.yahoo_url, starts, interval, cfg.max_workers)
+
+    import yfinance as yf
+
+    tickers = list(starts)
+    rate_limiter("yahoo").acquire()
+    raw = yf.download(
+        tickers,
+        start=min(starts.values()),
+        interval=interval,
+        group_by="ticker",
+        auto_adjust=True,
+        actions=False,
+        ignore_tz=False,
+        threads=True,
+        progress=False,
     )
-    return df
+    if raw is None or raw.empty:
+        raise RuntimeError(f"Failed to load {tickers} from Yahoo Finance")
+
+    out: Dict[str, pd.DataFrame] = {}
+    for ticker, start in starts.items():
+        if ticker not in raw.columns.get_level_values(0):
+            out[ticker] = pd.DataFrame(columns=list(_COLUMNS.values()))
+            continue
+        df = raw[ticker].dropna(how="all")
+        df = df[df.index >= pd.Timestamp(start, tz=df.index.tz)] if df.index.tz else df[df.index >= pd.Timestamp(start)]
+        df.index.name = "Date"
+        out[ticker] = _normalize(df)
+    return out
+
+
+def _download_chart_batch(base_url: str, starts: Dict[str, str], interval: str, max_workers: int) -> Dict[str, pd.DataFrame]:
+    """Chart API has no multi-ticker request: one request per ticker on a thread pool (the yahoo limiter still applies)."""
+
+    def one(ticker: str, start: str) -> pd.DataFrame:
+        try:
+            return _fetch_chart(base_url, ticker, start, interval)
+        except Exception as e:
+            logger.warning("Batch request for %s failed: %s", ticker, e)
+            return pd.DataFrame(columns=list(_COLUMNS.values()))
+
+    workers = max(1, min(max_workers, len(starts)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="yahoo-batch") as pool:
+        futures = {t: pool.submit(one, t, start) for t, start in starts.items()}
+        return {t: f.result() for t, f in futures.items()}
 
 
-def fetch_vix(start: str = "2019-05-12", interval: str = "1d") -> pd.DataFrame:
-    return _fetch_yahoo("^VIX", start, interval)
+def fetch_vix(start: str = DEFAULT_STARTS["vix"], interval: str = "1d") -> pd.DataFrame:
+    return _fetch_yahoo(TICKERS["vix"], start, interval)
 
 
-def fetch_btc(start: str = "2020-05-12", interval: str = "1d") -> pd.DataFrame:
+def fetch_btc(start: str = DEFAULT_STARTS["btc"], interval: str = "1d") -> pd.DataFrame:
     s = get_settings()
-    return _fetch_yahoo("BTC-USD", start or s.raw["assets"]["btc"]["price_start"], interval)
+    return _fetch_yahoo(TICKERS["btc"], start or s.raw["assets"]["btc"]["price_start"], interval)
 
 
-def fetch_eth(start: str = "2023-03-28", interval: str = "1d") -> pd.DataFrame:
+def fetch_eth(start: str = DEFAULT_STARTS["eth"], interval: str = "1d") -> pd.DataFrame:
     s = get_settings()
-    return _fetch_yahoo("ETH-USD", start or s.raw["assets"]["eth"]["price_start"], interval)
+    return _fetch_yahoo(TICKERS["eth"], start or s.raw["assets"]["eth"]["price_start"], interval)
 
 
-def fetch_spx(start: str = "2020-05-12", interval: str = "1d") -> pd.DataFrame:
-    return _fetch_yahoo("^GSPC", start, interval)
+def fetch_spx(start: str = DEFAULT_STARTS["spx"], interval: str = "1d") -> pd.DataFrame:
+    return _fetch_yahoo(TICKERS["spx"], start, interval)
 
 
-def fetch_nasdaq(start: str = "2020-05-12", interval: str = "1d") -> pd.DataFrame:
-    return _fetch_yahoo("^IXIC", start, interval)
+def fetch_nasdaq(start: str = DEFAULT_STARTS["nasdaq"], interval: str = "1d") -> pd.DataFrame:
+    return _fetch_yahoo(TICKERS["nasdaq"], start, interval)
 
 
-def fetch_dxy(start: str = "2020-05-12", interval: str = "1d") -> pd.DataFrame:
-    return _fetch_yahoo("DX-Y.NYB", start, interval)
+def fetch_dxy(start: str = DEFAULT_STARTS["dxy"], interval: str = "1d") -> pd.DataFrame:
+    return _fetch_yahoo(TICKERS["dxy"], start, interval)
 
 
-def fetch_us10y(start: str = "2020-05-12", interval: str = "1d") -> pd.DataFrame:
-    return _fetch_yahoo("^TNX", start, interval)
\ No newline at end of file
+def fetch_us10y(start: str = DEFAULT_STARTS["us10y"], interval: str = "1d") -> pd.DataFrame:
+    return _fetch_yahoo(TICKERS["us10y"], start, interval)
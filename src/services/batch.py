@@ -0,0 +1,276 @@
+"""
+Headless batch commands behind `python main.py <command>` (cron / overnight precompute):
+
+    python main.py update [--full]
+    python main.py signals --asset all --out-dir out --format parquet
+    python main.py conclusion --as-of 2025-06-30 --out-dir out
+    python main.py validate --asset all --start 2021-01-01 --out-dir out --format arrow
+    python main.py backtest --asset BTC --capital 1000 --fee 0.1
+
+Per-asset work runs in the process pool when --workers (default parallel.workers) is > 1.
+Tables are written as Parquet, Arrow IPC, JSON or CSV (--format); summaries (metrics, confusion,
+conclusion) as JSON. Without --out-dir the results are only printed.
+"""
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import datetime as dt
+import json
+import logging
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+ASSETS = ("BTC", "ETH")
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow", "json": ".json", "csv": ".csv"}
+
+
+def _assets(value: str) -> List[str]:
+    return list(ASSETS) if value.lower() == "all" else [value.upper()]
+
+
+def _load_all() -> Dict[str, Optional[pd.DataFrame]]:
+    from src.services.data_loader import load_dataset
+
+    dfs = {name: load_dataset(name) for name in get_settings().files}
+    missing = [name for name, df in dfs.items() if df is None]
+    if missing:
+        raise SystemExit(f"datasets not found: {missing} (run: python main.py update)")
+    return dfs
+
+
+def _json_default(v: Any):
+    if isinstance(v, np.generic):
+        return v.item()
+    return str(v)
+
+
+def _write_json(payload: dict, path: Path) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload, default=_json_default, ensure_ascii=False, indent=2), encoding="utf-8")
+    return path
+
+
+def _write(df: pd.DataFrame, out_dir: Optional[str], stem: str, fmt: str) -> None:
+    from src.utils.helpers import write_table
+
+    if out_dir:
+        print(f"  -> {write_table(df, Path(out_dir) / f'{stem}{FORMATS[fmt]}')}")
+
+
+def _per_asset(dfs: Dict[str, pd.DataFrame], fn: Callable[..., Any], assets: List[str], workers: int, **kwargs) -> dict:
+    """fn(dfs, asset, **kwargs) per asset, in the pool when workers > 1: asset -> result or exception."""
+    if workers > 1 and len(assets) > 1:
+        from src.services.parallel import run_assets_parallel
+
+        return run_assets_parallel(dfs, fn, assets, workers=workers, **kwargs)
+    out: dict = {}
+    for asset in assets:
+        try:
+            out[asset] = fn(dfs, asset, **kwargs)
+        except Exception as e:
+            out[asset] = e
+    return out
+
+
+def _report_failures(results: dict) -> int:
+    failed = {asset: res for asset, res in results.items() if isinstance(res, Exception)}
+    for asset, err in failed.items():
+        logger.error("%s failed: %s", asset, err, exc_info=err)
+        print(f"✗ {asset}: {err}")
+    return len(failed)
+
+
+# -----------
+# Commands
+# -----------
+def cmd_update(args: argparse.Namespace) -> int:
+    from src.services.updater import update_all_data
+
+    status = update_all_data(full=True if args.full else None)
+    for name, st in status.items():
+        print(f"{'✗' if st.startswith('failed') else '✓'} {name}: {st}")
+    return sum(st.startswith("failed") for st in status.values())
+
+
+def cmd_signals(args: argparse.Namespace) -> int:
+    from src.analytics.signal_generator import generate_signals
+
+    dfs = _load_all()
+    assets = _assets(args.asset)
+    if args.workers > 1:
+        from src.services.parallel import generate_signals_many
+
+        # generate_signals_many делит пошаговый цикл актива на чанки по датам, а не только по активам
+        try:
+            results: dict = generate_signals_many(dfs, assets, workers=args.workers)
+        except Exception as e:
+            results = {asset: e for asset in assets}
+    else:
+        results = _per_asset(dfs, generate_signals, assets, 1)
+    for asset, res in results.items():
+        if isinstance(res, Exception):
+            continue
+        last = res.iloc[-1] if not res.empty else None
+        print(f"{asset}: {len(res)} signals" + (f", last {last['date']:%Y-%m-%d} {last['verdict']}" if last is not None else ""))
+        _write(res, args.out_dir, f"signals_{asset.lower()}", args.format)
+    return _report_failures(results)
+
+
+def _conclusion_table(per_asset: dict) -> pd.DataFrame:
+    rows = []
+    for asset, item in per_asset.items():
+        table, total, verdict, confidence = item[:4]
+        for factor, score, rationale in table[["Factor", "Score", "Rationale"]].itertuples(index=False) if not table.empty else []:
+            rows.append({"asset": asset, "factor": factor, "score": float(score), "rationale": rationale,
+                         "total": total, "verdict": verdict, "confidence": confidence})
+    return pd.DataFrame(rows, columns=["asset", "factor", "score", "rationale", "total", "verdict", "confidence"])
+
+
+def cmd_conclusion(args: argparse.Namespace) -> int:
+    from src.analytics.conclusion_timeline import timeline_for, timeline_range
+    from src.analytics.signal_generator import generate_conclusion
+    from src.services.data_loader import filter_df
+
+    dfs = _load_all()
+    start, end = timeline_range(dfs)
+    as_of = args.as_of or end
+
+    timeline = timeline_for(dfs)
+    if timeline is not None and timeline.covers(as_of):
+        concl, source = timeline.at(as_of), "timeline"
+    else:
+        concl, source = generate_conclusion({k: filter_df(v, start, as_of) for k, v in dfs.items()}), "computed"
+    per_asset, combined_score, combined_verdict = concl[:3]
+    combined_narrative = concl[3] if len(concl) > 3 else ""
+
+    payload = {
+        "as_of": as_of.isoformat(),
+        "source": source,
+        "combined": {"score": combined_score, "verdict": combined_verdict, "narrative": combined_narrative},
+        "assets": {},
+    }
+    for asset, item in per_asset.items():
+        table, total, verdict, confidence = item[:4]
+        payload["assets"][asset] = {
+            "total": total,
+            "verdict": verdict,
+            "confidence": confidence,
+            "narrative": item[4] if len(item) > 4 else "",
+            "factors": table.rename(columns=str.lower).to_dict("records") if not table.empty else [],
+        }
+        print(f"{asset}: {total:+.2f} → {verdict} (confidence {confidence:.2f})")
+    print(f"Combined: {combined_score:+.2f} → {combined_verdict} [{source}, as of {as_of}]")
+
+    if args.out_dir:
+        stem = f"conclusion_{as_of.isoformat()}"
+        if args.format == "json":
+            print(f"  -> {_write_json(payload, Path(args.out_dir) / f'{stem}.json')}")
+        else:
+            _write(_conclusion_table(per_asset), args.out_dir, stem, args.format)
+    return 0
+
+
+def cmd_validate(args: argparse.Namespace) -> int:
+    from src.analytics.trend_validation import run_trend_validation
+
+    dfs = _load_all()
+    capital = args.capital if args.capital is not None else get_settings().backtest.initial_capital_default
+    results = _per_asset(dfs, run_trend_validation, _assets(args.asset), args.workers,
+                         initial_capital=capital, start_date=args.start, end_date=args.end)
+    for asset, res in results.items():
+        if isinstance(res, Exception):
+            continue
+        print(f"{asset}: " + ", ".join(f"{k}={v:.4f}" for k, v in res.metrics.items() if isinstance(v, (int, float))))
+        stem = f"validate_{asset.lower()}"
+        _write(res.equity_curve, args.out_dir, f"{stem}_equity", args.format)
+        _write(res.signals, args.out_dir, f"{stem}_signals", args.format)
+        _write(res.horizons, args.out_dir, f"{stem}_horizons", args.format)
+        if args.out_dir:
+            print(f"  -> {_write_json({'metrics': res.metrics, 'confusion': res.confusion}, Path(args.out_dir) / f'{stem}.json')}")
+    return _report_failures(results)
+
+
+def cmd_backtest(args: argparse.Namespace) -> int:
+    from src.analytics.backtest import run_backtest
+
+    s = get_settings()
+    dfs = _load_all()
+    capital = args.capital if args.capital is not None else s.backtest.initial_capital_default
+    # --fee в процентах, как в UI; run_backtest принимает долю
+    fee = args.fee / 100 if args.fee is not None else s.backtest.fee_default
+    results = _per_asset(dfs, run_backtest, _assets(args.asset), args.workers,
+                         initial_capital=capital, fee_pct=fee, start_date=args.start, end_date=args.end)
+    for asset, res in results.items():
+        if isinstance(res, Exception):
+            continue
+        print(f"{asset}: " + ", ".join(f"{k}={v:.4f}" for k, v in res.metrics.items()))
+        stem = f"backtest_{asset.lower()}"
+        _write(res.equity_curve, args.out_dir, f"{stem}_equity", args.format)
+        if args.out_dir:
+            summary = {"metrics": res.metrics, "trade_log": res.trade_log_path}
+            print(f"  -> {_write_json(summary, Path(args.out_dir) / f'{stem}.json')}")
+    return _report_failures(results)
+
+
+# -----------
+# Parser
+# -----------
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="main.py", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command")
+
+    p = sub.add_parser("update", help="download and process all datasets (default command)")
+    p.add_argument("--full", action="store_true", help="full refresh instead of incremental")
+    p.set_defaults(func=cmd_update)
+
+    def common(p: argparse.ArgumentParser, asset: bool = True, default_format: str = "parquet") -> None:
+        if asset:
+            p.add_argument("--asset", default="all", help="BTC, ETH or all")
+        p.add_argument("--out-dir", default=None, help="write results to this directory")
+        p.add_argument("--format", choices=list(FORMATS), default=default_format, help="table format")
+        p.add_argument("--workers", type=int, default=None, help="process pool size (default: parallel.workers)")
+
+    p = sub.add_parser("signals", help="Compass / legacy signals (generate_signals)")
+    common(p)
+    p.set_defaults(func=cmd_signals)
+
+    p = sub.add_parser("conclusion", help="conclusion of the Conclusion tab as of a date")
+    common(p, asset=False, default_format="json")
+    p.add_argument("--as-of", type=dt.date.fromisoformat, default=None, help="YYYY-MM-DD (default: latest data date)")
+    p.set_defaults(func=cmd_conclusion)
+
+    for name, fn, help_text in [
+        ("validate", cmd_validate, "trend validation (run_trend_validation)"),
+        ("backtest", cmd_backtest, "trading backtest (run_backtest)"),
+    ]:
+        p = sub.add_parser(name, help=help_text)
+        common(p)
+        p.add_argument("--start", type=dt.date.fromisoformat, default=None, help="YYYY-MM-DD")
+        p.add_argument("--end", type=dt.date.fromisoformat, default=None, help="YYYY-MM-DD")
+        p.add_argument("--capital", type=float, default=None, help="initial capital (default: backtest.initial_capital_default)")
+        if name == "backtest":
+            p.add_argument("--fee", type=float, default=None, help="fee, %% per trade (default: backtest.fee_default)")
+        p.set_defaults(func=fn)
+    return parser
+
+
+def cli(argv: Optional[List[str]] = None) -> int:
+    """Entry point of `python main.py`: runs the command, returns the number of failures (exit code)."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        args = parser.parse_args(["update", *(argv or [])])
+    if getattr(args, "workers", None) is None and args.command != "update":
+        args.workers = get_settings().parallel.workers
+    if getattr(args, "workers", 1) > 1:
+        s = get_settings()
+        s.parallel = dataclasses.replace(s.parallel, workers=args.workers)
+    return min(args.func(args), 1)
@@ -1,26 +1,27 @@
 from __future__ import annotations
 
+import weakref
 from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Optional, Sequence
 
+import numpy as np
 import pandas as pd
 
 from src.config.settings import get_settings
+from src.services.storage import coerce_dtypes, read_dataset
+from src.services.tracing import traced
 
+_PANDAS_3 = int(pd.__version__.split(".")[0]) >= 3
 
-@lru_cache(maxsize=None)
-def load_dataset(name: str, tz_aware: bool = True) -> Optional[pd.DataFrame]:
-    s = get_settings()
-    rel_path = s.files.get(name)
-    if not rel_path:
-        return None
 
-    path = Path(s.data_dir) / rel_path
-    if not path.exists():
-        return None
+def _copy_on_write() -> bool:
+    """Copy-on-write in effect (always with pandas 3; opt-in via mode.copy_on_write before)."""
+    return _PANDAS_3 or pd.get_option("mode.copy_on_write") is True
+
 
-    df = pd.read_csv(path)
+def parse_dates(df: pd.DataFrame, tz_aware: bool = True) -> pd.DataFrame:
+    """Parses the CSV `date` column (mixed tz offsets -> naive UTC when tz_aware)."""
     if "date" in df.columns:
         dt_series = pd.to_datetime(df["date"], utc=tz_aware, errors="coerce")
         if tz_aware:
@@ -30,37 +31,172 @@ def load_dataset(name: str, tz_aware: bool = True) -> Optional[pd.DataFrame]:
     return df
 
 
-def all_data_loaded(dfs: Dict[str, Optional[pd.DataFrame]]) -> bool:
-    return all(df is not None and not df.empty for df in dfs.values())
+def load_dataset(name: str, tz_aware: bool = True, columns: Optional[Sequence[str]] = None) -> Optional[pd.DataFrame]:
+    """
+    Processed dataset `name` (cached per process) with the dtypes of its schema (settings.dtypes).
+    With `columns` only those columns are read from storage (missing ones are skipped); every
+    distinct selection is cached separately.
+    """
+    return _load_dataset(name, tz_aware, None if columns is None else tuple(columns))
 
 
-def filter_df(df: Optional[pd.DataFrame], start, end) -> pd.DataFrame:
-    if df is None or df.empty:
-        return pd.DataFrame()
+@lru_cache(maxsize=None)
+@traced("data.load_dataset")
+def _load_dataset(name: str, tz_aware: bool, columns: Optional[tuple[str, ...]]) -> Optional[pd.DataFrame]:
+    s = get_settings()
+    rel_path = s.files.get(name)
+    if not rel_path:
+        return None
 
-    if "date" not in df.columns:
-        return pd.DataFrame()
+    df, backend = read_dataset(Path(s.data_dir) / rel_path, columns=columns)
+    if df is None:
+        return None
 
+    if backend == "csv":
+        df = parse_dates(df, tz_aware)
+    # Бинарные бэкенды уже хранят даты как naive UTC (int64 epoch).
+    elif "date" in df.columns and not tz_aware:
+        df["date"] = df["date"].dt.tz_localize("UTC")
+    return coerce_dtypes(df, s.dtypes.schema(name))
+
+
+# updater и бенчмарки сбрасывают кэш через load_dataset.cache_clear()
+load_dataset.cache_clear = _load_dataset.cache_clear
+
+
+def all_data_loaded(dfs: Dict[str, Optional[pd.DataFrame]]) -> bool:
+    return all(df is not None and not df.empty for df in dfs.values())
+
+
+def _filter_mask(df: pd.DataFrame, start, end) -> pd.DataFrame:
+    """Rows with normalized date in [start, end] by boolean mask (copies); for unsorted dates or NaT."""
     dt_col = df["date"]
     if not pd.api.types.is_datetime64_any_dtype(dt_col):
-        # OPTIMIZED: не делаем лишний df.copy(); преобразуем только колонку, как и раньше.
         dt_col = pd.to_datetime(dt_col, errors="coerce")
-
-    # OPTIMIZED: эквивалентно dt.date.between(start,end), но без создания массива python-date.
-    # Для tz-aware (если вдруг прилетит) — поведение близко к dt.date (сначала "снимаем" tz).
-    if pd.api.types.is_datetime64tz_dtype(dt_col):
+    if isinstance(dt_col.dtype, pd.DatetimeTZDtype):
         dt_col = dt_col.dt.tz_localize(None)
 
-    dt_norm = dt_col.dt.normalize()
-    start_ts = pd.Timestamp(start).normalize()
-    end_ts = pd.Timestamp(end).normalize()
-
-    mask = dt_norm.between(start_ts, end_ts, inclusive="both")
-    out = df.loc[mask].copy()  # OPTIMIZED: копируем только отфильтрованную часть
+    mask = dt_col.dt.normalize().between(pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize(), inclusive="both")
+    out = df.loc[mask].copy()
     if out.empty:
         return out.reset_index(drop=True)
-
     if out["date"] is not dt_col:
-        # Если мы создавали dt_col отдельно (не dtype datetime), синхронизируем столбец "date"
         out["date"] = dt_col.loc[mask].values
-    return out.reset_index(drop=True)
\ No newline at end of file
+    return out.reset_index(drop=True)
+
+
+class DateView:
+    """
+    Date-range slices of one frame. The date column is checked once (sorted, no NaT); every
+    (start, end) query is then two searchsorted calls and a positional slice that shares the
+    frame's memory. Copy-on-write keeps the shared frame read-only through the slice: writes
+    copy the slice first and exported arrays are not writeable (without copy-on-write, i.e.
+    pandas < 3 without mode.copy_on_write, slices are copied instead).
+
+    The view holds only a weak reference to the frame and the converted date column, so the
+    registry entry (date_view) does not keep the frame alive.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        dt_col = df["date"]
+        if not pd.api.types.is_datetime64_any_dtype(dt_col):
+            dt_col = pd.to_datetime(dt_col, errors="coerce")
+        if isinstance(dt_col.dtype, pd.DatetimeTZDtype):
+            dt_col = dt_col.dt.tz_localize(None)  # локальное время, как dt.date
+        self._frame = weakref.ref(df)
+        # Приведённые даты считаются один раз на фрейм; в срез подставляются вместо исходной колонки
+        self._converted = dt_col is not df["date"]
+        self._dates = dt_col.to_numpy()
+        d = self._dates
+        self.sorted = bool(len(d) == 0 or (not np.isnat(d).any() and (d[1:] >= d[:-1]).all()))
+
+    @property
+    def df(self) -> pd.DataFrame:
+        df = self._frame()
+        if df is None:
+            raise ReferenceError("the frame of this DateView no longer exists")
+        return df
+
+    def bounds(self, start, end) -> tuple[int, int]:
+        """Positions [lo, hi) of the rows whose normalized date lies in [start, end]."""
+        lo_ts = pd.Timestamp(start).normalize().to_datetime64()
+        hi_ts = (pd.Timestamp(end).normalize() + pd.Timedelta(days=1)).to_datetime64()
+        lo = int(self._dates.searchsorted(lo_ts.astype(self._dates.dtype), side="left"))
+        hi = int(self._dates.searchsorted(hi_ts.astype(self._dates.dtype), side="left"))
+        return lo, max(lo, hi)
+
+    def slice(self, start, end) -> pd.DataFrame:
+        if not self.sorted:
+            return _filter_mask(self.df, start, end)
+        lo, hi = self.bounds(start, end)
+        out = self.df.iloc[lo:hi]
+        out = out.reset_index(drop=True) if _copy_on_write() else out.copy().reset_index(drop=True)
+        if self._converted:
+            out["date"] = self._dates[lo:hi]
+        return out
+
+
+# id(frame) -> (weakref на фрейм, DateView); запись удаляется вместе с фреймом.
+_VIEWS: Dict[int, tuple[weakref.ref, DateView]] = {}
+
+
+def _drop_view(ref: weakref.ref, key: int) -> None:
+    hit = _VIEWS.get(key)
+    if hit is not None and hit[0] is ref:
+        del _VIEWS[key]
+
+
+def date_view(df: pd.DataFrame) -> DateView:
+    """DateView of `df`, built on first use and kept while the frame is alive."""
+    key = id(df)
+    hit = _VIEWS.get(key)
+    if hit is not None and hit[0]() is df:
+        return hit[1]
+    view = DateView(df)
+    _VIEWS[key] = (weakref.ref(df, lambda ref, k=key: _drop_view(ref, k)), view)
+    return view
+
+
+def filter_df(df: Optional[pd.DataFrame], start, end) -> pd.DataFrame:
+    """Rows of `df` whose normalized date lies in [start, end], as a zero-copy view (see DateView)."""
+    if df is None or df.empty:
+        return pd.DataFrame()
+
+    if "date" not in df.columns:
+        return pd.DataFrame()
+
+    return date_view(df).slice(start, end)
+
+
+def first_change(old: Optional[pd.DataFrame], new: Optional[pd.DataFrame]) -> Optional[pd.Timestamp]:
+    """
+    Normalized date of the first row where two versions of a dataset differ (rows appended, revised
+    or dropped); None when they are equal. Rows before it are identical in both versions.
+    """
+    if old is None or new is None or old.empty or new.empty:
+        if (old is None or old.empty) and (new is None or new.empty):
+            return None
+        frame = new if new is not None and not new.empty else old
+        return pd.Timestamp(frame["date"].min()).normalize()
+    if set(old.columns) != set(new.columns):
+        return pd.Timestamp(min(old["date"].iat[0], new["date"].iat[0])).normalize()
+    n = min(len(old), len(new))
+    differs = np.zeros(n, dtype=bool)
+    for col in new.columns:
+        a, b = old[col].to_numpy()[:n], new[col].to_numpy()[:n]
+        # Пропуски (NaN, NaT, None в object/category) на одном месте считаются равными
+        differs |= ~((a == b) | (pd.isna(a) & pd.isna(b)))
+    hits = np.flatnonzero(differs)
+    if len(hits):
+        i = int(hits[0])
+        return pd.Timestamp(min(old["date"].iat[i], new["date"].iat[i])).normalize()
+    if len(old) != len(new):
+        longer = new if len(new) > len(old) else old
+        return pd.Timestamp(longer["date"].iat[n]).normalize()
+    return None
+
+
+def earliest_change(old: Dict[str, Optional[pd.DataFrame]], new: Dict[str, Optional[pd.DataFrame]]) -> Optional[pd.Timestamp]:
+    """Earliest first_change over the datasets of `new` (None if nothing changed)."""
+    changes = [c for name in new if (c := first_change(old.get(name), new.get(name))) is not None]
+    return min(changes) if changes else None
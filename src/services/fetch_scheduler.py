@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from src.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FetchResult:
+    name: str
+    source: str
+    value: Any = None
+    error: Optional[BaseException] = None
+    attempts: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class RateLimiter:
+    """Spaces calls of one source at least 1/rate seconds apart (thread-safe); rate <= 0 disables it."""
+
+    def __init__(self, rate: float, clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def acquire(self) -> None:
+        if self.interval <= 0:
+            return
+        with self._lock:
+            now = self._clock()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            self._sleep(slot - now)
+
+
+_LIMITERS: Dict[str, RateLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def rate_limiter(source: str) -> RateLimiter:
+    """Process-wide limiter of `source` (fetch.rate_limits); the fetchers acquire it before every HTTP request."""
+    rate = get_settings().fetch.rate_limits.get(source, 0.0)
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(source)
+        if limiter is None or limiter.rate != rate:
+            limiter = _LIMITERS[source] = RateLimiter(rate)
+        return limiter
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Delay before retry number `attempt` (1-based): base * 2**(attempt-1), capped."""
+    return min(cap, base * (2 ** (attempt - 1)))
+
+
+class FetchScheduler:
+    """
+    Runs named fetch jobs concurrently on a bounded thread pool.
+
+    Every job belongs to a source ("yahoo", "cftc", ...): each HTTP request of a job passes the
+    source's rate_limiter (acquired by the fetchers, so paginated and per-ticker requests count),
+    failed attempts are retried with exponential backoff, and a job that exhausts its retries is
+    reported in its FetchResult without affecting the other jobs.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        retries: Optional[int] = None,
+        backoff_base: Optional[float] = None,
+        backoff_max: Optional[float] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        cfg = get_settings().fetch
+        self.max_workers = int(max_workers or cfg.max_workers)
+        self.retries = int(cfg.retries if retries is None else retries)
+        self.backoff_base = float(cfg.backoff_base if backoff_base is None else backoff_base)
+        self.backoff_max = float(cfg.backoff_max if backoff_max is None else backoff_max)
+        self._sleep = sleep
+
+    def _run_one(self, name: str, source: str, fn: Callable[[], Any]) -> FetchResult:
+        res = FetchResult(name=name, source=source)
+        t0 = time.perf_counter()
+        for attempt in range(1, self.retries + 2):
+            res.attempts = attempt
+            try:
+                res.value = fn()
+                res.error = None
+                break
+            except Exception as e:
+                res.error = e
+                if attempt > self.retries:
+                    logger.error("Fetch %s (%s) failed after %d attempts: %s", name, source, attempt, e)
+                    break
+                delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+                logger.warning("Fetch %s (%s) attempt %d failed: %s; retry in %.1fs", name, source, attempt, e, delay)
+                self._sleep(delay)
+        res.elapsed = time.perf_counter() - t0
+        return res
+
+    def run(self, jobs: Dict[str, Tuple[str, Callable[[], Any]]]) -> Dict[str, FetchResult]:
+        """jobs: name -> (source, zero-arg callable). Returns name -> FetchResult in job order."""
+        if not jobs:
+            return {}
+        workers = max(1, min(self.max_workers, len(jobs)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fetch") as pool:
+            futures = {name: pool.submit(self._run_one, name, source, fn) for name, (source, fn) in jobs.items()}
+            return {name: f.result() for name, f in futures.items()}
@@ -0,0 +1,225 @@
+"""
+On-disk cache of fetcher responses (`http_cache:` in config.yaml), shared by app sessions and restarts:
+
+    cache/http/<source>/<key>.feather   the parsed frame of the response
+    cache/http/<source>/<key>.json      url, query, fetch time and the ETag / Last-Modified validators
+
+A response younger than `ttl[source]` seconds is served without touching the network. An older one
+is revalidated where the upstream supports it (CFTC Socrata: If-None-Match / If-Modified-Since; a 304
+reuses the stored frame without re-downloading or re-parsing) and re-fetched otherwise (Yahoo).
+
+Invalidation: expire() marks entries stale but keeps their validators (a full refresh still gets 304s
+from CFTC), invalidate() deletes them.
+
+    python -m src.services.http_cache --stats
+    python -m src.services.http_cache --invalidate [--source cftc]
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Mapping, Optional
+
+import pandas as pd
+
+from src.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+SOURCES = ("yahoo", "cftc")
+
+
+@dataclass
+class CachedResponse:
+    frame: pd.DataFrame
+    fetched_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Validators for a conditional GET (empty if the upstream sent none)."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def cache_key(source: str, url: str, params: Optional[Mapping[str, object]] = None) -> str:
+    payload = json.dumps([source, url, sorted((str(k), str(v)) for k, v in (params or {}).items())])
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ResponseCache:
+    """
+    Parsed responses by (source, url, query) in `directory`; `clock` returns epoch seconds.
+    Writes are atomic (frame first, metadata last), so concurrent sessions can share the directory.
+    """
+
+    def __init__(self, directory: str | Path, ttl: Mapping[str, float], clock: Callable[[], float] = time.time):
+        self.dir = Path(directory)
+        self.ttl = dict(ttl)
+        self.clock = clock
+
+    def _paths(self, source: str, key: str) -> tuple[Path, Path]:
+        root = self.dir / source
+        return root / f"{key}.feather", root / f"{key}.json"
+
+    @staticmethod
+    def _replace(path: Path, write: Callable[[Path], None]) -> None:
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        write(tmp)
+        os.replace(tmp, path)
+
+    def get(self, source: str, url: str, params: Optional[Mapping[str, object]] = None) -> Optional[CachedResponse]:
+        frame_path, meta_path = self._paths(source, cache_key(source, url, params))
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            frame = pd.read_feather(frame_path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Unreadable http cache entry %s: %s", meta_path, e)
+            return None
+        return CachedResponse(frame, float(meta["fetched_at"]), meta.get("etag"), meta.get("last_modified"))
+
+    def is_fresh(self, source: str, entry: CachedResponse) -> bool:
+        return self.clock() - entry.fetched_at < self.ttl.get(source, 0.0)
+
+    def _write_meta(self, source: str, key: str, url: str, params, entry: CachedResponse) -> None:
+        meta = {
+            "url": url,
+            "params": {str(k): str(v) for k, v in (params or {}).items()},
+            "fetched_at": entry.fetched_at,
+            "etag": entry.etag,
+            "last_modified": entry.last_modified,
+        }
+        _frame, meta_path = self._paths(source, key)
+        self._replace(meta_path, lambda p: p.write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8"))
+
+    def put(
+        self,
+        source: str,
+        url: str,
+        params: Optional[Mapping[str, object]],
+        frame: pd.DataFrame,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> CachedResponse:
+        entry = CachedResponse(frame, self.clock(), etag, last_modified)
+        key = cache_key(source, url, params)
+        frame_path, _meta = self._paths(source, key)
+        try:
+            frame_path.parent.mkdir(parents=True, exist_ok=True)
+            self._replace(frame_path, lambda p: frame.reset_index(drop=True).to_feather(p))
+            self._write_meta(source, key, url, params, entry)
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning("Failed to cache %s response %s: %s", source, url, e)
+        return entry
+
+    def revalidated(self, source: str, url: str, params: Optional[Mapping[str, object]], entry: CachedResponse) -> CachedResponse:
+        """The upstream answered 304: the stored frame is current again from now on."""
+        entry = CachedResponse(entry.frame, self.clock(), entry.etag, entry.last_modified)
+        self._write_meta(source, cache_key(source, url, params), url, params, entry)
+        return entry
+
+    def _metas(self, source: Optional[str] = None):
+        for src in [source] if source else SOURCES:
+            yield from (self.dir / src).glob("*.json") if (self.dir / src).exists() else ()
+
+    def expire(self, source: Optional[str] = None) -> int:
+        """Marks the entries of `source` (all by default) stale; validators are kept. Returns the count."""
+        n = 0
+        for path in self._metas(source):
+            try:
+                meta = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            meta["fetched_at"] = 0.0
+            self._replace(path, lambda p: p.write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8"))
+            n += 1
+        return n
+
+    def invalidate(self, source: Optional[str] = None) -> int:
+        """Deletes the entries of `source` (all by default). Returns the count."""
+        n = 0
+        for path in list(self._metas(source)):
+            path.unlink(missing_ok=True)
+            path.with_suffix(".feather").unlink(missing_ok=True)
+            n += 1
+        return n
+
+    def stats(self) -> Dict[str, tuple[int, int]]:
+        """source -> (entries, bytes on disk)."""
+        out = {}
+        for src in SOURCES:
+            files = list((self.dir / src).glob("*")) if (self.dir / src).exists() else []
+            out[src] = (sum(p.suffix == ".json" for p in files), sum(p.stat().st_size for p in files))
+        return out
+
+
+_CACHE: ResponseCache | None = None
+
+
+def response_cache() -> Optional[ResponseCache]:
+    """The configured cache (None when http_cache.enabled is false)."""
+    global _CACHE
+    cfg = get_settings().http_cache
+    if not cfg.enabled:
+        return None
+    if _CACHE is None or _CACHE.dir != Path(cfg.dir) or _CACHE.ttl != cfg.ttl:
+        _CACHE = ResponseCache(cfg.dir, cfg.ttl)
+    return _CACHE
+
+
+def cached_frame(source: str, url: str, params: Optional[Mapping[str, object]], fetch: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+    """fetch() through the cache for sources without validators: served while fresh, re-fetched after."""
+    cache = response_cache()
+    if cache is None:
+        return fetch()
+    entry = cache.get(source, url, params)
+    if entry is not None and cache.is_fresh(source, entry):
+        return entry.frame
+    return cache.put(source, url, params, fetch()).frame
+
+
+def expire(source: Optional[str] = None) -> int:
+    cache = response_cache()
+    return cache.expire(source) if cache is not None else 0
+
+
+def invalidate(source: Optional[str] = None) -> int:
+    cache = response_cache()
+    return cache.invalidate(source) if cache is not None else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stats", action="store_true", help="entries and size per source")
+    parser.add_argument("--expire", action="store_true", help="mark entries stale (keep validators)")
+    parser.add_argument("--invalidate", action="store_true", help="delete entries")
+    parser.add_argument("--source", choices=SOURCES, default=None)
+    args = parser.parse_args()
+
+    cfg = get_settings().http_cache
+    cache = ResponseCache(cfg.dir, cfg.ttl)
+    if args.expire:
+        print(f"expired {cache.expire(args.source)} entries")
+    elif args.invalidate:
+        print(f"removed {cache.invalidate(args.source)} entries")
+    elif args.stats:
+        for src, (n, size) in cache.stats().items():
+            print(f"{src:6s} {n:4d} entries {size / 1024:9.1f} KiB  ttl {cfg.ttl.get(src, 0):.0f}s")
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
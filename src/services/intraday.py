@@ -0,0 +1,247 @@
+"""
+Intraday bars (`intraday.interval`, hourly by default) of the assets in `intraday.assets`, stored one
+partition per calendar month (UTC) with the configured storage backend:
+
+    data_dir/intraday/btc/1h/2025-01.csv        (.feather / _npy for the binary backends)
+
+Partitions are read one at a time (iter_bars), so the hourly history is never materialized whole;
+resample() streams them into daily or weekly OHLCV bars shaped like the daily price datasets, which
+the dashboards and generate_signals accept in place of `dfs["btc"]`; with intraday.serve_daily the
+app does exactly that (daily_bars).
+
+    python -m src.services.intraday --update
+    python -m src.services.intraday --resample W --asset btc [--out btc_weekly.parquet]
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import re
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.config.settings import get_settings
+from src.services.data_loader import parse_dates
+from src.services.storage import coerce_dtypes, read_dataset, write_dataset
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ["date", "open", "high", "low", "close", "volume"]
+RULES = ("D", "W")
+
+_MONTH = re.compile(r"^(\d{4}-\d{2})")
+
+
+def _root(asset: str, interval: Optional[str] = None) -> Path:
+    s = get_settings()
+    return Path(s.data_dir) / s.intraday.dir / asset.lower() / (interval or s.intraday.interval)
+
+
+def _partition(asset: str, month: str, interval: Optional[str] = None) -> Path:
+    # Путь в терминах CSV: storage.dataset_path сам меняет его под бэкенд
+    return _root(asset, interval) / f"{month}.csv"
+
+
+def partitions(asset: str, interval: Optional[str] = None) -> List[str]:
+    """Stored months ("YYYY-MM") of `asset`, oldest first (whatever backend wrote them)."""
+    root = _root(asset, interval)
+    if not root.exists():
+        return []
+    return sorted({m.group(1) for p in root.iterdir() if (m := _MONTH.match(p.name)) and not p.name.endswith(".tmp")})
+
+
+def _read_partition(path: Path, columns: Optional[Sequence[str]] = None) -> Optional[pd.DataFrame]:
+    df, backend = read_dataset(path, columns=columns)
+    if df is None:
+        return None
+    # Бинарные бэкенды хранят naive UTC; в CSV строки с offset'ом
+    return parse_dates(df) if backend == "csv" else df
+
+
+def write_bars(asset: str, bars: pd.DataFrame, interval: Optional[str] = None) -> List[str]:
+    """
+    Merges `bars` into the monthly partitions of `asset` (dates -> naive UTC; for the same timestamp
+    the new bar wins) and returns the months rewritten. Only the touched partitions are read.
+    """
+    if bars.empty:
+        return []
+    s = get_settings()
+    new = parse_dates(bars[[c for c in COLUMNS if c in bars.columns]].copy())
+    new = new.dropna(subset=["date"])
+    months = new["date"].dt.strftime("%Y-%m")
+    written = []
+    for month, part in new.groupby(months, sort=True):
+        path = _partition(asset, month, interval)
+        old = _read_partition(path)
+        merged = part if old is None else pd.concat([old, part], ignore_index=True)
+        merged = merged[~merged["date"].duplicated(keep="last")].sort_values("date").reset_index(drop=True)
+        write_dataset(merged, path, dtypes=s.dtypes.schema(asset.lower()))
+        written.append(month)
+    return written
+
+
+def last_timestamp(asset: str, interval: Optional[str] = None) -> Optional[pd.Timestamp]:
+    """Latest stored bar (naive UTC) or None."""
+    months = partitions(asset, interval)
+    if not months:
+        return None
+    df = _read_partition(_partition(asset, months[-1], interval), columns=["date"])
+    return None if df is None or df.empty else pd.Timestamp(df["date"].max())
+
+
+def iter_bars(
+    asset: str,
+    start=None,
+    end=None,
+    columns: Optional[Sequence[str]] = None,
+    interval: Optional[str] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Bars of `asset` in [start, end] (naive UTC; dates are inclusive, `end` up to the end of its day),
+    one monthly chunk at a time. With `columns` only those (plus `date`) are read.
+    """
+    lo = pd.Timestamp(start) if start is not None else None
+    hi = pd.Timestamp(end) if end is not None else None
+    if hi is not None and hi == hi.normalize():
+        hi = hi + pd.Timedelta(days=1) - pd.Timedelta(1, "ns")
+    cols = None if columns is None else ["date", *[c for c in columns if c != "date"]]
+    for month in partitions(asset, interval):
+        if (lo is not None and month < lo.strftime("%Y-%m")) or (hi is not None and month > hi.strftime("%Y-%m")):
+            continue
+        df = _read_partition(_partition(asset, month, interval), columns=cols)
+        if df is None or df.empty:
+            continue
+        if lo is not None or hi is not None:
+            d = df["date"]
+            df = df[((d >= lo) if lo is not None else True) & ((d <= hi) if hi is not None else True)]
+        if not df.empty:
+            yield df.reset_index(drop=True)
+
+
+# -----------
+# Resampling
+# -----------
+def _reduce(date: np.ndarray, cols: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """OHLCV per run of equal `date` (sorted): first open, max high, min low, last close, summed volume."""
+    first = np.flatnonzero(np.r_[True, date[1:] != date[:-1]])
+    last = np.r_[first[1:], len(date)] - 1
+    out = {"date": date[first], "open": cols["open"][first]}
+    out["high"] = np.fmax.reduceat(cols["high"], first)
+    out["low"] = np.fmin.reduceat(cols["low"], first)
+    out["close"] = cols["close"][last]
+    if "volume" in cols:
+        out["volume"] = np.add.reduceat(cols["volume"], first)
+    return pd.DataFrame(out)
+
+
+def _aggregate(df: pd.DataFrame, rule: str, tz: str) -> pd.DataFrame:
+    """Bins of one sorted chunk per day / Monday-based week of `tz`; `date` is the bin start (local)."""
+    local = df["date"] if tz == "UTC" else df["date"].dt.tz_localize("UTC").dt.tz_convert(tz).dt.tz_localize(None)
+    days = local.to_numpy().astype("datetime64[D]")
+    if rule == "W":
+        # 1970-01-01 — четверг: сдвиг на 3 дня даёт недели с понедельника
+        days = days - ((days.astype(np.int64) + 3) % 7).astype("timedelta64[D]")
+    cols = {c: df[c].to_numpy(dtype=float) for c in COLUMNS[1:] if c in df.columns}
+    if "volume" in cols:
+        cols["volume"] = np.nan_to_num(cols["volume"])
+    return _reduce(days, cols)
+
+
+def resample(
+    asset: str,
+    rule: str = "D",
+    start=None,
+    end=None,
+    tz: str = "UTC",
+    interval: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Daily ("D") or weekly ("W", Monday-based) OHLCV of the stored intraday bars, bins in time zone `tz`,
+    streamed partition by partition: only one month of intraday bars is in memory at a time. The frame
+    matches the daily price datasets as loaded by load_dataset (`date` naive UTC of the bin start).
+    """
+    if rule not in RULES:
+        raise ValueError(f"Unknown rule {rule!r} (expected one of {RULES})")
+    pieces = [_aggregate(chunk, rule, tz) for chunk in iter_bars(asset, start, end, columns=COLUMNS[1:], interval=interval)]
+    if not pieces:
+        return pd.DataFrame(columns=COLUMNS)
+    bins = pd.concat(pieces, ignore_index=True)
+    # Корзина на стыке месяцев (недели, сутки не в UTC) пришла из двух чанков — сводим повторно
+    out = _reduce(bins["date"].to_numpy(), {c: bins[c].to_numpy() for c in bins.columns if c != "date"})
+    out["date"] = pd.DatetimeIndex(out["date"]).tz_localize(tz).tz_convert("UTC").tz_localize(None)
+    return coerce_dtypes(out, get_settings().dtypes.schema(asset.lower()))
+
+
+def resampled_frames(rule: str = "D", tz: str = "UTC") -> Dict[str, pd.DataFrame]:
+    """Resampled bars of every configured intraday asset: name -> frame (assets without partitions skipped)."""
+    out = {}
+    for asset in get_settings().intraday.assets:
+        df = resample(asset, rule, tz=tz)
+        if not df.empty:
+            out[asset] = df
+    return out
+
+
+def daily_bars(asset: str, daily: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
+    """
+    The stored daily dataset of `asset` with the days covered by its intraday partitions replaced by
+    resample(asset, "D") (UTC days), so the latest bar reflects the last hourly bar. Days before the
+    first partition — beyond intraday.lookback_days — stay as stored; without partitions `daily` is
+    returned unchanged.
+    """
+    bars = resample(asset, "D")
+    if bars.empty or daily is None or daily.empty:
+        return daily if bars.empty else bars
+    head = daily[daily["date"] < bars["date"].iloc[0]]
+    out = pd.concat([head, bars[[c for c in daily.columns if c in bars.columns]]], ignore_index=True)
+    return coerce_dtypes(out, get_settings().dtypes.schema(asset.lower()))
+
+
+# -----------
+# Update
+# -----------
+def fetch_start(asset: str, now: Optional[pd.Timestamp] = None) -> str:
+    """Start of the next download: the last stored bar minus updater.overlap_days, within lookback_days."""
+    s = get_settings()
+    now = pd.Timestamp.now() if now is None else pd.Timestamp(now)
+    floor = now.normalize() - pd.Timedelta(days=s.intraday.lookback_days)
+    last = last_timestamp(asset)
+    start = floor if last is None else max(floor, last.normalize() - pd.Timedelta(days=s.updater.overlap_days))
+    return start.strftime("%Y-%m-%d")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--update", action="store_true", help="download new bars of intraday.assets")
+    parser.add_argument("--resample", choices=RULES, default=None, help="print / write daily or weekly bars")
+    parser.add_argument("--asset", default="btc")
+    parser.add_argument("--start", default=None, help="YYYY-MM-DD")
+    parser.add_argument("--end", default=None, help="YYYY-MM-DD")
+    parser.add_argument("--tz", default="UTC", help="time zone of the bins")
+    parser.add_argument("--out", default=None, help="write the resampled table (.csv, .json, .parquet or .arrow)")
+    args = parser.parse_args()
+
+    s = get_settings()
+    if args.update:
+        from src.data_fetchers.finance_api import TICKERS, fetch_intraday
+
+        for asset in s.intraday.assets:
+            start = fetch_start(asset)
+            months = write_bars(asset, fetch_intraday(TICKERS[asset], start, s.intraday.interval))
+            print(f"✓ {asset} {s.intraday.interval} since {start}: {len(months)} partition(s) written")
+    elif args.resample:
+        table = resample(args.asset, args.resample, args.start, args.end, tz=args.tz)
+        print(table.tail(10).to_string(index=False))
+        if args.out:
+            from src.utils.helpers import write_table
+
+            print(f"results -> {write_table(table, args.out)}")
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
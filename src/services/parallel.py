@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import atexit
+import dataclasses
+import logging
+import math
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from src.config.settings import Settings, get_settings, set_settings
+from src.services.shared_frames import attach_frames, shared_frames
+
+logger = logging.getLogger(__name__)
+
+_POOL: ProcessPoolExecutor | None = None
+_POOL_WORKERS = 0
+
+# Кэш присоединённых фреймов внутри воркера: один экспорт обслуживает много чанков.
+_ATTACHED: tuple[str, Dict[str, Optional[pd.DataFrame]]] | None = None
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _POOL, _POOL_WORKERS
+    if _POOL is None or _POOL_WORKERS != workers:
+        shutdown_pool()
+        _POOL = ProcessPoolExecutor(max_workers=workers)
+        _POOL_WORKERS = workers
+    return _POOL
+
+
+def shutdown_pool() -> None:
+    global _POOL, _POOL_WORKERS
+    if _POOL is not None:
+        _POOL.shutdown(wait=False, cancel_futures=True)
+    _POOL = None
+    _POOL_WORKERS = 0
+
+
+atexit.register(shutdown_pool)
+
+
+def _chunks(positions: range, n_chunks: int) -> List[range]:
+    if len(positions) == 0:
+        return []
+    size = max(1, math.ceil(len(positions) / n_chunks))
+    return [positions[i:i + size] for i in range(0, len(positions), size)]
+
+
+# -------------
+# Worker side
+# -------------
+def _worker_frames(spec: Dict[str, Any], settings: Settings) -> Dict[str, Optional[pd.DataFrame]]:
+    global _ATTACHED
+    # Настройки родителя, но без вложенного пула внутри воркера.
+    set_settings(dataclasses.replace(settings, parallel=dataclasses.replace(settings.parallel, workers=1)))
+    if _ATTACHED is None or _ATTACHED[0] != spec["root"]:
+        _ATTACHED = (spec["root"], attach_frames(spec))
+    return _ATTACHED[1]
+
+
+def _signal_rows_task(spec: Dict[str, Any], settings: Settings, asset: str, positions: range) -> list[dict]:
+    from src.analytics.signal_generator import signal_rows
+
+    return signal_rows(_worker_frames(spec, settings), asset, positions)
+
+
+def _generate_signals_task(spec: Dict[str, Any], settings: Settings, asset: str) -> pd.DataFrame:
+    from src.analytics.signal_generator import generate_signals
+
+    return generate_signals(_worker_frames(spec, settings), asset)
+
+
+def _score_asset_task(spec: Dict[str, Any], settings: Settings, asset: str):
+    from src.analytics.signal_generator import score_asset
+
+    return score_asset(asset, _worker_frames(spec, settings))
+
+
+def _asset_task(spec: Dict[str, Any], settings: Settings, fn: Callable[..., Any], asset: str, kwargs: Dict[str, Any]):
+    return fn(_worker_frames(spec, settings), asset, **kwargs)
+
+
+def _sweep_task(spec: Dict[str, Any], settings: Settings, ctx, configs: List[Dict[str, Any]]) -> list[dict]:
+    from src.analytics.sweep import evaluate_configs
+
+    frames = _worker_frames(spec, settings)
+    ctx.inputs = dataclasses.replace(ctx.inputs, sources=frames)
+    return evaluate_configs(ctx, configs)
+
+
+# -------------
+# Parent side
+# -------------
+def generate_signals_many(
+    dfs_full: Dict[str, pd.DataFrame],
+    assets: List[str],
+    workers: Optional[int] = None,
+) -> Dict[str, pd.DataFrame]:
+    """
+    generate_signals for several assets in the process pool. Step-loop assets are split into
+    contiguous date chunks; rows are merged in chunk order, so output equals the serial run.
+    Input frames reach the workers as memory-mapped column files, not pickled DataFrames.
+    """
+    from src.analytics.signal_generator import signal_step_positions, signals_frame, uses_step_loop
+
+    s = get_settings()
+    workers = int(workers or s.parallel.workers)
+    n_chunks = max(1, workers * s.parallel.chunks_per_worker)
+
+    with shared_frames(dfs_full) as spec:
+        pool = _get_pool(workers)
+        try:
+            pending: Dict[str, Any] = {}
+            for asset in assets:
+                if uses_step_loop(dfs_full, asset):
+                    chunks = _chunks(signal_step_positions(dfs_full, asset), n_chunks)
+                    pending[asset] = [pool.submit(_signal_rows_task, spec, s, asset, c) for c in chunks]
+                else:
+                    pending[asset] = pool.submit(_generate_signals_task, spec, s, asset)
+
+            out: Dict[str, pd.DataFrame] = {}
+            for asset, job in pending.items():
+                if isinstance(job, list):
+                    rows = [row for future in job for row in future.result()]
+                    out[asset] = signals_frame(rows)
+                else:
+                    out[asset] = job.result()
+            return out
+        except BrokenProcessPool:
+            shutdown_pool()
+            raise
+
+
+def generate_signals_parallel(dfs_full: Dict[str, pd.DataFrame], asset: str, workers: Optional[int] = None) -> pd.DataFrame:
+    return generate_signals_many(dfs_full, [asset], workers=workers)[asset]
+
+
+def score_assets_parallel(dfs: Dict[str, pd.DataFrame], assets: List[str], workers: Optional[int] = None) -> dict:
+    """score_asset per asset in the pool: asset -> result tuple or the raised exception (in asset order)."""
+    s = get_settings()
+    workers = int(workers or s.parallel.workers)
+
+    with shared_frames(dfs) as spec:
+        pool = _get_pool(workers)
+        futures = {asset: pool.submit(_score_asset_task, spec, s, asset) for asset in assets}
+        out: dict = {}
+        for asset, future in futures.items():
+            try:
+                out[asset] = future.result()
+            except BrokenProcessPool:
+                shutdown_pool()
+                raise
+            except Exception as e:
+                out[asset] = e
+        return out
+
+
+def run_assets_parallel(
+    dfs: Dict[str, pd.DataFrame],
+    fn: Callable[..., Any],
+    assets: List[str],
+    workers: Optional[int] = None,
+    **kwargs: Any,
+) -> dict:
+    """
+    fn(dfs, asset, **kwargs) per asset in the pool (`fn` — a module-level function, e.g. run_backtest):
+    asset -> result or the raised exception (in asset order).
+    """
+    s = get_settings()
+    workers = int(workers or s.parallel.workers)
+
+    with shared_frames(dfs) as spec:
+        pool = _get_pool(workers)
+        futures = {asset: pool.submit(_asset_task, spec, s, fn, asset, kwargs) for asset in assets}
+        out: dict = {}
+        for asset, future in futures.items():
+            try:
+                out[asset] = future.result()
+            except BrokenProcessPool:
+                shutdown_pool()
+                raise
+            except Exception as e:
+                out[asset] = e
+        return out
+
+
+def evaluate_sweep_parallel(dfs: Dict[str, pd.DataFrame], ctx, configs: List[Dict[str, Any]], workers: Optional[int] = None) -> list[dict]:
+    """
+    Sweep configurations in the pool, in contiguous chunks; rows come back in `configs` order.
+    The shared SweepContext is pickled without its source frames, which workers re-attach.
+    """
+    s = get_settings()
+    workers = int(workers or s.parallel.workers)
+    n_chunks = max(1, workers * s.parallel.chunks_per_worker)
+    size = max(1, math.ceil(len(configs) / n_chunks))
+    payload = dataclasses.replace(ctx, inputs=dataclasses.replace(ctx.inputs, sources={}))
+
+    with shared_frames(dfs) as spec:
+        pool = _get_pool(workers)
+        try:
+            futures = [pool.submit(_sweep_task, spec, s, payload, configs[i:i + size]) for i in range(0, len(configs), size)]
+            return [row for future in futures for row in future.result()]
+        except BrokenProcessPool:
+            shutdown_pool()
+            raise
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+# Колонки этих dtype kind'ов пишутся в .npy как есть; остальные (строки, object) — как
+# коды factorize + список уникальных значений в спецификации.
+_RAW_KINDS = "biufcmM"
+
+
+def _export_column(series: pd.Series, path: Path) -> Dict[str, Any]:
+    meta: Dict[str, Any] = {"file": path.name, "dtype": str(series.dtype)}
+    if isinstance(series.dtype, pd.DatetimeTZDtype):
+        values = series.dt.tz_convert("UTC").dt.tz_localize(None).to_numpy()
+        meta.update(kind="datetime_tz", tz=str(series.dt.tz))
+    else:
+        values = series.to_numpy()
+        if values.dtype.kind in _RAW_KINDS and not isinstance(series.dtype, pd.api.extensions.ExtensionDtype):
+            meta["kind"] = "raw"
+        else:
+            codes, uniques = pd.factorize(series, use_na_sentinel=True)
+            values = codes.astype(np.int32)
+            meta.update(kind="codes", uniques=uniques.tolist())
+    np.save(path, values, allow_pickle=False)
+    return meta
+
+
+def _attach_column(meta: Dict[str, Any], root: Path):
+    values = np.load(root / meta["file"], mmap_mode="r")
+    kind = meta["kind"]
+    if kind == "raw":
+        return values
+    if kind == "datetime_tz":
+        return pd.DatetimeIndex(values).tz_localize("UTC").tz_convert(meta["tz"])
+    uniques = np.asarray(meta["uniques"] + [None], dtype=object)
+    return pd.array(uniques[np.asarray(values)], dtype=meta["dtype"])
+
+
+def export_frame(df: pd.DataFrame, directory: str | Path, prefix: str = "") -> Dict[str, Any]:
+    """
+    Writes every column of `df` to `directory` as an .npy file; returns a JSON-serializable
+    spec (file names are relative to `directory`).
+    """
+    root = Path(directory)
+    root.mkdir(parents=True, exist_ok=True)
+    columns = [
+        (col, _export_column(df.iloc[:, i], root / f"{prefix}{i}.npy"))
+        for i, col in enumerate(df.columns)
+    ]
+    index = None
+    if not df.index.equals(pd.RangeIndex(len(df))):
+        index = _export_column(df.index.to_series(), root / f"{prefix}index.npy")
+    return {"columns": columns, "index": index, "length": len(df)}
+
+
+def attach_frame(frame: Dict[str, Any], directory: str | Path) -> pd.DataFrame:
+    """Rebuilds a frame written by export_frame over read-only memory maps."""
+    root = Path(directory)
+    index = _attach_column(frame["index"], root) if frame["index"] is not None else pd.RangeIndex(frame["length"])
+    arrays = {i: _attach_column(meta, root) for i, (_col, meta) in enumerate(frame["columns"])}
+    df = pd.DataFrame(arrays, index=index, copy=False)
+    df.columns = pd.Index([col for col, _meta in frame["columns"]])
+    return df
+
+
+def export_frames(dfs: Dict[str, Optional[pd.DataFrame]], directory: str | Path) -> Dict[str, Any]:
+    """
+    Exports several frames to `directory` and returns a small picklable spec;
+    attach_frames(spec) rebuilds them over read-only memory maps.
+    """
+    frames: Dict[str, Any] = {
+        name: None if df is None else export_frame(df, directory, prefix=f"{name}__")
+        for name, df in dfs.items()
+    }
+    return {"root": str(directory), "frames": frames}
+
+
+def attach_frames(spec: Dict[str, Any]) -> Dict[str, Optional[pd.DataFrame]]:
+    return {
+        name: None if frame is None else attach_frame(frame, spec["root"])
+        for name, frame in spec["frames"].items()
+    }
+
+
+@contextmanager
+def shared_frames(dfs: Dict[str, Optional[pd.DataFrame]]) -> Iterator[Dict[str, Any]]:
+    """Exports frames to a temporary directory for the duration of the block."""
+    root = tempfile.mkdtemp(prefix="mcs_frames_")
+    try:
+        yield export_frames(dfs, root)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
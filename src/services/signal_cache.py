@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.config.settings import get_settings
+from src.services.storage import read_dataset, write_dataset
+
+logger = logging.getLogger(__name__)
+
+# Менять при изменении логики сигналов, влияющей на результат: старые записи перестанут совпадать.
+CACHE_VERSION = 1
+
+_COT_COLUMNS = ["COT_Index_Comm_26w", "COT_Index_Large_Inverted_26w", "Z_Score_Comm"]
+_MEMORY_ENTRIES = 32
+
+
+def input_columns(asset_key: str) -> Dict[str, list[str]]:
+    """Datasets (and their columns) that generate_signals reads for one asset."""
+    return {
+        asset_key: ["date", "close"],
+        f"{asset_key}_cot": ["date", *_COT_COLUMNS],
+        "vix": ["date", "deviation_pct"],
+        "dxy": ["date", "close"],
+        "us10y": ["date", "close"],
+        "spx": ["date", "close"],
+    }
+
+
+def _hash_column(h, values: np.ndarray) -> None:
+    h.update(str(values.dtype).encode("utf-8"))
+    if values.dtype == object:
+        h.update("\x1f".join(map(str, values)).encode("utf-8"))
+    else:
+        h.update(np.ascontiguousarray(values).tobytes())
+
+
+def dataset_digest(df: Optional[pd.DataFrame], columns: Optional[list[str]] = None) -> str:
+    """Content hash of a frame (all columns by default)."""
+    h = hashlib.blake2b(digest_size=16)
+    if df is None or df.empty:
+        return h.hexdigest()
+    for col in columns or list(df.columns):
+        h.update(f"|{col}".encode("utf-8"))
+        if col in df.columns:
+            _hash_column(h, df[col].to_numpy())
+    return h.hexdigest()
+
+
+def _settings_payload() -> dict:
+    s = get_settings()
+    ml = dataclasses.asdict(s.ml)
+    ml.pop("model_cache_dir", None)
+    return {
+        "version": CACHE_VERSION,
+        "compass_mode": s.compass_mode,
+        "compass": dataclasses.asdict(s.compass),
+        "signals": dataclasses.asdict(s.signals),
+        "scoring": dataclasses.asdict(s.scoring),
+        "ml": ml,
+        "sigma_levels": list(s.ui.sigma_levels),
+    }
+
+
+def settings_key() -> str:
+    """Hash of the settings sections the signals depend on (part of signal_cache_key)."""
+    return hashlib.blake2b(json.dumps(_settings_payload(), sort_keys=True, default=str).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def signal_cache_key(dfs: Dict[str, Optional[pd.DataFrame]], asset: str) -> str:
+    """Content hash of the signal inputs for `asset`: dataset columns, settings sections, asset."""
+    asset_key = asset.lower()
+    h = hashlib.blake2b(digest_size=20)
+    h.update(json.dumps(_settings_payload(), sort_keys=True, default=str).encode("utf-8"))
+    h.update(asset_key.encode("utf-8"))
+    for name, cols in input_columns(asset_key).items():
+        df = dfs.get(name)
+        h.update(f"|{name}".encode("utf-8"))
+        if df is None or df.empty:
+            h.update(b"-")
+            continue
+        h.update(str(len(df)).encode("utf-8"))
+        for col in cols:
+            h.update(f"|{col}".encode("utf-8"))
+            if col in df.columns:
+                _hash_column(h, df[col].to_numpy())
+    return h.hexdigest()
+
+
+class SignalCache:
+    """
+    generate_signals results by content key: a small in-process LRU in front of feather files
+    in `dir`, evicted least-recently-used once they exceed `max_mb`. Writes are atomic, so
+    several app sessions / processes can share one directory.
+    """
+
+    def __init__(self, directory: str | Path, max_mb: float):
+        self.dir = Path(directory)
+        self.max_bytes = int(max_mb * 2**20)
+        self._memory: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.dir / f"{key}.feather"
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        with self._lock:
+            df = self._memory.get(key)
+            if df is not None:
+                self._memory.move_to_end(key)
+                return df.copy()
+        path = self._path(key)
+        if not path.exists():
+            return None
+        try:
+            df, _ = read_dataset(path, backend="feather")
+            os.utime(path)  # mtime = время последнего обращения (для LRU)
+        except (OSError, ValueError) as e:
+            logger.warning("Unreadable signal cache entry %s: %s", path, e)
+            return None
+        self._remember(key, df)
+        return df.copy()
+
+    def put(self, key: str, df: pd.DataFrame) -> None:
+        self._remember(key, df.copy())
+        try:
+            write_dataset(df, self._path(key), backend="feather")
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning("Failed to store signals %s: %s", key, e)
+            return
+        self.evict()
+
+    def _remember(self, key: str, df: pd.DataFrame) -> None:
+        with self._lock:
+            self._memory[key] = df
+            self._memory.move_to_end(key)
+            while len(self._memory) > _MEMORY_ENTRIES:
+                self._memory.popitem(last=False)
+
+    def evict(self) -> int:
+        """Deletes least recently used files until the directory fits `max_mb`; returns files removed."""
+        entries = []
+        for p in self.dir.glob("*.feather"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, p in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            p.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+        for p in self.dir.glob("*.feather"):
+            p.unlink(missing_ok=True)
+
+
+_CACHE: SignalCache | None = None
+
+
+def get_signal_cache() -> SignalCache:
+    global _CACHE
+    cfg = get_settings().signal_cache
+    if _CACHE is None or _CACHE.dir != Path(cfg.dir) or _CACHE.max_bytes != int(cfg.max_mb * 2**20):
+        _CACHE = SignalCache(cfg.dir, cfg.max_mb)
+    return _CACHE
+
+
+def cached_signals(dfs: Dict[str, Optional[pd.DataFrame]], asset: str, compute: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+    """compute() through the signal cache (signal_cache.enabled); `dfs` and `asset` form the key."""
+    if not get_settings().signal_cache.enabled:
+        return compute()
+    cache = get_signal_cache()
+    key = signal_cache_key(dfs, asset)
+    df = cache.get(key)
+    if df is not None:
+        return df
+    df = compute()
+    cache.put(key, df)
+    return df
@@ -0,0 +1,258 @@
+"""
+Storage backends for processed datasets (`storage.backend` in config.yaml):
+
+- csv      — plain CSV (dates are re-parsed on every load);
+- feather  — Arrow IPC file, uncompressed, read through a memory map;
+- npy      — directory of per-column .npy files opened with mmap_mode="r".
+
+Binary backends keep `date` as int64 epoch (UTC, naive; the datetime64 unit is stored alongside), so loading skips
+string parsing of mixed tz offsets entirely.
+
+One-shot migration of the existing CSV files:
+
+    python -m src.services.storage --migrate [--backend feather]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.config.settings import get_settings
+from src.services.shared_frames import attach_frame, export_frame
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("csv", "feather", "npy")
+EPOCH_COLUMNS = ("date",)
+
+_META_KEY = b"mcs_epoch_columns"
+_NPY_META = "meta.json"
+
+
+def dataset_path(path: str | Path, backend: str) -> Path:
+    """Location of a dataset for `backend`; `path` is the configured (.csv) path."""
+    p = Path(path)
+    if backend == "csv":
+        return p
+    if backend == "feather":
+        return p.with_suffix(".feather")
+    if backend == "npy":
+        return p.with_name(f"{p.stem}_npy")
+    raise ValueError(f"Unknown storage backend: {backend!r} (expected one of {BACKENDS})")
+
+
+def coerce_dtypes(df: pd.DataFrame, dtypes: Optional[Mapping[str, str]], lossless: bool = False) -> pd.DataFrame:
+    """
+    Casts the columns of `df` listed in `dtypes` (settings.dtypes; absent columns are skipped).
+    Integer casts are skipped for columns with NaN, fractions or values outside the target range;
+    with `lossless` every cast that would change a value is skipped as well.
+    """
+    casts: dict[str, object] = {}
+    for col, dtype in (dtypes or {}).items():
+        if col not in df.columns or str(df[col].dtype) == dtype:
+            continue
+        if dtype == "category":
+            casts[col] = dtype
+            continue
+        target = np.dtype(dtype)
+        if not pd.api.types.is_numeric_dtype(df[col]):
+            logger.warning("dtype schema: %s is %s, not cast to %s", col, df[col].dtype, dtype)
+            continue
+        values = df[col].to_numpy()
+        if target.kind in "iu":
+            info = np.iinfo(target)
+            if len(values) and (
+                np.isnan(values.astype(float)).any()
+                or (values != np.round(values)).any()
+                or values.min() < info.min
+                or values.max() > info.max
+            ):
+                logger.warning("dtype schema: %s does not fit %s, kept as %s", col, dtype, df[col].dtype)
+                continue
+        elif lossless and not np.array_equal(values.astype(target).astype(values.dtype), values, equal_nan=True):
+            continue
+        casts[col] = target
+    return df.astype(casts) if casts else df
+
+
+def _utc_naive(col: pd.Series) -> pd.Series:
+    if pd.api.types.is_datetime64_any_dtype(col) and not isinstance(col.dtype, pd.DatetimeTZDtype):
+        return col
+    return pd.to_datetime(col, utc=True, errors="coerce").dt.tz_localize(None)
+
+
+def _to_epoch(df: pd.DataFrame) -> tuple[pd.DataFrame, dict[str, str]]:
+    """Date columns -> int64 epoch; returns the column -> datetime64 unit map needed to restore them."""
+    epoch_cols = {}
+    df = df.copy()
+    for c in EPOCH_COLUMNS:
+        if c not in df.columns:
+            continue
+        values = _utc_naive(df[c]).to_numpy()
+        epoch_cols[c] = np.datetime_data(values.dtype)[0]
+        df[c] = values.view("i8")
+    return df, epoch_cols
+
+
+def _from_epoch(df: pd.DataFrame, epoch_cols: dict[str, str]) -> pd.DataFrame:
+    for c, unit in epoch_cols.items():
+        if c in df.columns:
+            df[c] = np.asarray(df[c]).view(f"M8[{unit}]")
+    return df
+
+
+# -----------
+# Writers
+# -----------
+def _write_feather(df: pd.DataFrame, path: Path) -> None:
+    import pyarrow as pa
+    from pyarrow import feather
+
+    df, epoch_cols = _to_epoch(df.reset_index(drop=True))
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    meta = dict(table.schema.metadata or {})
+    meta[_META_KEY] = json.dumps(epoch_cols).encode("utf-8")
+    table = table.replace_schema_metadata(meta)
+
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    feather.write_feather(table, str(tmp), compression="uncompressed")
+    os.replace(tmp, path)
+
+
+def _write_npy(df: pd.DataFrame, path: Path) -> None:
+    df, epoch_cols = _to_epoch(df.reset_index(drop=True))
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    frame = export_frame(df, tmp)
+    (tmp / _NPY_META).write_text(json.dumps({"frame": frame, "epoch_columns": epoch_cols}), encoding="utf-8")
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp, path)
+
+
+def write_dataset(
+    df: pd.DataFrame,
+    path: str | Path,
+    backend: Optional[str] = None,
+    dtypes: Optional[Mapping[str, str]] = None,
+) -> Path:
+    """
+    Saves a processed dataset with the configured backend; `path` is the configured (.csv) path.
+    `dtypes` (the dataset's schema) is applied where the cast loses nothing.
+    """
+    backend = backend or get_settings().storage.backend
+    if dtypes:
+        # В CSV float32 записался бы короче и при чтении как float64 дал бы другое значение
+        if backend == "csv":
+            dtypes = {col: dtype for col, dtype in dtypes.items() if not dtype.startswith("float")}
+        df = coerce_dtypes(df, dtypes, lossless=True)
+    out = dataset_path(path, backend)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    if backend == "csv":
+        df.to_csv(out, index=False)
+    elif backend == "feather":
+        _write_feather(df, out)
+    else:
+        _write_npy(df, out)
+    return out
+
+
+# -----------
+# Readers
+# -----------
+def _read_feather(path: Path, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    import pyarrow as pa
+
+    table = pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+    epoch_cols = json.loads((table.schema.metadata or {}).get(_META_KEY, b"{}"))
+    if columns is not None:
+        table = table.select([c for c in table.column_names if c in columns])
+    return _from_epoch(table.to_pandas(), epoch_cols)
+
+
+def _read_npy(path: Path, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    meta = json.loads((path / _NPY_META).read_text(encoding="utf-8"))
+    frame = meta["frame"]
+    if columns is not None:
+        frame = {**frame, "columns": [(c, m) for c, m in frame["columns"] if c in columns]}
+    return _from_epoch(attach_frame(frame, path), meta["epoch_columns"])
+
+
+def read_dataset(
+    path: str | Path,
+    backend: Optional[str] = None,
+    columns: Optional[Sequence[str]] = None,
+    float_precision: Optional[str] = None,
+) -> tuple[Optional[pd.DataFrame], str]:
+    """
+    Reads a dataset stored with `backend` (configured by default) and returns (df, backend used).
+    Falls back to the CSV file when the binary one has not been written yet; CSV frames are
+    returned as read (dates unparsed), binary ones with naive UTC datetime64 dates. With
+    `columns` only those of them that exist are read (in file order). `float_precision` goes to
+    pd.read_csv ("round_trip" reads back exactly the floats to_csv wrote).
+    """
+    backend = backend or get_settings().storage.backend
+    p = dataset_path(path, backend)
+    if backend != "csv" and not p.exists():
+        if Path(path).exists():
+            logger.info("No %s copy of %s yet, reading CSV (run the storage migration)", backend, path)
+        backend, p = "csv", Path(path)
+    if not p.exists():
+        return None, backend
+
+    if backend == "csv":
+        usecols = None if columns is None else (lambda c: c in columns)
+        return pd.read_csv(p, usecols=usecols, float_precision=float_precision), backend
+    if backend == "feather":
+        return _read_feather(p, columns), backend
+    return _read_npy(p, columns), backend
+
+
+# -----------
+# Migration
+# -----------
+def migrate(backend: Optional[str] = None, data_dir: Optional[str] = None) -> list[Path]:
+    """Converts every configured CSV dataset to `backend` and checks the round trip."""
+    from src.services.data_loader import parse_dates
+
+    s = get_settings()
+    backend = backend or s.storage.backend
+    if backend == "csv":
+        print("Backend is csv: nothing to migrate")
+        return []
+    root = Path(data_dir or s.data_dir)
+    written: list[Path] = []
+    for name, rel_path in s.files.items():
+        src = root / rel_path
+        if not src.exists():
+            logger.warning("Skip %s: %s not found", name, src)
+            continue
+        df = parse_dates(pd.read_csv(src))
+        out = write_dataset(df, src, backend, dtypes=s.dtypes.schema(name))
+        back, _ = read_dataset(src, backend)
+        pd.testing.assert_frame_equal(back.copy(), df, check_dtype=False)
+        written.append(out)
+        print(f"✓ {name}: {src} -> {out}")
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--migrate", action="store_true", help="convert data_dir CSV files to the backend")
+    parser.add_argument("--backend", choices=BACKENDS, default=None, help="target backend (default: config)")
+    args = parser.parse_args()
+    if args.migrate:
+        migrate(args.backend)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+import atexit
+import functools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Глобальный флаг читается на каждом вызове trace()/span(); выключено — ни форматирования, ни таймеров.
+_enabled = False
+_lock = threading.Lock()
+_buffer: Deque["TraceEvent"] = deque(maxlen=10_000)
+_stats: Dict[str, List[float]] = {}
+_sink: Optional["_FileSink"] = None
+_log_listener: Optional[logging.handlers.QueueListener] = None
+_log_handler: Optional[logging.handlers.QueueHandler] = None
+
+
+@dataclass
+class TraceEvent:
+    ts: float
+    kind: str  # "event" | "span"
+    name: str
+    message: str = ""
+    duration: Optional[float] = None
+    fields: Dict[str, Any] = field(default_factory=dict)
+    thread: str = ""
+
+    def to_json(self) -> str:
+        payload = {
+            "ts": round(self.ts, 6),
+            "kind": self.kind,
+            "name": self.name,
+            "message": self.message,
+            "duration_ms": None if self.duration is None else round(self.duration * 1000, 3),
+            "thread": self.thread,
+            **{k: _jsonable(v) for k, v in self.fields.items()},
+        }
+        return json.dumps(payload, ensure_ascii=False)
+
+
+def _jsonable(v: Any) -> Any:
+    return v if isinstance(v, (str, int, float, bool, type(None))) else str(v)
+
+
+class _FileSink:
+    """JSON-lines writer on a background thread; trace() only enqueues."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._queue: "queue.SimpleQueue[Optional[TraceEvent]]" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="trace-sink", daemon=True)
+        self._thread.start()
+
+    def put(self, event: TraceEvent) -> None:
+        self._queue.put(event)
+
+    def _run(self) -> None:
+        with self.path.open("a", encoding="utf-8") as f:
+            while True:
+                event = self._queue.get()
+                if event is None:
+                    break
+                f.write(event.to_json() + "\n")
+                if self._queue.empty():
+                    f.flush()
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+
+def _record(event: TraceEvent) -> None:
+    with _lock:
+        _buffer.append(event)
+        if event.duration is not None:
+            st = _stats.setdefault(event.name, [0, 0.0, 0.0])
+            st[0] += 1
+            st[1] += event.duration
+            st[2] = max(st[2], event.duration)
+        sink = _sink
+    if sink is not None:
+        sink.put(event)
+
+
+def _format(msg: str, args: tuple) -> str:
+    if not args:
+        return msg
+    values = tuple(a() if callable(a) else a for a in args)
+    try:
+        return msg % values
+    except (TypeError, ValueError):
+        return " ".join([msg, *map(str, values)])
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def trace(name: str, msg: str, *args: Any) -> None:
+    """
+    Records an event. `msg % args` is formatted only while tracing is on; zero-arg callables
+    among `args` are called lazily (trace("features", "head: %s", lambda: df.head().to_dict())).
+    """
+    if not _enabled:
+        return
+    _record(TraceEvent(time.time(), "event", name, _format(msg, args), thread=threading.current_thread().name))
+
+
+class _Span:
+    __slots__ = ("name", "fields", "_t0")
+
+    def __init__(self, name: str, fields: Dict[str, Any]):
+        self.name = name
+        self.fields = fields
+        self._t0 = 0.0
+
+    def __enter__(self) -> "_Span":
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        duration = time.perf_counter() - self._t0
+        if exc_type is not None:
+            self.fields["error"] = exc_type.__name__
+        _record(TraceEvent(time.time(), "span", self.name, duration=duration, fields=self.fields,
+                           thread=threading.current_thread().name))
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str, **fields: Any):
+    """Context manager timing a block; a shared no-op object while tracing is off."""
+    if not _enabled:
+        return _NOOP_SPAN
+    return _Span(name, fields)
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Decorator: every call of the function becomes a span (one flag check while tracing is off)."""
+
+    def decorator(fn: Callable) -> Callable:
+        label = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Span(label, {}):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def recent(n: Optional[int] = None) -> List[TraceEvent]:
+    """Most recent events from the ring buffer, oldest first."""
+    with _lock:
+        events = list(_buffer)
+    return events if n is None else events[-n:]
+
+
+def span_stats() -> Dict[str, Dict[str, float]]:
+    """name -> {count, total_ms, mean_ms, max_ms} over spans recorded since configure()/reset()."""
+    with _lock:
+        items = [(k, list(v)) for k, v in _stats.items()]
+    return {
+        name: {
+            "count": int(count),
+            "total_ms": total * 1000,
+            "mean_ms": total * 1000 / count if count else 0.0,
+            "max_ms": mx * 1000,
+        }
+        for name, (count, total, mx) in sorted(items, key=lambda kv: -kv[1][1])
+    }
+
+
+def reset() -> None:
+    with _lock:
+        _buffer.clear()
+        _stats.clear()
+
+
+def _configure_logging(log_file: Optional[str], level: str) -> None:
+    """Application log: one root handler writing through a queue (the file I/O runs on a listener thread)."""
+    global _log_listener, _log_handler
+    root = logging.getLogger()
+    root.setLevel(getattr(logging, level.upper(), logging.INFO))
+    if _log_listener is not None or not log_file:
+        return
+    file_handler = logging.FileHandler(log_file, mode="w", encoding="utf-8")
+    file_handler.setFormatter(logging.Formatter("%(asctime)s %(name)s - %(levelname)s - %(message)s"))
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    _log_handler = logging.handlers.QueueHandler(log_queue)
+    root.addHandler(_log_handler)
+    _log_listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    _log_listener.start()
+
+
+def configure(cfg=None) -> None:
+    """
+    Applies `tracing:` from config.yaml (or the given TraceSettings): application log file and
+    level, tracing on/off, ring buffer size, optional JSON-lines trace file. Safe to call again.
+    """
+    global _enabled, _buffer, _sink
+    if cfg is None:
+        from src.config.settings import get_settings
+
+        cfg = get_settings().tracing
+
+    _configure_logging(cfg.log_file, cfg.log_level)
+    with _lock:
+        old_sink, _sink = _sink, None
+        size = max(1, int(cfg.buffer_size))
+        if _buffer.maxlen != size:
+            _buffer = deque(_buffer, maxlen=size)
+        if cfg.enabled and cfg.file:
+            if old_sink is not None and old_sink.path == Path(cfg.file):
+                _sink, old_sink = old_sink, None
+            else:
+                _sink = _FileSink(cfg.file)
+        _enabled = bool(cfg.enabled)
+    if old_sink is not None:
+        old_sink.close()
+    logger.debug("Tracing %s (pid %d)", "enabled" if _enabled else "disabled", os.getpid())
+
+
+def shutdown() -> None:
+    """Stops tracing and drains the trace file and log queues."""
+    global _enabled, _sink, _log_listener, _log_handler
+    with _lock:
+        _enabled = False
+        sink, _sink = _sink, None
+    if sink is not None:
+        sink.close()
+    if _log_handler is not None:
+        logging.getLogger().removeHandler(_log_handler)
+        _log_handler = None
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+
+atexit.register(shutdown)
@@ -0,0 +1,290 @@
+"""
+Background update loop (`scheduler:` in config.yaml) that polls each source group only when new
+data can exist, following its release calendar:
+
+    crypto      btc, eth                          daily, bar D is final at D+1 00:00 UTC
+    us_market   spx, nasdaq, dxy, us10y, vix      NYSE trading days, bar D after 17:00 New York
+                                                  (cash indices close at 16:00, the ICE dollar index at 17:00)
+    cftc        btc_cot, eth_cot                  COT report of Tuesday T, released Friday T+3 15:30 New York
+
+A group is polled delay_minutes after its release, then every retry_minutes until the expected bar /
+report is stored, for at most give_up_hours (CFTC: the whole holiday-shifted week); otherwise the next
+release picks it up. Each poll is an incremental update_all_data of the group's datasets only (the
+response cache of the group's source is expired first), whose conclusion stage rescores the as-of
+timeline from the earliest changed date; the signals of BTC and ETH are extended from the same date
+(extend_signals) and land in the signal cache the app reads.
+
+`clock` (epoch seconds) and `sleep` are injectable, so the loop runs against a fake clock and the
+local HTTP stand-in (benchmarks/bench_scheduler.py).
+
+    python -m src.services.update_scheduler            # run until Ctrl+C
+    python -m src.services.update_scheduler --once     # poll the due groups and exit
+    python -m src.services.update_scheduler --plan     # next releases per group
+"""
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import logging
+import time
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+from pandas.tseries.holiday import (
+    AbstractHolidayCalendar,
+    GoodFriday,
+    Holiday,
+    USLaborDay,
+    USMartinLutherKingJr,
+    USMemorialDay,
+    USPresidentsDay,
+    USThanksgivingDay,
+    nearest_workday,
+)
+
+from src.config.settings import get_settings
+from src.services.data_loader import earliest_change, load_dataset
+
+logger = logging.getLogger(__name__)
+
+ASSETS = ("BTC", "ETH")
+
+
+class NYSEHolidayCalendar(AbstractHolidayCalendar):
+    rules = [
+        Holiday("New Year's Day", month=1, day=1, observance=nearest_workday),
+        USMartinLutherKingJr,
+        USPresidentsDay,
+        GoodFriday,
+        USMemorialDay,
+        Holiday("Juneteenth", month=6, day=19, start_date="2022-01-01", observance=nearest_workday),
+        Holiday("Independence Day", month=7, day=4, observance=nearest_workday),
+        USLaborDay,
+        USThanksgivingDay,
+        Holiday("Christmas Day", month=12, day=25, observance=nearest_workday),
+    ]
+
+
+@lru_cache(maxsize=None)
+def _nyse_holidays(year: int) -> frozenset:
+    days = NYSEHolidayCalendar().holidays(dt.date(year, 1, 1), dt.date(year, 12, 31))
+    return frozenset(d.date() for d in days)
+
+
+@dataclass(frozen=True)
+class ReleaseCalendar:
+    """
+    Releases of one source group: at `time` (local, `tz`) on `weekdays` (0 = Monday) except `holidays`
+    ("nyse" or None); a release on local day R makes the data dated R - data_lag_days available.
+    """
+
+    name: str
+    source: str
+    datasets: Tuple[str, ...]
+    tz: str
+    time: dt.time
+    weekdays: Tuple[int, ...] = tuple(range(7))
+    data_lag_days: int = 0
+    holidays: Optional[str] = None
+    give_up_hours: Optional[float] = None
+
+    def _releases_on(self, day: dt.date) -> bool:
+        return day.weekday() in self.weekdays and not (self.holidays == "nyse" and day in _nyse_holidays(day.year))
+
+    def _at(self, day: dt.date) -> pd.Timestamp:
+        return pd.Timestamp(dt.datetime.combine(day, self.time)).tz_localize(self.tz).tz_convert("UTC")
+
+    def last_release(self, now: pd.Timestamp) -> pd.Timestamp:
+        """Latest release at or before `now` (UTC)."""
+        day = now.tz_convert(self.tz).date()
+        while not (self._releases_on(day) and self._at(day) <= now):
+            day -= dt.timedelta(days=1)
+        return self._at(day)
+
+    def next_release(self, now: pd.Timestamp) -> pd.Timestamp:
+        """First release after `now` (UTC)."""
+        day = now.tz_convert(self.tz).date()
+        while not (self._releases_on(day) and self._at(day) > now):
+            day += dt.timedelta(days=1)
+        return self._at(day)
+
+    def data_date(self, release: pd.Timestamp) -> pd.Timestamp:
+        """Date of the bar / report a release makes available (naive, as stored)."""
+        return pd.Timestamp(release.tz_convert(self.tz).date()) - pd.Timedelta(days=self.data_lag_days)
+
+
+CALENDARS: Tuple[ReleaseCalendar, ...] = (
+    ReleaseCalendar("crypto", "yahoo", ("btc", "eth"), "UTC", dt.time(0, 0), data_lag_days=1),
+    ReleaseCalendar("us_market", "yahoo", ("spx", "nasdaq", "dxy", "us10y", "vix"), "America/New_York",
+                    dt.time(17, 0), weekdays=(0, 1, 2, 3, 4), holidays="nyse"),
+    # Неделя с федеральным праздником сдвигает релиз COT на понедельник: ждём до следующего релиза
+    ReleaseCalendar("cftc", "cftc", ("btc_cot", "eth_cot"), "America/New_York", dt.time(15, 30),
+                    weekdays=(4,), data_lag_days=3, give_up_hours=24 * 7 - 1),
+)
+
+
+@dataclass
+class _GroupState:
+    release: pd.Timestamp
+    next_poll: pd.Timestamp
+    deadline: pd.Timestamp
+    done: bool = False
+
+
+def _stored_until(name: str) -> Optional[pd.Timestamp]:
+    df = load_dataset(name, columns=["date"])
+    if df is None or df.empty:
+        return None
+    last = pd.Timestamp(df["date"].max())
+    return (last.tz_convert("UTC").tz_localize(None) if last.tzinfo is not None else last).normalize()
+
+
+class UpdateScheduler:
+    """
+    Polls the due groups of `calendars` (tick) and sleeps until the next due time (run).
+    polls counts the polls per group; signals holds the latest signals per asset.
+    """
+
+    def __init__(
+        self,
+        calendars: Sequence[ReleaseCalendar] = CALENDARS,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+        assets: Sequence[str] = ASSETS,
+    ):
+        self.calendars = list(calendars)
+        self.clock = clock
+        self.sleep = sleep
+        self.assets = list(assets)
+        self.state: Dict[str, _GroupState] = {}
+        self.signals: Dict[str, pd.DataFrame] = {}
+        self.polls: Counter = Counter()
+
+    def now(self) -> pd.Timestamp:
+        return pd.Timestamp(self.clock(), unit="s", tz="UTC")
+
+    def _state(self, cal: ReleaseCalendar, now: pd.Timestamp) -> _GroupState:
+        cfg = get_settings().scheduler
+        release = cal.last_release(now)
+        st = self.state.get(cal.name)
+        if st is None or st.release != release:
+            give_up = cal.give_up_hours if cal.give_up_hours is not None else cfg.give_up_hours
+            first_poll = release + pd.Timedelta(minutes=cfg.delay_minutes)
+            deadline = max(release + pd.Timedelta(hours=give_up), first_poll)
+            # Первый запуск после долгого простоя: один догоняющий опрос, даже если срок уже вышел
+            st = _GroupState(release, first_poll, max(deadline, now) if st is None else deadline)
+            self.state[cal.name] = st
+        return st
+
+    def due(self, now: Optional[pd.Timestamp] = None) -> List[ReleaseCalendar]:
+        """Groups whose latest release is not stored yet and whose next poll time has come."""
+        now = self.now() if now is None else now
+        out = []
+        for cal in self.calendars:
+            st = self._state(cal, now)
+            if not st.done and st.next_poll <= now <= st.deadline:
+                out.append(cal)
+        return out
+
+    def next_wakeup(self, now: Optional[pd.Timestamp] = None) -> pd.Timestamp:
+        now = self.now() if now is None else now
+        delay = pd.Timedelta(minutes=get_settings().scheduler.delay_minutes)
+        times = []
+        for cal in self.calendars:
+            st = self._state(cal, now)
+            pending = not st.done and now <= st.deadline
+            times.append(max(st.next_poll, now) if pending and st.next_poll <= st.deadline else cal.next_release(now) + delay)
+        return min(times)
+
+    def _has_data(self, cal: ReleaseCalendar, release: pd.Timestamp) -> bool:
+        expected = cal.data_date(release)
+        return all((last := _stored_until(name)) is not None and last >= expected for name in cal.datasets)
+
+    def poll(self, groups: Sequence[ReleaseCalendar]) -> Dict[str, str]:
+        """Incremental update of the datasets of `groups`, then the signals from the earliest change on."""
+        from src.services import http_cache
+        from src.services.updater import update_all_data
+
+        s = get_settings()
+        for source in sorted({cal.source for cal in groups}):
+            http_cache.expire(source)
+        before = {name: load_dataset(name) for name in s.files}
+        status = update_all_data(full=False, datasets=[name for cal in groups for name in cal.datasets])
+        after = {name: load_dataset(name) for name in s.files}
+        since = earliest_change(before, after)
+        if since is not None or len(self.signals) < len(self.assets):
+            self._recompute(after, since)
+        return status
+
+    def _recompute(self, dfs: Dict[str, Optional[pd.DataFrame]], since: Optional[pd.Timestamp]) -> None:
+        from src.analytics.signal_generator import extend_signals
+
+        for asset in self.assets:
+            try:
+                self.signals[asset] = extend_signals(dfs, asset, self.signals.get(asset), since)
+            except Exception as e:
+                logger.exception("Signals of %s failed: %s", asset, e)
+                self.signals.pop(asset, None)
+
+    def tick(self) -> Dict[str, str]:
+        """Polls the due groups (if any); returns the update status."""
+        now = self.now()
+        groups = self.due(now)
+        if not groups:
+            return {}
+        cfg = get_settings().scheduler
+        logger.info("Polling %s", ", ".join(cal.name for cal in groups))
+        try:
+            status = self.poll(groups)
+        except Exception as e:
+            logger.exception("Scheduled update failed: %s", e)
+            status = {cal.name: f"failed: {e}" for cal in groups}
+        for cal in groups:
+            self.polls[cal.name] += 1
+            st = self.state[cal.name]
+            st.done = self._has_data(cal, st.release)
+            if not st.done:
+                st.next_poll = self.now() + pd.Timedelta(minutes=cfg.retry_minutes)
+                logger.info("%s: data of %s not there yet, next poll %s", cal.name, cal.data_date(st.release).date(), st.next_poll)
+        return status
+
+    def run(self, once: bool = False, until: Optional[pd.Timestamp] = None) -> None:
+        """tick() and sleep until the next due time (at most max_sleep_minutes), until `until` or forever."""
+        while True:
+            self.tick()
+            now = self.now()
+            if once or (until is not None and now >= until):
+                return
+            wake = self.next_wakeup(now)
+            if until is not None:
+                wake = min(wake, until)
+            cap = get_settings().scheduler.max_sleep_minutes * 60
+            self.sleep(min(max((wake - now).total_seconds(), 1.0), cap))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--once", action="store_true", help="poll the due groups and exit")
+    parser.add_argument("--plan", action="store_true", help="print the next release of every group")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    scheduler = UpdateScheduler()
+    if args.plan:
+        now = scheduler.now()
+        for cal in scheduler.calendars:
+            nxt = cal.next_release(now)
+            print(f"{cal.name:10s} last {cal.last_release(now):%Y-%m-%d %H:%M} UTC, next {nxt:%Y-%m-%d %H:%M} UTC "
+                  f"(data of {cal.data_date(nxt).date()}) — {', '.join(cal.datasets)}")
+        return
+    try:
+        scheduler.run(once=args.once)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
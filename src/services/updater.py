@@ -1,17 +1,38 @@
+"""
+Data update pipeline (update_all_data). One-shot compaction of COT files written before the
+slim schema (unused raw columns -> data/raw/archive/*.csv.gz, processed -> PROCESSED_COLUMNS):
+
+    python -m src.services.updater --compact-cot
+"""
 from __future__ import annotations
 
+import argparse
+import json
+import logging
 import os
 from pathlib import Path
-from typing import Callable, Dict
+from typing import Callable, Dict, Optional, Sequence
 
 import pandas as pd
 
+from src.analytics import conclusion_timeline, derived
 from src.analytics.indicators import build_indicators
 from src.analytics.statistics import add_vix_deviation_indicators, calculate_z_score
 from src.config.settings import get_settings
 from src.data_fetchers import finance_api
-from src.data_fetchers.cot_parser import fetch_cot_raw, preprocess
-from src.utils.helpers import save_csv
+from src.data_fetchers.cot_parser import compact, fetch_cot_raw, preprocess, split_raw
+from src.services.data_loader import earliest_change, load_dataset, parse_dates
+from src.services import http_cache, intraday
+from src.services.fetch_scheduler import FetchResult, FetchScheduler
+from src.services.storage import read_dataset
+from src.utils.helpers import save_csv, save_dataset
+
+logger = logging.getLogger(__name__)
+
+COT_DATE_COL = "report_date_as_yyyy_mm_dd"
+PRICE_DATASETS = ["btc", "eth", "spx", "nasdaq", "dxy", "us10y"]
+COT_ASSETS = ["BTC", "ETH"]
+ARCHIVE_DIR = "archive"
 
 
 def _ensure_dirs(*paths: str) -> None:
@@ -19,47 +40,349 @@ def _ensure_dirs(*paths: str) -> None:
         os.makedirs(p, exist_ok=True)
 
 
-def _update_price(name: str, fetch_fn: Callable[[], pd.DataFrame], proc_dir: str) -> None:
-    df = fetch_fn()
-    save_csv(df, f"{proc_dir}/{name}_price.csv")
+# -----------------
+# Incremental helpers
+# -----------------
+def _stored_dataset(path: str) -> Optional[pd.DataFrame]:
+    df, _backend = read_dataset(path)
+    if df is None or df.empty or "date" not in df.columns:
+        return None
+    return parse_dates(df.copy())
+
+
+def _stored_raw(path: str, **read_kwargs) -> Optional[pd.DataFrame]:
+    if not Path(path).exists():
+        return None
+    df = pd.read_csv(path, **read_kwargs)
+    return None if df.empty else df
+
+
+def _since(last_date, overlap_days: int) -> str:
+    return (pd.Timestamp(last_date).normalize() - pd.Timedelta(days=overlap_days)).strftime("%Y-%m-%d")
+
+
+def _merge_bars(old: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    """Appends new bars (dates as naive UTC); on the same calendar day the new bar wins."""
+    out = pd.concat([old, parse_dates(new.copy())], ignore_index=True)
+    key = out["date"].dt.normalize()
+    out = out[~key.duplicated(keep="last")]
+    return out.sort_values("date").reset_index(drop=True)
+
+
+# -----------------
+# Datasets: fetched frame -> stored files
+# -----------------
+def _apply_price(name: str, proc_dir: str, old: Optional[pd.DataFrame], new: pd.DataFrame) -> str:
+    path = f"{proc_dir}/{name}_price.csv"
+    if new.empty:
+        return "unchanged"
+    save_dataset(new if old is None else _merge_bars(old, new), path)
+    return "updated"
+
+
+def _apply_vix(raw_dir: str, proc_dir: str, old: Optional[pd.DataFrame], new: pd.DataFrame) -> str:
+    if new.empty:
+        return "unchanged"
+    vix_raw = new if old is None else _merge_bars(old, new)
+    save_csv(vix_raw, f"{raw_dir}/vix.csv")
+    # rolling-окно считается по всей истории, поэтому processed пересчитываем целиком (локально).
+    vix = add_vix_deviation_indicators(vix_raw, window=252)
+    save_dataset(vix, f"{proc_dir}/vix_processed.csv")
+    return "updated"
+
 
+def _merge_cot_raw(old: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    out = pd.concat([old, new], ignore_index=True)
+    key = "id" if "id" in out.columns else COT_DATE_COL
+    out = out.drop_duplicates(subset=key, keep="last")
+    return out.sort_values(COT_DATE_COL, kind="stable").reset_index(drop=True)
 
-def _update_cot(asset: str, raw_dir: str, proc_dir: str) -> None:
-    cot_raw = fetch_cot_raw(asset)
-    if cot_raw.empty:
-        return
 
+def _archive_cot(asset: str, raw_dir: str, unused: pd.DataFrame) -> None:
+    """Merges raw columns outside RAW_COLUMNS into the gzip archive of `asset`."""
+    path = Path(raw_dir) / ARCHIVE_DIR / f"{asset.lower()}_cot_unused.csv.gz"
+    old = _stored_raw(str(path), dtype=str)
+    out = unused if old is None else _merge_cot_raw(old, unused)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    out.to_csv(path, index=False, compression="gzip")
+
+
+def _write_cot(asset: str, raw_dir: str, proc_dir: str, cot_raw: pd.DataFrame) -> None:
+    cot_raw, unused = split_raw(cot_raw)
+    if unused is not None:
+        _archive_cot(asset, raw_dir, unused)
     save_csv(cot_raw, f"{raw_dir}/{asset.lower()}_cot_raw.csv")
 
     cot = preprocess(cot_raw)
     cot = build_indicators(cot)
     cot = calculate_z_score(cot)
 
-    save_csv(cot.sort_values("date"), f"{proc_dir}/{asset.lower()}_cot_processed.csv")
+    save_dataset(compact(cot.sort_values("date")), f"{proc_dir}/{asset.lower()}_cot_processed.csv")
+
+
+def _apply_cot(asset: str, raw_dir: str, proc_dir: str, old: Optional[pd.DataFrame], new: pd.DataFrame) -> str:
+    if new.empty:
+        return "unchanged"
+    _write_cot(asset, raw_dir, proc_dir, new if old is None else _merge_cot_raw(old, new))
+    return "updated"
+
+
+def compact_cot(raw_dir: str = "data/raw", proc_dir: Optional[str] = None) -> None:
+    """Rewrites stored COT files in the slim schema (no download); the processed values are unchanged."""
+    proc_dir = proc_dir or str(Path(get_settings().data_dir))
+    for asset in COT_ASSETS:
+        raw = _stored_raw(f"{raw_dir}/{asset.lower()}_cot_raw.csv", dtype=str)
+        if raw is None:
+            continue
+        _write_cot(asset, raw_dir, proc_dir, raw)
+    load_dataset.cache_clear()
+
+
+def _apply_intraday(asset: str, new: pd.DataFrame) -> str:
+    months = intraday.write_bars(asset, new)
+    return "updated" if months else "unchanged"
 
 
-def update_all_data() -> None:
+def _apply_derived() -> str:
+    """Derive stage: rewrites the derived artifacts when the stored sources or the schema changed."""
+    if not get_settings().derived.enabled:
+        return "unchanged"
+    dfs = {name: load_dataset(name, columns=["date", "close"]) for name in derived.DERIVED_COLUMNS}
+    if derived.up_to_date(dfs):
+        return "unchanged"
+    derived.write_derived(dfs)
+    return "updated"
+
+
+def _apply_conclusion(since: Optional[pd.Timestamp] = None) -> str:
+    """
+    Conclusion stage: rebuilds the as-of Conclusion timeline when its inputs or settings changed;
+    with `since` (earliest changed input date) only the days from it on are scored again.
+    """
+    s = get_settings()
+    if not (s.derived.enabled and s.compass_mode):
+        return "unchanged"
+    dfs = {name: load_dataset(name) for name in s.files}
+    if conclusion_timeline.up_to_date(dfs):
+        return "unchanged"
+    conclusion_timeline.write_timeline(dfs, since=since.date() if since is not None else None)
+    return "updated"
+
+
+# -----------------
+# Fetch jobs
+# -----------------
+def _yahoo_job(starts: Dict[str, str], required: bool) -> Callable[[], Dict[str, pd.DataFrame]]:
+    def run() -> Dict[str, pd.DataFrame]:
+        frames = finance_api.fetch_yahoo_batch(starts)
+        missing = [t for t, df in frames.items() if df.empty]
+        # При полной загрузке пустой ответ — ошибка (повторяем); в инкрементальной — просто нет новых баров.
+        if required and missing:
+            raise RuntimeError(f"Failed to load {missing} from Yahoo Finance")
+        return frames
+
+    return run
+
+
+def _split_yahoo_batch(batch: FetchResult, starts: Dict[str, str], required: set) -> Dict[str, FetchResult]:
+    """
+    Per-dataset results of the multi-ticker job. Tickers the batch did not deliver (the whole job
+    failed, or an empty frame where bars are required) are fetched one by one, so only their
+    datasets fail.
+    """
+    frames = batch.value if batch.ok else {}
+    out: Dict[str, FetchResult] = {}
+    retry: Dict[str, tuple] = {}
+    for name, start in starts.items():
+        ticker = finance_api.TICKERS[name]
+        df = frames.get(ticker)
+        if df is None or (df.empty and name in required):
+            retry[name] = ("yahoo", _yahoo_job({ticker: start}, name in required))
+        else:
+            out[name] = FetchResult(name, "yahoo", value={ticker: df}, attempts=batch.attempts, elapsed=batch.elapsed)
+    if retry:
+        logger.warning("Yahoo batch did not deliver %s; fetching them individually", sorted(retry))
+        out.update(FetchScheduler().run(retry))
+    return {name: out[name] for name in starts}
+
+
+def _cot_job(asset: str, since: Optional[str]) -> Callable[[], pd.DataFrame]:
+    return lambda: fetch_cot_raw(asset, since=since)
+
+
+def _intraday_job(asset: str, start: str, interval: str) -> Callable[[], pd.DataFrame]:
+    return lambda: finance_api.fetch_intraday(finance_api.TICKERS[asset], start, interval)
+
+
+# -----------------
+# Full refresh policy
+# -----------------
+def _read_state(path: str) -> dict:
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_state(path: str, state: dict) -> None:
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(json.dumps(state, indent=2), encoding="utf-8")
+
+
+def needs_full_refresh(now: Optional[pd.Timestamp] = None) -> bool:
+    """Full mode, no recorded full refresh yet, or the last one is older than full_refresh_days."""
+    upd = get_settings().updater
+    if upd.mode == "full":
+        return True
+    last = _read_state(upd.state_file).get("last_full_refresh")
+    if last is None:
+        return True
+    if upd.full_refresh_days <= 0:
+        return False
+    now = pd.Timestamp.now() if now is None else pd.Timestamp(now)
+    return now - pd.Timestamp(last) >= pd.Timedelta(days=upd.full_refresh_days)
+
+
+def update_all_data(full: Optional[bool] = None, datasets: Optional[Sequence[str]] = None) -> Dict[str, str]:
+    """
+    Updates every dataset (or only `datasets`: names of settings.files, "<asset>_intraday");
+    returns dataset -> "updated" | "unchanged" | "failed: ...".
+
+    Incremental runs fetch only the tail after the last stored date (minus overlap_days)
+    and merge it in; `full=None` lets needs_full_refresh() decide. All sources are fetched
+    concurrently by FetchScheduler through the response cache (src/services/http_cache.py; a full
+    refresh expires it first); a failed source keeps its previous files. With
+    `intraday.enabled` the intraday tail of each intraday asset is merged into its monthly
+    partitions (src/services/intraday.py), reported as "<asset>_intraday".
+    Finally the derive stage refreshes the derived artifacts (src/analytics/derived.py) and the
+    conclusion stage the as-of Conclusion timeline (src/analytics/conclusion_timeline.py),
+    reported under "derived" and "conclusion"; incremental runs rescore the timeline only from the
+    earliest date where the stored datasets changed.
+    """
     s = get_settings()
     raw_dir = "data/raw"
     proc_dir = str(Path(s.data_dir))
+    full = needs_full_refresh() if full is None else full
+    logger.info("Updating data (%s)", "full refresh" if full else "incremental")
+    selected = set(datasets) if datasets is not None else None
+    yahoo_names = [n for n in ["vix", *PRICE_DATASETS] if selected is None or n in selected]
+    cot_assets = [a for a in COT_ASSETS if selected is None or f"{a.lower()}_cot" in selected]
+    intraday_assets = [a for a in s.intraday.assets if s.intraday.enabled and (selected is None or f"{a}_intraday" in selected)]
+    # Датасеты до обновления: по ним этап conclusion находит первую изменившуюся дату
+    before = {} if full else {name: load_dataset(name) for name in s.files}
 
     _ensure_dirs(raw_dir, proc_dir)
+    overlap = s.updater.overlap_days
+    if full:
+        # Полная загрузка не берёт ответы из кэша по TTL; CFTC всё равно отвечает 304, если данные не менялись
+        http_cache.expire()
 
-    vix_raw = finance_api.fetch_vix()
-    save_csv(vix_raw, f"{raw_dir}/vix.csv")
-    vix = add_vix_deviation_indicators(vix_raw, window=252)
-    save_csv(vix, f"{proc_dir}/vix_processed.csv")
-
-    price_fetchers: Dict[str, Callable] = {
-        "btc": finance_api.fetch_btc,
-        "eth": finance_api.fetch_eth,
-        "spx": finance_api.fetch_spx,
-        "nasdaq": finance_api.fetch_nasdaq,
-        "dxy": finance_api.fetch_dxy,
-        "us10y": finance_api.fetch_us10y,
-    }
-    for name, fn in price_fetchers.items():
-        _update_price(name, fn, proc_dir)
-
-    _update_cot("BTC", raw_dir, proc_dir)
-    _update_cot("ETH", raw_dir, proc_dir)
\ No newline at end of file
+    # 1) что уже лежит на диске -> с какой даты качать
+    stored: Dict[str, Optional[pd.DataFrame]] = {}
+    if not full:
+        if "vix" in yahoo_names:
+            vix_old = _stored_raw(f"{raw_dir}/vix.csv")
+            stored["vix"] = parse_dates(vix_old) if vix_old is not None else None
+        for name in PRICE_DATASETS:
+            if name in yahoo_names:
+                stored[name] = _stored_dataset(f"{proc_dir}/{name}_price.csv")
+        for asset in cot_assets:
+            # dtype=str: в raw лежат строки ровно как их отдаёт Socrata JSON.
+            cot_old = _stored_raw(f"{raw_dir}/{asset.lower()}_cot_raw.csv", dtype=str)
+            stored[f"{asset.lower()}_cot"] = cot_old if cot_old is not None and COT_DATE_COL in cot_old.columns else None
+
+    yahoo_starts: Dict[str, str] = {}
+    for name in yahoo_names:
+        old = stored.get(name)
+        yahoo_starts[name] = _since(old["date"].max(), overlap) if old is not None else finance_api.DEFAULT_STARTS[name]
+
+    # 2) все источники параллельно
+    jobs: Dict[str, tuple] = {}
+    if s.fetch.yahoo_batch and yahoo_starts:
+        starts = {finance_api.TICKERS[name]: start for name, start in yahoo_starts.items()}
+        # Пустые тикеры пакета не валят задачу: ниже они догружаются по одному
+        jobs["yahoo"] = ("yahoo", _yahoo_job(starts, required=False))
+    else:
+        for name, start in yahoo_starts.items():
+            jobs[name] = ("yahoo", _yahoo_job({finance_api.TICKERS[name]: start}, stored.get(name) is None))
+    for asset in cot_assets:
+        old = stored.get(f"{asset.lower()}_cot")
+        since = _since(old[COT_DATE_COL].max(), overlap) if old is not None else None
+        jobs[f"{asset.lower()}_cot"] = ("cftc", _cot_job(asset, since))
+    # Внутридневные бары: всегда хвост (в пределах lookback_days), история копится в партициях
+    for asset in intraday_assets:
+        jobs[f"{asset}_intraday"] = ("yahoo", _intraday_job(asset, intraday.fetch_start(asset), s.intraday.interval))
+
+    results = FetchScheduler().run(jobs)
+    if "yahoo" in results:
+        results.update(_split_yahoo_batch(results.pop("yahoo"), yahoo_starts, {n for n in yahoo_starts if full or stored.get(n) is None}))
+
+    # 3) слияние и запись; сбой одного источника не трогает остальные
+    status: Dict[str, str] = {}
+
+    def apply(name: str, res, fn: Callable[[], str]) -> None:
+        if not res.ok:
+            status[name] = f"failed: {res.error}"
+            return
+        try:
+            status[name] = fn()
+        except Exception as e:
+            logger.exception("Update of %s failed: %s", name, e)
+            status[name] = f"failed: {e}"
+
+    for name in yahoo_names:
+        res = results[name]
+        ticker = finance_api.TICKERS[name]
+        if name == "vix":
+            apply(name, res, lambda: _apply_vix(raw_dir, proc_dir, stored.get("vix"), res.value[ticker]))
+        else:
+            apply(name, res, lambda: _apply_price(name, proc_dir, stored.get(name), res.value[ticker]))
+    for asset in cot_assets:
+        key = f"{asset.lower()}_cot"
+        res = results[key]
+        apply(key, res, lambda: _apply_cot(asset, raw_dir, proc_dir, stored.get(key), res.value))
+    for asset in intraday_assets:
+        res = results[f"{asset}_intraday"]
+        apply(f"{asset}_intraday", res, lambda: _apply_intraday(asset, res.value))
+
+    failed = {k: v for k, v in status.items() if v.startswith("failed")}
+    if full and not failed and selected is None:
+        state = _read_state(s.updater.state_file)
+        state["last_full_refresh"] = pd.Timestamp.now().isoformat(timespec="seconds")
+        _write_state(s.updater.state_file, state)
+    for name, r in results.items():
+        logger.info("Fetched %s (%s): %s in %.2fs, %d attempt(s)", name, r.source, "ok" if r.ok else "failed", r.elapsed, r.attempts)
+
+    # load_dataset кэширует файлы в процессе — после записи сбрасываем.
+    load_dataset.cache_clear()
+
+    # 4) derive: производные ряды по записанным данным (даже если источник упал — по тем, что на диске)
+    try:
+        status["derived"] = _apply_derived()
+    except Exception as e:
+        logger.exception("Derive stage failed: %s", e)
+        status["derived"] = f"failed: {e}"
+
+    # 5) conclusion: таймлайн вкладки Conclusion по записанным данным
+    try:
+        since = None if full else earliest_change(before, {name: load_dataset(name) for name in s.files})
+        status["conclusion"] = _apply_conclusion(since)
+    except Exception as e:
+        logger.exception("Conclusion stage failed: %s", e)
+        status["conclusion"] = f"failed: {e}"
+    return status
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--compact-cot", action="store_true", help="move unused COT columns to the archive")
+    args = parser.parse_args()
+    if args.compact_cot:
+        compact_cot()
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
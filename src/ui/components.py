@@ -4,8 +4,10 @@ from __future__ import annotations
 import pandas as pd
 import plotly.graph_objects as go
 
+from src.analytics.derived import daily_correlation, stored_daily_correlation
 from src.analytics.statistics import get_deviation_levels, get_quantile_thresholds
 from src.config.settings import get_settings
+from src.ui.downsample import candle_rule, downsample_line, ohlc_resample
 
 DEFAULT_TEMPLATE = "plotly_dark"
 
@@ -20,6 +22,15 @@ def _set_x_range(fig: go.Figure, x_range_min, x_range_max, padding_days: int) ->
     pad = pd.Timedelta(days=padding_days)
     fig.update_xaxes(range=[x_range_min - pad, x_range_max + pad])
 
+def _line(x, y, **kwargs) -> go.Scatter:
+    """Line trace reduced to the chart's point budget (LTTB); long series are drawn with WebGL."""
+    ui = get_settings().ui
+    # WebGL выбирается по длине ряда до прореживания: после LTTB точек не больше max_points
+    trace = go.Scattergl if len(x) > ui.webgl_min_points else go.Scatter
+    if ui.downsample:
+        x, y = downsample_line(x, y, ui.max_points)
+    return trace(x=x, y=y, **kwargs)
+
 def candlestick(
     df: pd.DataFrame,
     title: str,
@@ -30,13 +41,19 @@ def candlestick(
     s = get_settings()
     padding_days = padding_days if padding_days is not None else s.ui.plot_padding_days
 
+    # На широком диапазоне дневные свечи уже чем пиксель — агрегируем в недельные/месячные
+    rule, label = candle_rule(df, s.ui.max_candles) if s.ui.downsample else ("D", "1D")
+    bars = ohlc_resample(df, rule)
+    if rule != "D":
+        title = f"{title} ({label})"
+
     fig = go.Figure(
         go.Candlestick(
-            x=df["date"],
-            open=df["open"],
-            high=df["high"],
-            low=df["low"],
-            close=df["close"],
+            x=bars["date"],
+            open=bars["open"],
+            high=bars["high"],
+            low=bars["low"],
+            close=bars["close"],
             name=title.split()[0],
         )
     )
@@ -70,9 +87,9 @@ def vix_deviation(
 
     fig = go.Figure()
     fig.add_trace(
-        go.Scatter(
-            x=df["date"],
-            y=df["deviation_pct"],
+        _line(
+            df["date"],
+            df["deviation_pct"],
             mode="lines",
             name="Deviation %",
             line=dict(color="deepskyblue", width=2),
@@ -256,7 +273,7 @@ def normalised_performance(
 
     for name, df in series_map.items():
         pct = (df["close"] / df["close"].iloc[0] - 1) * 100
-        fig.add_trace(go.Scatter(x=df["date"], y=pct, name=name))
+        fig.add_trace(_line(df["date"], pct, name=name))
         min_date = df["date"].min() if min_date is None else min(min_date, df["date"].min())
         max_date = df["date"].max() if max_date is None else max(max_date, df["date"].max())
 
@@ -286,9 +303,9 @@ def liquidity_vacuum(
     padding_days = padding_days if padding_days is not None else s.ui.plot_padding_days
 
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=df_btc["date"], y=df_btc["close"], name="BTC", yaxis="y1", line=dict(color="orange")))
-    fig.add_trace(go.Scatter(x=df_dxy["date"], y=df_dxy["close"], name="DXY", yaxis="y2", line=dict(color="red")))
-    fig.add_trace(go.Scatter(x=df_us10y["date"], y=df_us10y["close"], name="US10Y", yaxis="y3", line=dict(color="purple")))
+    fig.add_trace(_line(df_btc["date"], df_btc["close"], name="BTC", yaxis="y1", line=dict(color="orange")))
+    fig.add_trace(_line(df_dxy["date"], df_dxy["close"], name="DXY", yaxis="y2", line=dict(color="red")))
+    fig.add_trace(_line(df_us10y["date"], df_us10y["close"], name="US10Y", yaxis="y3", line=dict(color="purple")))
 
     min_date = min(df_btc["date"].min(), df_dxy["date"].min(), df_us10y["date"].min())
     max_date = max(df_btc["date"].max(), df_dxy["date"].max(), df_us10y["date"].max())
@@ -321,20 +338,12 @@ def rolling_correlation(
     s = get_settings()
     padding_days = padding_days if padding_days is not None else s.ui.plot_padding_days
 
-    btc_min, btc_max = df_btc["date"].min().normalize(), df_btc["date"].max().normalize()
-    spx_min, spx_max = df_spx["date"].min().normalize(), df_spx["date"].max().normalize()
-
-    start, end = min(btc_min, spx_min), max(btc_max, spx_max)
-    date_range = pd.date_range(start=start, end=end, freq="D")
-
-    btc_series = df_btc.assign(date=df_btc["date"].dt.normalize()).set_index("date")["close"].reindex(date_range)
-    spx_series = df_spx.assign(date=df_spx["date"].dt.normalize()).set_index("date")["close"].reindex(date_range).ffill()
-
-    prices = pd.DataFrame({"btc": btc_series, "spx": spx_series}).dropna(subset=["btc"])
-    corr_series = prices["btc"].rolling(window=window, min_periods=min_periods).corr(prices["spx"])
+    corr_series = stored_daily_correlation(df_btc, window, min_periods)
+    if corr_series is None:
+        corr_series = daily_correlation(df_btc, df_spx, window=window, min_periods=min_periods)
 
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=corr_series.index, y=corr_series.values, name=f"{window}d corr", line=dict(color="cyan", width=2)))
+    fig.add_trace(_line(corr_series.index, corr_series.values, name=f"{window}d corr", line=dict(color="cyan", width=2)))
     fig.add_hline(y=0.8, line_dash="dash", line_color="red")
     fig.add_hline(y=0.0, line_dash="dot", line_color="gray")
     fig.add_hline(y=-0.8, line_dash="dash", line_color="green")
@@ -370,9 +379,9 @@ def equity_curve_chart(
         return fig
 
     fig.add_trace(
-        go.Scatter(
-            x=df["date"],
-            y=df["Equity"],
+        _line(
+            df["date"],
+            df["Equity"],
             mode="lines",
             name="Strategy Equity",
             line=dict(color="#00ff9d", width=3),
@@ -384,9 +393,9 @@ def equity_curve_chart(
         bh_coins = initial_capital / df["close"].iloc[0]
         bh_equity = bh_coins * df["close"]
         fig.add_trace(
-            go.Scatter(
-                x=df["date"],
-                y=bh_equity,
+            _line(
+                df["date"],
+                bh_equity,
                 mode="lines",
                 name="Buy & Hold",
                 line=dict(color="deepskyblue", width=2, dash="dash"),
@@ -6,9 +6,23 @@ from src.analytics.signal_generator import generate_signals
 from src.analytics.trend_validation import run_trend_validation
 from src.config.settings import get_settings
 from src.services.data_loader import filter_df
+from src.services.signal_cache import dataset_digest, signal_cache_key
 from src.ui import components
 
 
+# Ключ данных (хэш содержимого + настроек) хэшируется Streamlit'ом, сами фреймы (_dfs) — нет.
+@st.cache_data(show_spinner=False, max_entries=32)
+def _cached_validation(data_key, asset, start_date, end_date, capital, _dfs):
+    return run_trend_validation(_dfs, asset, initial_capital=capital, start_date=start_date, end_date=end_date)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _cached_backtest(data_key, asset, start_date, end_date, capital, fee_pct, _dfs):
+    from src.analytics.backtest import run_backtest
+
+    return run_backtest(_dfs, asset, initial_capital=capital, fee_pct=fee_pct, start_date=start_date, end_date=end_date)
+
+
 def _asset_dashboard(asset: str, dfs):
     df_price, df_vix, df_cot, *_ = dfs
     asset_lc = asset.lower()
@@ -131,16 +145,10 @@ def trend_validation_dashboard(dfs, btc_min: dt.date, eth_min: dt.date, global_m
         key="trend_slider",
     )
 
-    data_sig = (asset, str(start_date), str(end_date), float(initial_capital))
-
-    def _cached_validation(_sig):
-        _asset, _s_date_str, _e_date_str, _cap = _sig
-        _s_date = dt.date.fromisoformat(_s_date_str)
-        _e_date = dt.date.fromisoformat(_e_date_str)
-        return run_trend_validation(dfs, _asset, initial_capital=_cap, start_date=_s_date, end_date=_e_date)
+    data_key = signal_cache_key(dfs, asset)
 
     with st.spinner("Считаю Trend Validation..."):
-        result = _cached_validation(data_sig)
+        result = _cached_validation(data_key, asset, start_date, end_date, float(initial_capital), dfs)
 
     if result.equity_curve.empty:
         st.warning("Недостаточно данных в выбранном периоде.")
@@ -182,6 +190,14 @@ def trend_validation_dashboard(dfs, btc_min: dt.date, eth_min: dt.date, global_m
             }
         )
 
+    if not result.horizons.empty:
+        st.subheader("Точность по горизонтам")
+        matrix = result.horizons.rename(columns={"horizon_months": "Горизонт, мес."}).set_index("Горизонт, мес.")
+        st.dataframe(
+            matrix.style.format({"accuracy": "{:.1%}", "coverage": "{:.1%}"}),
+            width="stretch",
+        )
+
     df_signals_all = generate_signals(dfs, asset)
     df_signals = filter_df(df_signals_all, start_date, end_date)
 
@@ -212,8 +228,6 @@ def backtesting_dashboard(dfs, btc_min: dt.date, eth_min: dt.date, global_max: d
         return trend_validation_dashboard(dfs, btc_min, eth_min, global_max)
 
     # Legacy UI (original)
-    from src.analytics.backtest import run_backtest
-
     st.header("🔍 Backtesting сигналов (Long-only)")
 
     col1, col2, col3 = st.columns([2, 1, 1])
@@ -249,14 +263,10 @@ def backtesting_dashboard(dfs, btc_min: dt.date, eth_min: dt.date, global_max: d
         key=f"backtest_{asset.lower()}_slider",
     )
 
-    data_sig = (asset, start_date, end_date, float(initial_capital), float(fee_pct), global_max)
-
-    def _cached_backtest(_sig):
-        _asset, _s_date, _e_date, _cap, _fee, _gmax = _sig
-        return run_backtest(dfs, _asset, initial_capital=_cap, fee_pct=_fee, start_date=_s_date, end_date=_e_date)
+    data_key = (signal_cache_key(dfs, asset), dataset_digest(dfs.get(asset.lower())), repr(s.backtest))
 
     with st.spinner("Выполняю бэктест..."):
-        result = _cached_backtest(data_sig)
+        result = _cached_backtest(data_key, asset, start_date, end_date, float(initial_capital), float(fee_pct), dfs)
 
     if result.equity_curve.empty:
         st.warning("Недостаточно данных в выбранном периоде.")
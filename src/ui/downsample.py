@@ -0,0 +1,114 @@
+# src/ui/downsample.py
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+# Шаги агрегации свечей, от мелкого к крупному: (правило, подпись)
+CANDLE_STEPS = [("D", "1D"), ("W", "1W"), ("M", "1M")]
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: indices of `n_out` points of (x, y) that keep the visual shape
+    of the line. The first and last points are always kept; x must be sorted and finite.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # Границы корзин: точка 0 и n-1 отдельно, между ними n_out-2 корзины
+    edges = (np.floor(np.arange(n_out - 1) * ((n - 2) / (n_out - 2))) + 1).astype(np.int64)
+    edges[-1] = n - 1
+    # Средняя точка следующей корзины (для последней — финальная точка ряда)
+    cx, cy = np.concatenate([[0.0], np.cumsum(x)]), np.concatenate([[0.0], np.cumsum(y)])
+    lo, hi = edges[1:], np.append(edges[2:], n)
+    avg_x = (cx[hi] - cx[lo]) / (hi - lo)
+    avg_y = (cy[hi] - cy[lo]) / (hi - lo)
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    if (n - 2) / (n_out - 2) > 16:
+        a = 0
+        for i in range(n_out - 2):
+            start, end = edges[i], edges[i + 1]
+            xs, ys = x[start:end], y[start:end]
+            area = np.abs((x[a] - avg_x[i]) * (ys - y[a]) - (x[a] - xs) * (avg_y[i] - y[a]))
+            a = start + int(np.argmax(area))
+            out[i + 1] = a
+        return out
+
+    # Мелкие корзины: корзины дополнены до общей ширины (2-D массив). Опорная точка корзины i — одна из
+    # точек корзины i-1, поэтому лучший индекс считается сразу для каждой возможной опорной точки,
+    # а последовательная часть LTTB сводится к проходу по готовой таблице выбора.
+    sizes = np.diff(edges)
+    cols = np.arange(sizes.max())
+    valid = cols < sizes[:, None]
+    idx = np.where(valid, edges[:-1, None] + cols, edges[:-1, None])
+    xs, ys = x[idx], y[idx]
+    # Кандидаты в опорные точки: для первой корзины — точка 0, для остальных — точки предыдущей корзины
+    xa = np.vstack([np.full((1, len(cols)), x[0]), xs[:-1]])[:, :, None]
+    ya = np.vstack([np.full((1, len(cols)), y[0]), ys[:-1]])[:, :, None]
+    bx, by = avg_x[:, None, None], avg_y[:, None, None]
+    area = np.abs((xa - bx) * (ys[:, None, :] - ya) - (xa - xs[:, None, :]) * (by - ya))
+    area[~np.broadcast_to(valid[:, None, :], area.shape)] = -1.0
+    pick = np.argmax(area, axis=2).tolist()
+
+    chosen = []
+    k = 0
+    for row in pick:
+        k = row[k]
+        chosen.append(k)
+    out[1:-1] = edges[:-1] + np.asarray(chosen, dtype=np.int64)
+    return out
+
+
+def downsample_line(x, y, max_points: int):
+    """Drops NaN points and reduces the line to `max_points` with LTTB; short lines are returned as is."""
+    if len(y) <= max_points:
+        return x, y
+    yv = np.asarray(y, dtype=float)
+    if pd.api.types.is_datetime64_any_dtype(x):
+        xnum = pd.DatetimeIndex(x).asi8
+    else:
+        xnum = np.asarray(x, dtype=float)
+    keep = np.flatnonzero(np.isfinite(yv))
+    idx = keep[lttb(xnum[keep], yv[keep], max_points)]
+    xv = x.iloc[idx] if isinstance(x, pd.Series) else x[idx]
+    return xv, yv[idx]
+
+
+def ohlc_resample(df: pd.DataFrame, rule: str) -> pd.DataFrame:
+    """
+    Aggregates date-sorted OHLC bars to weekly ("W", Monday-based) or monthly ("M") candles: first
+    open, max high, min low, last close. Each candle is placed at the date of its first bar.
+    """
+    if rule == "D" or df.empty:
+        return df
+    dates = pd.to_datetime(df["date"])
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_localize(None)
+    days = dates.to_numpy().astype("datetime64[D]")
+    if rule == "W":
+        key = (days.astype(np.int64) + 3) // 7  # 1970-01-01 — четверг
+    else:
+        key = days.astype("datetime64[M]").astype(np.int64)
+    first = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+    last = np.r_[first[1:], len(key)] - 1
+    return pd.DataFrame({
+        "date": df["date"].to_numpy()[first],
+        "open": df["open"].to_numpy(dtype=float)[first],
+        "high": np.fmax.reduceat(df["high"].to_numpy(dtype=float), first),
+        "low": np.fmin.reduceat(df["low"].to_numpy(dtype=float), first),
+        "close": df["close"].to_numpy(dtype=float)[last],
+    })
+
+
+def candle_rule(df: pd.DataFrame, max_candles: int) -> tuple[str, str]:
+    """The finest candle step (rule, label) whose candle count over the range of `df` fits `max_candles`."""
+    if len(df) <= max_candles:
+        return CANDLE_STEPS[0]
+    span_days = (df["date"].max() - df["date"].min()).days + 1
+    return CANDLE_STEPS[1] if span_days / 7 <= max_candles else CANDLE_STEPS[2]
@@ -1,12 +1,39 @@
 from __future__ import annotations
 
+import json
 from pathlib import Path
 
 import pandas as pd
 
+from src.config.settings import get_settings
+from src.services.storage import write_dataset
+
 
 def save_csv(df: pd.DataFrame, path: str) -> None:
     p = Path(path)
     p.parent.mkdir(parents=True, exist_ok=True)
     df.to_csv(p, index=False)
-    print(f"✓ Saved: {p}")
\ No newline at end of file
+    print(f"✓ Saved: {p}")
+
+
+def save_dataset(df: pd.DataFrame, path: str) -> None:
+    """Saves a processed dataset with the configured storage backend (`path` is the .csv path)."""
+    s = get_settings()
+    name = next((n for n, rel in s.files.items() if Path(rel).name == Path(path).name), None)
+    p = write_dataset(df, path, dtypes=s.dtypes.schema(name))
+    print(f"✓ Saved: {p}")
+
+
+def write_table(df: pd.DataFrame, path: str | Path) -> Path:
+    """Writes a result table by suffix: .parquet, .arrow/.feather (Arrow IPC), .json (records) or CSV."""
+    out = Path(path)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    if out.suffix == ".parquet":
+        df.to_parquet(out, index=False)
+    elif out.suffix in (".arrow", ".feather"):
+        df.reset_index(drop=True).to_feather(out)
+    elif out.suffix == ".json":
+        out.write_text(json.dumps(df.to_dict("records"), default=str, indent=2), encoding="utf-8")
+    else:
+        df.to_csv(out, index=False)
+    return out